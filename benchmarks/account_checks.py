@@ -0,0 +1,65 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+from orderbook.orderbook_server import orderbook_server
+
+LIMITS = {"max_order_size": 1_000, "max_open_orders": 1_000_000, "max_position": 1_000_000}
+
+def flow(orders: int, accounts: int, seed: int):
+    # (amount, price, type, account) limit orders around a mid of 100: most rest, about
+    # one in four crosses and sweeps a few levels. Bids come from odd accounts and asks
+    # from even ones, so nothing self-trades and every run builds the same book.
+    rng = random.Random(seed)
+    result = []
+    for _ in range(orders):
+        type = rng.choice(("bid", "ask"))
+        offset = rng.randint(-2, 10) * 0.01
+        price = round(100 - offset if type == "bid" else 100 + offset, 2)
+        account = 2 * rng.randint(1, accounts) - (type == "bid") if accounts else None
+        result.append((rng.randint(1, 20), price, type, account))
+    return result
+
+def run(orders: list, options: dict, repeat: int):
+    # Best of repeat runs: (microseconds per order at p50, p99, orders per second)
+    best = None
+    for _ in range(repeat):
+        book = orderbook_server(**options)
+        latencies = []
+        start = time.perf_counter()
+        for amount, price, type, account in orders:
+            begin = time.perf_counter_ns()
+            book.new_limit_order(amount, price, type, account=account)
+            latencies.append(time.perf_counter_ns() - begin)
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        result = (latencies[len(latencies) // 2] / 1000, latencies[int(len(latencies) * 0.99)] / 1000,
+                  len(orders) / elapsed)
+        if best is None or result[2] > best[2]:
+            best = result
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Order entry latency with and without per-account risk checks.")
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--accounts", type=int, default=1_000, help="accounts per side")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    runs = [
+        ("no accounts", flow(args.orders, 0, args.seed), {}),
+        ("accounts", flow(args.orders, args.accounts, args.seed), {}),
+        ("accounts + limits", flow(args.orders, args.accounts, args.seed), LIMITS),
+    ]
+    print(f"{'orders':<20}{'p50 (µs)':>10}{'p99 (µs)':>10}{'orders/s':>12}")
+    for name, orders, options in runs:
+        median, p99, rate = run(orders, options, args.repeat)
+        print(f"{name:<20}{median:>10.2f}{p99:>10.2f}{rate:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
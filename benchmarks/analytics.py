@@ -0,0 +1,73 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+from orderbook.orderbook_server import orderbook_server
+
+def python_summary(book, window: float, bar: float):
+    # What a dashboard does without /analytics: read the execution reports and
+    # build VWAP and OHLCV bars in dicts, one trade at a time
+    reports, _ = book.read_trades(0, limit=None)
+    since = time.time_ns() - int(window * 1e9)
+    bar_ns = int(bar * 1e9)
+    bars = {}
+    notional = volume = 0
+    for report in reports:
+        if report["time"] < since:
+            continue
+        price, amount = report["price"], report["amount"]
+        notional += price * amount
+        volume += amount
+        start = report["time"] // bar_ns * bar_ns
+        row = bars.get(start)
+        if row is None:
+            bars[start] = [start, price, price, price, price, amount, price * amount, 1]
+        else:
+            row[2] = max(row[2], price)
+            row[3] = min(row[3], price)
+            row[4] = price
+            row[5] += amount
+            row[6] += price * amount
+            row[7] += 1
+    for row in bars.values():
+        row[6] /= row[5]
+    return {"vwap": notional / volume if volume else None, "bars": list(bars.values())}
+
+def fill_trades(book, trades: int, seed: int):
+    # Resting asks that a stream of crossing bids takes one fill at a time
+    rng = random.Random(seed)
+    while len(book.trades) < trades:
+        book.new_limit_order(rng.randint(1, 5), 100 + rng.randint(0, 20) * 0.01, "ask")
+        book.new_limit_order(rng.randint(1, 5), 100.2, "bid")
+
+def best_of(function, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="VWAP and OHLCV bars over the trade history, in Python and NumPy.")
+    parser.add_argument("--trades", type=int, nargs="+", default=[1_000, 10_000, 90_000])
+    parser.add_argument("--bar", type=float, default=0.01, help="bar length in seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'trades':>8}{'python (ms)':>14}{'numpy (ms)':>14}{'speedup':>10}")
+    for trades in args.trades:
+        book = orderbook_server()
+        fill_trades(book, trades, args.seed)
+        window = 3600.0
+        python = best_of(lambda: python_summary(book, window, args.bar), args.repeat)
+        vectorized = best_of(lambda: book.open_analytics().trade_bars(int(window * 1e9), int(args.bar * 1e9)), args.repeat)
+        print(f"{len(book.trades):>8}{python * 1000:>14.2f}{vectorized * 1000:>14.2f}{python / vectorized:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
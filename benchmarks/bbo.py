@@ -0,0 +1,64 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import time
+from orderbook.orderbook_server import orderbook_server
+
+def full_book(book):
+    # What a top-of-book consumer got before the BBO channel: the whole book, of
+    # which it read the first bid and ask
+    data = book.get_order_book()
+    return json.dumps({"type": "orderbook", "data": data})
+
+def top_of_book(book):
+    version, bbo = book.get_bbo()
+    return json.dumps({"type": "bbo", "symbol": "DEFAULT", "seq": 1, **bbo}, separators=(",", ":"))
+
+def measure(book, rng: random.Random, publish, changes: int):
+    # Microseconds to publish after each change at the top of the book, and bytes sent
+    times = []
+    size = 0
+    for _ in range(changes):
+        result = book.new_limit_order(1, 100 - rng.randint(0, 1) * 0.01, "bid")
+        start = time.perf_counter()
+        size = len(publish(book))
+        times.append(time.perf_counter() - start)
+        book.cancel_order(result["id"])
+    times.sort()
+    return times[len(times) // 2] * 1e6, size
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of publishing the top of the book as the book gets deeper.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'resting orders':>15}{'full book (µs)':>16}{'bytes':>12}{'bbo (µs)':>10}{'bytes':>8}"
+          f"{'unchanged (µs)':>16}")
+    for depth in args.depths:
+        rng = random.Random(args.seed)
+        book = orderbook_server()
+        for _ in range(depth // 2):
+            book.new_limit_order(1, 100 - rng.randint(1, 500) * 0.01, "bid")
+            book.new_limit_order(1, 100 + rng.randint(1, 500) * 0.01, "ask")
+
+        full, full_size = measure(book, rng, full_book, max(1, args.changes // 10))
+        bbo, bbo_size = measure(book, rng, top_of_book, args.changes)
+
+        # The BBO loop's check when nothing moved: one tuple comparison, no lock
+        version, _ = book.get_bbo()
+        start = time.perf_counter()
+        for _ in range(args.changes):
+            book.get_bbo(version)
+        unchanged = (time.perf_counter() - start) / args.changes * 1e6
+
+        print(f"{depth:>15,}{full:>16,.0f}{full_size:>12,}{bbo:>10.1f}{bbo_size:>8}{unchanged:>16.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import threading
+import time
+from orderbook.orderbook_server import orderbook_server
+
+def locked_order_book(book):
+    # How /orderbook used to read: copy every order while holding the matching lock
+    with book.lock:
+        bids, asks = list(book.bids), list(book.asks)
+    return {"bid": book.decode_orders(bids), "ask": book.decode_orders(asks)}
+
+READERS = {
+    "locked copy": locked_order_book,
+    "published view": orderbook_server.get_order_book,
+}
+
+def seed_book(book, depth: int, rng: random.Random):
+    # depth resting orders per side, spread over 200 levels away from the mid
+    for _ in range(depth):
+        book.new_limit_order(1, 100 - rng.randint(1, 200) * 0.01, "bid")
+        book.new_limit_order(1, 100 + rng.randint(1, 200) * 0.01, "ask")
+
+def run(read, readers: int, args):
+    rng = random.Random(args.seed)
+    book = orderbook_server()
+    seed_book(book, args.depth, rng)
+
+    stop = threading.Event()
+    reads = [0] * readers
+
+    def reader(index):
+        while not stop.is_set():
+            read(book)
+            reads[index] += 1
+            if args.interval:
+                time.sleep(args.interval)
+
+    threads = [threading.Thread(target=reader, args=(index,), daemon=True) for index in range(readers)]
+    for thread in threads:
+        thread.start()
+
+    # The matcher adds orders that cross now and then, and cancels its own resting ones
+    resting = []
+    orders = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        type = "bid" if orders % 2 == 0 else "ask"
+        price = 100 + rng.randint(-3, 3) * 0.01
+        result = book.new_limit_order(1, price, type)
+        if isinstance(result, dict) and result["resting"] > 0:
+            resting.append(result["id"])
+        if len(resting) > 100:
+            book.cancel_order(resting.pop(rng.randrange(len(resting))))
+        orders += 1
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return orders / elapsed, sum(reads) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Matcher throughput while readers fetch the full book.")
+    parser.add_argument("--readers", type=int, nargs="+", default=[0, 10, 100])
+    parser.add_argument("--depth", type=int, default=5000, help="resting orders per side")
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds each reader waits between reads")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.depth} orders per side, one read per reader every {args.interval * 1000:g}ms")
+    print(f"{'reads':<16}{'readers':>8}{'matcher orders/s':>18}{'reads/s':>12}")
+    for name, read in READERS.items():
+        for readers in args.readers:
+            orders_per_second, reads_per_second = run(read, readers, args)
+            print(f"{name:<16}{readers:>8}{orders_per_second:>18,.0f}{reads_per_second:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
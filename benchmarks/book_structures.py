@@ -0,0 +1,96 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+import tracemalloc
+from sortedcontainers import SortedList
+from orderbook.price_levels import order, book_side
+
+class sortedlist_side:
+    """The original book: a SortedList of (amount, price, id) tuples keyed on price."""
+
+    def __init__(self):
+        self.orders = SortedList(key=lambda x: x[1])
+
+    def add(self, amount, price, id):
+        self.orders.add((amount, price, id))
+
+    def best_price(self):
+        return self.orders[0][1]
+
+    def partial_fill(self, amount):
+        head_amount, head_price, head_id = self.orders[0]
+        self.orders.pop(0)
+        self.orders.add((head_amount - amount, head_price, head_id))
+        return head_id
+
+class price_level_side:
+    def __init__(self):
+        self.side = book_side(descending=False, index={})
+
+    def add(self, amount, price, id):
+        self.side.add(order(id, amount, price, "ask"))
+
+    def best_price(self):
+        return self.side.best.price
+
+    def partial_fill(self, amount):
+        level = self.side.best
+        head_id = level.orders[0].id
+        self.side.fill(level, amount)
+        return head_id
+
+def run(side_class, resting, operations, seed):
+    rng = random.Random(seed)
+    orders = [(rng.randint(10_000, 1_000_000), rng.randint(1, 1000), i) for i in range(resting)]
+
+    tracemalloc.start()
+    side = side_class()
+    start = time.perf_counter()
+    for amount, price, id in orders:
+        side.add(amount, price, id)
+    insert_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        side.best_price()
+    best_time = time.perf_counter() - start
+
+    # Repeated partial fills of the best order; the same id should stay at the head
+    first_id = side.partial_fill(1)
+    start = time.perf_counter()
+    for _ in range(operations):
+        side.partial_fill(1)
+    fill_time = time.perf_counter() - start
+    keeps_priority = side.partial_fill(1) == first_id
+
+    return {
+        "insert": resting / insert_time,
+        "best": operations / best_time,
+        "fill": operations / fill_time,
+        "memory": memory / resting,
+        "fifo": keeps_priority,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the SortedList book with the price-level book.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--operations", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'book':<14}{'resting':>10}{'insert/s':>14}{'best/s':>14}{'fill/s':>14}{'bytes/order':>13}{'FIFO kept':>11}")
+    for size in args.sizes:
+        for name, side_class in (("sortedlist", sortedlist_side), ("price-level", price_level_side)):
+            result = run(side_class, size, args.operations, args.seed)
+            print(f"{name:<14}{size:>10,}{result['insert']:>14,.0f}{result['best']:>14,.0f}"
+                  f"{result['fill']:>14,.0f}{result['memory']:>13.0f}{str(result['fifo']):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import threading
+import time
+import requests
+from orderbook.book_registry import book_registry
+from orderbook.flask_server import flask_server, keep_alive_request_handler
+from orderbook.orderbook_client import orderbook_client
+from orderbook.async_orderbook_client import async_orderbook_client
+
+def start_local_server(host, port):
+    app = flask_server(book_registry(["BENCH"]))
+    threading.Thread(
+        target=lambda: app.run(host, port, debug=False, use_reloader=False,
+                               threaded=True, request_handler=keep_alive_request_handler),
+        daemon=True
+    ).start()
+
+    # Wait until the server accepts requests
+    for _ in range(100):
+        try:
+            requests.get(f"http://{host}:{port}/depth", timeout=1)
+            return
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.05)
+    raise RuntimeError("Local server did not start")
+
+def run_sync(host, port, requests_count, pooled):
+    with orderbook_client(host, port, pooled=pooled) as client:
+        start = time.perf_counter()
+        for i in range(requests_count):
+            client.new_limit_order(1, 1 + i % 50, "bid")
+        return requests_count / (time.perf_counter() - start)
+
+async def run_async(host, port, requests_count, concurrency):
+    async with async_orderbook_client(host, port, max_connections=concurrency) as client:
+        limit = asyncio.Semaphore(concurrency)
+
+        async def submit(i):
+            async with limit:
+                await client.new_limit_order(1, 1 + i % 50, "bid")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(submit(i) for i in range(requests_count)))
+        return requests_count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-call, pooled and async client throughput.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=10001)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight for the async client")
+    parser.add_argument("--external", action="store_true", help="use a server that is already running")
+    args = parser.parse_args()
+
+    if not args.external:
+        start_local_server(args.host, args.port)
+
+    results = [
+        ("sync per-call", run_sync(args.host, args.port, args.requests, pooled=False)),
+        ("sync pooled", run_sync(args.host, args.port, args.requests, pooled=True)),
+        (f"async x{args.concurrency}", asyncio.run(run_async(args.host, args.port, args.requests, args.concurrency))),
+    ]
+
+    print(f"{'client':<16}{'requests/s':>12}")
+    for name, rate in results:
+        print(f"{name:<16}{rate:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
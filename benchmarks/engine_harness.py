@@ -0,0 +1,131 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from orderbook.orderbook_server import orderbook_server
+from flows import FLOWS, from_journal
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def histogram(latencies):
+    # Counts per power-of-two nanosecond bucket, keyed by the bucket's upper bound
+    buckets = {}
+    for latency in latencies:
+        bound = 1 << max(latency, 1).bit_length()
+        buckets[bound] = buckets.get(bound, 0) + 1
+    return {str(bound): buckets[bound] for bound in sorted(buckets)}
+
+def run_operations(operations):
+    # Drives a fresh in-process engine and times every call
+    book = orderbook_server()
+    methods = {name: getattr(book, name) for name in ("new_limit_order", "new_order", "cancel_order", "amend_order")}
+    latencies = {name: [] for name in methods}
+    clock = time.perf_counter_ns
+
+    start = clock()
+    for name, args in operations:
+        method = methods[name]
+        before = clock()
+        method(*args)
+        latencies[name].append(clock() - before)
+    elapsed = (clock() - start) / 1e9
+
+    return elapsed, latencies, len(book.orders)
+
+def peak_memory(operations):
+    tracemalloc.start()
+    run_operations(operations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def summarize(name, operations, measure_memory):
+    elapsed, latencies, resting = run_operations(operations)
+
+    per_operation = {}
+    for operation, samples in latencies.items():
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        per_operation[operation] = {
+            "count": len(ordered),
+            "p50_ns": percentile(ordered, 50),
+            "p90_ns": percentile(ordered, 90),
+            "p99_ns": percentile(ordered, 99),
+            "p999_ns": percentile(ordered, 99.9),
+            "max_ns": ordered[-1],
+            "histogram_ns": histogram(ordered),
+        }
+
+    return {
+        "scenario": name,
+        "operations": len(operations),
+        "seconds": elapsed,
+        "ops_per_sec": len(operations) / elapsed,
+        "resting_orders": resting,
+        "peak_memory_bytes": peak_memory(operations) if measure_memory else None,
+        "latency": per_operation,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_results(results, baseline):
+    previous = {result["scenario"]: result for result in baseline["results"]} if baseline else {}
+
+    print(f"{'scenario':<22}{'ops/s':>12}{'change':>9}{'peak MB':>9}   operation p50/p99 (us)")
+    for result in results:
+        before = previous.get(result["scenario"])
+        change = f"{(result['ops_per_sec'] / before['ops_per_sec'] - 1) * 100:+.1f}%" if before else ""
+        memory = f"{result['peak_memory_bytes'] / 1e6:.1f}" if result["peak_memory_bytes"] is not None else "-"
+        latency = ", ".join(f"{operation} {stats['p50_ns'] / 1000:.1f}/{stats['p99_ns'] / 1000:.1f}"
+                            for operation, stats in result["latency"].items())
+        print(f"{result['scenario']:<22}{result['ops_per_sec']:>12,.0f}{change:>9}{memory:>9}   {latency}")
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process throughput and latency harness for the matching engine.")
+    parser.add_argument("--flows", nargs="+", choices=sorted(FLOWS), default=sorted(FLOWS))
+    parser.add_argument("--operations", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--journal", action="append", default=[], help="journal directory to replay (repeatable)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass used for peak memory")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results from an earlier run to compare throughput against")
+    args = parser.parse_args()
+
+    scenarios = [(name, FLOWS[name](args.operations, args.seed)) for name in args.flows]
+    scenarios += [(f"journal:{os.path.basename(os.path.normpath(path))}", from_journal(path)) for path in args.journal]
+
+    results = [summarize(name, operations, not args.no_memory) for name, operations in scenarios]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "results": results,
+            }, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import threading
+import time
+import requests
+from orderbook.book_registry import book_registry
+from orderbook.flask_server import flask_server, keep_alive_request_handler
+from orderbook.binary_gateway import binary_gateway
+from orderbook.binary_client import binary_orderbook_client
+from orderbook.orderbook_client import orderbook_client
+
+def start_local_servers(host, http_port, binary_port):
+    books = book_registry(["BENCH"])
+    app = flask_server(books)
+    threading.Thread(
+        target=lambda: app.run(host, http_port, debug=False, use_reloader=False,
+                               threaded=True, request_handler=keep_alive_request_handler),
+        daemon=True
+    ).start()
+    threading.Thread(target=binary_gateway(books).start_server, args=(host, binary_port), daemon=True).start()
+
+    # Wait until both accept connections
+    for _ in range(100):
+        try:
+            requests.get(f"http://{host}:{http_port}/depth", timeout=1)
+            binary_orderbook_client(host, binary_port).close()
+            return
+        except (requests.exceptions.ConnectionError, ConnectionRefusedError):
+            time.sleep(0.05)
+    raise RuntimeError("Local servers did not start")
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def order_args(i):
+    # Alternating non-crossing orders so every request does the same work
+    return (1, 100 - i % 50, "bid") if i % 2 == 0 else (1, 101 + i % 50, "ask")
+
+def measure_http(host, port, orders):
+    latencies = []
+    with orderbook_client(host, port) as client:
+        for i in range(orders):
+            start = time.perf_counter_ns()
+            client.new_limit_order(*order_args(i))
+            latencies.append(time.perf_counter_ns() - start)
+    return latencies
+
+def measure_binary(host, port, orders):
+    latencies = []
+    with binary_orderbook_client(host, port) as client:
+        for i in range(orders):
+            start = time.perf_counter_ns()
+            client.new_limit_order(*order_args(i))
+            latencies.append(time.perf_counter_ns() - start)
+    return latencies
+
+def measure_pipelined(host, port, orders, batch_size):
+    # Latency of each batch, reported per order in it
+    latencies = []
+    with binary_orderbook_client(host, port) as client:
+        for first in range(0, orders, batch_size):
+            batch = [client.limit(*order_args(i)) for i in range(first, min(orders, first + batch_size))]
+            start = time.perf_counter_ns()
+            client.submit(batch)
+            latencies.extend([(time.perf_counter_ns() - start) / len(batch)] * len(batch))
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Order entry latency over HTTP/JSON and the binary gateway.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--http-port", type=int, default=10001)
+    parser.add_argument("--binary-port", type=int, default=10003)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    start_local_servers(args.host, args.http_port, args.binary_port)
+
+    results = [
+        ("HTTP/JSON pooled", measure_http(args.host, args.http_port, args.orders)),
+        ("binary", measure_binary(args.host, args.binary_port, args.orders)),
+        (f"binary x{args.batch_size} pipelined", measure_pipelined(args.host, args.binary_port, args.orders, args.batch_size)),
+    ]
+
+    print(f"{'entry path':<26}{'p50 (us)':>10}{'p99 (us)':>10}{'orders/s':>12}")
+    for name, latencies in results:
+        rate = len(latencies) / (sum(latencies) / 1e9)
+        print(f"{name:<26}{percentile(latencies, 50) / 1000:>10.1f}{percentile(latencies, 99) / 1000:>10.1f}{rate:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
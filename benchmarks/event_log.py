@@ -0,0 +1,56 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+from orderbook.orderbook_server import orderbook_server
+from orderbook.event_log import event_log, FILLED
+
+class string_log(list):
+    """The original log: an unbounded list with a datetime.now() f-string per event."""
+
+    def append(self, type, id, price, amount):
+        super().append(f"{datetime.now()} order ({amount}, {price}, {id}) got filled.")
+
+def measure_appends(make_log, events):
+    tracemalloc.start()
+    log = make_log()
+    start = time.perf_counter()
+    for i in range(events):
+        log.append(FILLED, i, 10050, 10)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return events / elapsed, memory
+
+def measure_matching(log, pairs):
+    # Every pair rests an ask then crosses it with a bid: four events per pair
+    book = orderbook_server()
+    book.logs = log
+
+    start = time.perf_counter()
+    for _ in range(pairs):
+        book.new_limit_order(1, 100, "ask")
+        book.new_limit_order(1, 100, "bid")
+    elapsed = time.perf_counter() - start
+    return pairs * 2 / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the f-string log list with the ring buffer event log.")
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--pairs", type=int, default=200_000, help="crossing order pairs for the matching run")
+    parser.add_argument("--capacity", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'log':<12}{'appends/s':>14}{'memory (MB)':>14}{'matching orders/s':>20}")
+    for name, make_log in (("strings", string_log), ("ring buffer", lambda: event_log(args.capacity))):
+        rate, memory = measure_appends(make_log, args.events)
+        matching = measure_matching(make_log(), args.pairs)
+        print(f"{name:<12}{rate:>14,.0f}{memory / 1e6:>14.1f}{matching:>20,.0f}")
+
+if __name__ == "__main__":
+    main()
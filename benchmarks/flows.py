@@ -0,0 +1,133 @@
+import random
+from orderbook.journal import read_records, LIMIT, CANCEL, AMEND, ACCOUNT, TAKER, SIDES
+
+# Seeded synthetic order flows for the engine harness. Every flow is a list of
+# (operation, args) pairs where operation names an orderbook_server method. Flows
+# run against a fresh book, so the n-th order (limit or market) always gets id n.
+
+MID = 10_000
+
+class flow_builder:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.operations = []
+        # Ids the limit orders will get; market orders take ids too
+        self.limit_ids = []
+        self.next_id = 1
+
+    @property
+    def limit_count(self):
+        return len(self.limit_ids)
+
+    def limit(self, amount, price, side):
+        self.limit_ids.append(self.next_id)
+        self.next_id += 1
+        self.operations.append(("new_limit_order", (amount, price, side)))
+
+    def market(self, amount, side):
+        self.next_id += 1
+        self.operations.append(("new_order", (amount, side)))
+
+    def recent_id(self, window):
+        return self.limit_ids[self.rng.randint(max(1, self.limit_count - window), self.limit_count) - 1]
+
+    def cancel_recent(self, window=200):
+        # Cancels one of the most recently placed orders; it may already have filled
+        if self.limit_count:
+            self.operations.append(("cancel_order", (self.recent_id(window),)))
+
+    def amend_recent(self, amount, window=200):
+        if self.limit_count:
+            self.operations.append(("amend_order", (self.recent_id(window), amount)))
+
+def uniform(count: int, seed: int = 1):
+    # Limit orders spread evenly over a wide band; few of them cross
+    builder = flow_builder(seed)
+    rng = builder.rng
+    while len(builder.operations) < count:
+        side = rng.choice(("bid", "ask"))
+        offset = rng.randint(1, 2000)
+        price = MID - offset if side == "bid" else MID + offset
+        builder.limit(rng.randint(1, 100), price, side)
+    return builder.operations
+
+def clustered(count: int, seed: int = 1):
+    # Prices gathered tightly around the mid, so many orders cross on entry
+    builder = flow_builder(seed)
+    rng = builder.rng
+    while len(builder.operations) < count:
+        side = rng.choice(("bid", "ask"))
+        price = int(rng.gauss(MID, 5))
+        builder.limit(rng.randint(1, 100), price, side)
+    return builder.operations
+
+def cancel_heavy(count: int, seed: int = 1):
+    # Market-maker style: mostly cancels and amends of recent quotes
+    builder = flow_builder(seed)
+    rng = builder.rng
+    while len(builder.operations) < count:
+        roll = rng.random()
+        if roll < 0.3 or builder.limit_count < 10:
+            side = rng.choice(("bid", "ask"))
+            offset = rng.randint(1, 50)
+            builder.limit(rng.randint(1, 100), MID - offset if side == "bid" else MID + offset, side)
+        elif roll < 0.8:
+            builder.cancel_recent()
+        else:
+            builder.amend_recent(rng.randint(1, 100))
+    return builder.operations
+
+def sweep_heavy(count: int, seed: int = 1):
+    # Thin resting levels repeatedly swept by large market orders
+    builder = flow_builder(seed)
+    rng = builder.rng
+    while len(builder.operations) < count:
+        if rng.random() < 0.8:
+            side = rng.choice(("bid", "ask"))
+            offset = rng.randint(1, 200)
+            builder.limit(rng.randint(1, 20), MID - offset if side == "bid" else MID + offset, side)
+        else:
+            builder.market(rng.randint(100, 2000), rng.choice(("buy", "sell")))
+    return builder.operations
+
+FLOWS = {
+    "uniform": uniform,
+    "clustered": clustered,
+    "cancel_heavy": cancel_heavy,
+    "sweep_heavy": sweep_heavy,
+}
+
+def from_journal(directory: str):
+    # Rebuilds the accepted orders, cancels and amends from a journal directory.
+    # Fills are not replayed; the engine under test produces its own. An order that
+    # traded on entry comes back from its TAKER record: as a GTC limit order when a
+    # LIMIT record shows it rested, otherwise as a market order capped at its limit
+    # price. Journals from a server that started empty, without a snapshot, replay to
+    # the same book with the same ids. Cancels and amends made by self-trade
+    # prevention replay as cancels and amends of orders already gone or changed.
+    operations = []
+    # (order id, account) from an ACCOUNT record, for the record after it
+    owner = (None, None)
+    # Order id -> index in operations, for TAKER orders whose remainder may rest
+    takers = {}
+    for position, type, side, id, price, amount in read_records(directory):
+        account = owner[1] if owner[0] == id else None
+        if type == ACCOUNT:
+            owner = (id, int(amount))
+        elif type == TAKER:
+            takers[id] = len(operations)
+            operations.append(("new_order", (amount, ("buy", "sell")[side], price or None, account)))
+        elif type == LIMIT and id in takers:
+            # The rest of a TAKER order: replay the whole order as one that may rest
+            full_amount = operations[takers[id]][1][0]
+            operations[takers.pop(id)] = ("new_limit_order", (full_amount, price, SIDES[side], "GTC", False, account))
+        elif type == LIMIT:
+            operations.append(("new_limit_order", (amount, price, SIDES[side], "GTC", False, account)))
+        elif type == CANCEL and id in takers:
+            # What a TAKER order did not trade; replaying the order cancels it again
+            del takers[id]
+        elif type == CANCEL:
+            operations.append(("cancel_order", (id,)))
+        elif type == AMEND:
+            operations.append(("amend_order", (id, amount)))
+    return operations
@@ -0,0 +1,97 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import threading
+import time
+import aiohttp
+from orderbook.book_registry import book_registry
+from orderbook.flask_server import flask_server, keep_alive_request_handler
+from orderbook.async_front_end import async_front_end
+
+def start_flask(host, port):
+    app = flask_server(book_registry(["BENCH"]))
+    threading.Thread(
+        target=lambda: app.run(host, port, debug=False, use_reloader=False,
+                               threaded=True, request_handler=keep_alive_request_handler),
+        daemon=True
+    ).start()
+
+def start_async(host, port):
+    front_end = async_front_end(book_registry(["BENCH"]))
+    threading.Thread(target=front_end.start_server, args=(host, (port,)), daemon=True).start()
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def order_body(i):
+    # Alternating non-crossing orders so every request does the same work
+    if i % 2 == 0:
+        return {"amount": 1, "price": 100 - i % 50, "type": "bid"}
+    return {"amount": 1, "price": 101 + i % 50, "type": "ask"}
+
+async def wait_until_up(url):
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"{url}/depth") as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError(f"{url} did not start")
+
+async def run_load(url, connections, requests_per_connection):
+    # One keep-alive connection per simulated client, all sending at once.
+    # Every third request reads the book so readers and writers interleave.
+    latencies = []
+
+    async def client(index, session):
+        for i in range(requests_per_connection):
+            start = time.perf_counter_ns()
+            if i % 3 == 2:
+                async with session.get(f"{url}/depth") as response:
+                    await response.read()
+            else:
+                async with session.post(f"{url}/limit-order", json=order_body(index + i)) as response:
+                    await response.read()
+            latencies.append(time.perf_counter_ns() - start)
+
+    sessions = [aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=1)) for _ in range(connections)]
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(index, session) for index, session in enumerate(sessions)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await asyncio.gather(*(session.close() for session in sessions))
+    return latencies, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="REST throughput and tail latency: threaded Flask vs the asyncio front end.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--flask-port", type=int, default=10011)
+    parser.add_argument("--async-port", type=int, default=10012)
+    parser.add_argument("--connections", type=int, nargs="+", default=[50, 200, 400])
+    parser.add_argument("--requests", type=int, default=50, help="requests per connection")
+    args = parser.parse_args()
+
+    start_flask(args.host, args.flask_port)
+    start_async(args.host, args.async_port)
+    front_ends = [("Flask threaded", f"http://{args.host}:{args.flask_port}"),
+                  ("asyncio + matching thread", f"http://{args.host}:{args.async_port}")]
+    for _, url in front_ends:
+        asyncio.run(wait_until_up(url))
+
+    print(f"{'front end':<28}{'conns':>7}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for connections in args.connections:
+        for name, url in front_ends:
+            latencies, elapsed = asyncio.run(run_load(url, connections, args.requests))
+            print(f"{name:<28}{connections:>7}{len(latencies) / elapsed:>10,.0f}"
+                  f"{percentile(latencies, 50) / 1e6:>10.2f}{percentile(latencies, 99) / 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import bisect
+import multiprocessing
+import threading
+import time
+import numpy as np
+from orderbook.event_log import event_log
+from orderbook.trade_log import trade_log
+from orderbook.tape import tape, RECORD, TRADE
+
+CHUNK = 1_000_000
+
+def rss_mb():
+    # (heap, file-backed) resident memory in MB, from /proc on Linux. Mapped tape pages
+    # count as file-backed: they are clean and the kernel can drop them at any time.
+    sizes = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                sizes[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return np.array([sizes.get("RssAnon", float("nan")), sizes.get("RssFile", float("nan"))])
+
+def synthetic_records(start: int, count: int, rng: np.random.Generator):
+    # count records starting at record number start, about one every 2µs
+    records = np.zeros(count, dtype=RECORD)
+    records["time"] = 1_700_000_000_000_000_000 + (np.arange(start, start + count) * 2_000
+                                                   + rng.integers(0, 1_000, count))
+    records["type"] = rng.integers(0, TRADE + 1, count)
+    records["side"] = np.where(records["type"] == TRADE, rng.integers(0, 2, count), -1)
+    records["id"] = np.arange(start, start + count)
+    records["price"] = 10_000 + rng.integers(-500, 500, count)
+    records["amount"] = rng.integers(1, 10_000, count)
+    return records
+
+def open_tape(path: str):
+    return tape(path, event_log(1), trade_log(1), threading.Lock())
+
+def write_tape(path: str, events: int):
+    if os.path.exists(path):
+        os.remove(path)
+    rng = np.random.default_rng(1)
+    history = open_tape(path)
+    for start in range(0, events, CHUNK):
+        history.append(synthetic_records(start, min(CHUNK, events - start), rng))
+
+def ranges(first_time: int, last_time: int, queries: int, span: int):
+    # Random [from, to) time ranges `span` nanoseconds wide
+    rng = np.random.default_rng(2)
+    starts = rng.integers(first_time, last_time - span, queries)
+    return [(int(start), int(start) + span) for start in starts]
+
+def measure(query, queries: list):
+    latencies = []
+    returned = 0
+    for start, end in queries:
+        begin = time.perf_counter()
+        returned += query(start, end)
+        latencies.append(time.perf_counter() - begin)
+    latencies.sort()
+    return (latencies[len(latencies) // 2] * 1e6, latencies[int(len(latencies) * 0.99)] * 1e6,
+            returned / len(queries))
+
+def tape_run(path: str, queries: list, results):
+    before = rss_mb()
+    begin = time.perf_counter()
+    history = open_tape(path)
+    opened = time.perf_counter() - begin
+
+    def query(start, end):
+        first, records = history.read(start, end, limit=1_000_000)
+        return len(history.formatted(first, records)["time"])
+
+    median, p99, returned = measure(query, queries)
+    results.put(("memory-mapped tape", len(history), opened, median, p99, returned, *(rss_mb() - before)))
+
+def list_run(events: int, queries: list, results):
+    # The in-memory alternative: one tuple per event in a Python list, searched by time
+    before = rss_mb()
+    begin = time.perf_counter()
+    rng = np.random.default_rng(1)
+    tape_list = []
+    for start in range(0, events, CHUNK):
+        records = synthetic_records(start, min(CHUNK, events - start), rng)
+        tape_list.extend(zip(records["time"].tolist(), records["type"].tolist(), records["side"].tolist(),
+                             records["id"].tolist(), records["price"].tolist(), records["amount"].tolist()))
+    built = time.perf_counter() - begin
+
+    def query(start, end):
+        first = bisect.bisect_left(tape_list, start, key=lambda event: event[0])
+        last = bisect.bisect_left(tape_list, end, key=lambda event: event[0])
+        events = tape_list[first:last]
+        columns = {"time": [event[0] for event in events], "type": [event[1] for event in events],
+                   "side": [event[2] for event in events], "id": [event[3] for event in events],
+                   "price": [event[4] / 100 for event in events], "amount": [event[5] / 1000 for event in events]}
+        return len(columns["time"])
+
+    median, p99, returned = measure(query, queries)
+    results.put(("in-memory list", len(tape_list), built, median, p99, returned, *(rss_mb() - before)))
+
+def main():
+    parser = argparse.ArgumentParser(description="/history range queries: memory-mapped tape vs an in-memory list.")
+    parser.add_argument("--events", type=int, default=50_000_000, help="records on the tape")
+    parser.add_argument("--list-events", type=int, default=5_000_000,
+                        help="events in the list (about 200 bytes each; 50M needs ~10GB of RAM)")
+    parser.add_argument("--path", default="history_benchmark.tape")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--span", type=float, default=2.0, help="milliseconds per query (~500 events per ms)")
+    parser.add_argument("--keep", action="store_true", help="keep the tape file")
+    args = parser.parse_args()
+
+    print(f"Writing {args.events:,} records ({args.events * RECORD.itemsize / 2**30:.1f} GiB) to {args.path}")
+    begin = time.perf_counter()
+    write_tape(args.path, args.events)
+    print(f"Written in {time.perf_counter() - begin:.1f}s")
+
+    span = int(args.span * 1e6)
+    first_time = 1_700_000_000_000_000_000
+    results = multiprocessing.Queue()
+    runs = [(tape_run, (args.path, ranges(first_time, first_time + args.events * 2_000, args.queries, span))),
+            (list_run, (args.list_events,
+                        ranges(first_time, first_time + args.list_events * 2_000, args.queries, span)))]
+
+    print(f"{'store':<20}{'events':>12}{'load (s)':>10}{'p50 (µs)':>10}{'p99 (µs)':>10}{'rows/query':>12}"
+          f"{'heap (MB)':>11}{'mapped (MB)':>13}")
+    for target, target_args in runs:
+        # A fresh process each, so RSS only counts what that store loads
+        process = multiprocessing.Process(target=target, args=(*target_args, results))
+        process.start()
+        name, events, load, median, p99, returned, heap, mapped = results.get()
+        process.join()
+        print(f"{name:<20}{events:>12,}{load:>10.2f}{median:>10.0f}{p99:>10.0f}{returned:>12.0f}"
+              f"{heap:>11.0f}{mapped:>13.0f}")
+
+    if not args.keep:
+        os.remove(args.path)
+
+if __name__ == "__main__":
+    main()
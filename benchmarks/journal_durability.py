@@ -0,0 +1,93 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+from orderbook.orderbook_server import orderbook_server
+
+def submit_orders(book, count, seed):
+    # Resting flow around a mid of 100 with an occasional crossing order
+    rng = random.Random(seed)
+    for _ in range(count):
+        if rng.random() < 0.5:
+            book.new_limit_order(rng.randint(1, 10), rng.randint(80, 101), "bid")
+        else:
+            book.new_limit_order(rng.randint(1, 10), rng.randint(99, 120), "ask")
+
+def measure_throughput(mode, orders, threads, directory):
+    book = orderbook_server()
+    if mode != "none":
+        book.open_journal(directory, mode)
+
+    workers = [threading.Thread(target=submit_orders, args=(book, orders // threads, seed))
+               for seed in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    if book.journal is not None:
+        book.journal.close()
+    return orders / elapsed
+
+def measure_recovery(resting, tail, directory):
+    # Builds a book of `resting` orders, snapshots it, journals `tail` more orders,
+    # then times a cold start from the snapshot plus the tail
+    book = orderbook_server()
+    book.open_journal(directory, "async")
+    rng = random.Random(1)
+    for i in range(resting):
+        if i % 2:
+            book.new_limit_order(rng.randint(1, 10), rng.randint(1, 99), "bid")
+        else:
+            book.new_limit_order(rng.randint(1, 10), rng.randint(101, 200), "ask")
+
+    start = time.perf_counter()
+    book.write_snapshot()
+    snapshot_time = time.perf_counter() - start
+
+    submit_orders(book, tail, seed=2)
+    book.journal.close()
+
+    restored = orderbook_server()
+    start = time.perf_counter()
+    restored.recover(directory)
+    recovery_time = time.perf_counter() - start
+
+    assert list(restored.bids) == list(book.bids) and list(restored.asks) == list(book.asks)
+    return snapshot_time, recovery_time, len(restored.orders)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure journal throughput per durability mode and recovery time.")
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--resting", type=int, default=1_000_000, help="book size for the recovery test")
+    parser.add_argument("--tail", type=int, default=100_000, help="orders journaled after the snapshot")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="microbook-journal-")
+    try:
+        print(f"{'durability':<12}{'threads':>8}{'orders/s':>14}")
+        for mode in ("none", "async", "group"):
+            for threads in args.threads:
+                shutil.rmtree(directory, ignore_errors=True)
+                rate = measure_throughput(mode, args.orders, threads, directory)
+                print(f"{mode:<12}{threads:>8}{rate:>14,.0f}")
+
+        shutil.rmtree(directory, ignore_errors=True)
+        snapshot_time, recovery_time, recovered = measure_recovery(args.resting, args.tail, directory)
+        print(f"\nSnapshot of {args.resting:,} orders written in {snapshot_time:.2f}s")
+        print(f"Recovered {recovered:,} resting orders (snapshot + {args.tail:,}-order tail) in {recovery_time:.2f}s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import threading
+import time
+from orderbook.orderbook_server import orderbook_server
+
+class polling_orderbook(orderbook_server):
+    """Reproduces the original engine: wake every 1ms and match one pair per pass."""
+
+    def __init__(self):
+        super().__init__(inline_matching=False)
+
+    def orderbook_engine_run(self):
+        while True:
+            with self.lock:
+                self.pending_match = False
+                self.match_best()
+            time.sleep(0.001)
+
+def make_book(mode):
+    if mode == "polling":
+        book = polling_orderbook()
+    else:
+        book = orderbook_server(inline_matching=(mode == "inline"))
+
+    threading.Thread(target=book.orderbook_engine_run, daemon=True).start()
+    return book
+
+def wait_until_uncrossed(book):
+    while book.bids and book.asks:
+        time.sleep(0)
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def measure_time_to_fill(mode, samples):
+    """Time from submitting a crossing bid until the book is uncrossed again."""
+    book = make_book(mode)
+    latencies = []
+
+    for i in range(samples):
+        book.new_limit_order(1, 100 + i % 10, "ask")
+        wait_until_uncrossed(book)
+
+        start = time.perf_counter_ns()
+        book.new_limit_order(1, 100 + i % 10, "bid")
+        wait_until_uncrossed(book)
+        latencies.append(time.perf_counter_ns() - start)
+
+    return latencies
+
+def measure_throughput(mode, orders):
+    """Submits a burst of crossing orders and times until every cross is cleared."""
+    book = make_book(mode)
+
+    start = time.perf_counter()
+    for i in range(orders // 2):
+        book.new_limit_order(1, 100, "ask")
+        book.new_limit_order(1, 100, "bid")
+    wait_until_uncrossed(book)
+    elapsed = time.perf_counter() - start
+
+    return orders / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare polling, engine-thread and inline matching.")
+    parser.add_argument("--orders", type=int, default=2000, help="orders per throughput burst")
+    parser.add_argument("--samples", type=int, default=500, help="time-to-fill samples per mode")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'orders/s':>14}{'p50 fill (us)':>16}{'p99 fill (us)':>16}")
+    for mode in ("polling", "engine", "inline"):
+        throughput = measure_throughput(mode, args.orders)
+        latencies = measure_time_to_fill(mode, args.samples)
+        p50 = percentile(latencies, 50) / 1000
+        p99 = percentile(latencies, 99) / 1000
+        print(f"{mode:<10}{throughput:>14,.0f}{p50:>16.1f}{p99:>16.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from orderbook.book_registry import book_registry
+from orderbook.sharded_engine import shard_router
+
+def make_batches(symbols, batches, batch_size, seed):
+    # Limit orders spread over every symbol, crossing often enough to keep matching busy
+    rng = random.Random(seed)
+    result = []
+    for _ in range(batches):
+        batch = []
+        for _ in range(batch_size):
+            if rng.random() < 0.5:
+                price = rng.randint(80, 101)
+                side = "bid"
+            else:
+                price = rng.randint(99, 120)
+                side = "ask"
+            batch.append({"op": "limit", "amount": rng.randint(1, 10), "price": price,
+                          "type": side, "symbol": rng.choice(symbols)})
+        result.append(batch)
+    return result
+
+def measure(books, work):
+    # One front-end thread per list of batches, like concurrent HTTP handlers
+    def submit(batches):
+        for batch in batches:
+            books.submit_batch(batch)
+
+    threads = [threading.Thread(target=submit, args=(batches,)) for batches in work]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return sum(len(batch) for batches in work for batch in batches) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate orders/sec as matching is spread over more worker processes.")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, multiprocessing.cpu_count()}))
+    parser.add_argument("--symbols", type=int, default=max(8, multiprocessing.cpu_count()))
+    parser.add_argument("--orders", type=int, default=400_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=4, help="front-end threads submitting batches")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    batches_per_client = max(1, args.orders // args.batch_size // args.clients)
+    work = [make_batches(symbols, batches_per_client, args.batch_size, seed) for seed in range(args.clients)]
+
+    print(f"{args.clients} front-end threads, batches of {args.batch_size} over {args.symbols} symbols, "
+          f"{multiprocessing.cpu_count()} cores")
+    print(f"{'engine':<18}{'orders/s':>12}{'speedup':>10}")
+
+    baseline = measure(book_registry(symbols), work)
+    print(f"{'in-process':<18}{baseline:>12,.0f}{1.0:>9.2f}x")
+
+    for workers in args.workers:
+        router = shard_router(symbols, workers=workers)
+        rate = measure(router, work)
+        router.close()
+        print(f"{f'{workers} workers':<18}{rate:>12,.0f}{rate / baseline:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
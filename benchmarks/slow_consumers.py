@@ -0,0 +1,144 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from orderbook.book_registry import book_registry
+from orderbook.websocket_server import LogWebSocketServer, SLOW_CONSUMER_POLICIES
+
+class simulated_subscriber:
+    # Stands in for a WebSocket connection: send() takes `delay` seconds per message,
+    # so a slow subscriber is one that drains its socket slowly
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+        self.trade_latencies = []
+        self.dropped_notices = 0
+        self.close_code = None
+        self.closed = asyncio.Event()
+
+    async def send(self, message: str):
+        if self.closed.is_set():
+            raise ConnectionResetError("Subscriber closed")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+        # Only decode what's measured, so the subscribers cost the loop little
+        if message.startswith('{"type": "trades"'):
+            now = time.time_ns()
+            self.trade_latencies.extend(now - trade["time"] for trade in json.loads(message)["data"])
+        elif message.startswith('{"type": "dropped"'):
+            self.dropped_notices += 1
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_code = code
+        self.closed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        # Never sends anything; the connection ends when the server closes it
+        await self.closed.wait()
+        raise StopAsyncIteration
+
+def drive_orders(book, rate: int, duration: float, seed: int):
+    # Limit orders around a mid of 100 at a steady rate; about a third of them cross
+    rng = random.Random(seed)
+    interval = 1 / rate
+    deadline = time.perf_counter() + duration
+    next_order = time.perf_counter()
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.5:
+            book.new_limit_order(1, 100 + rng.randint(-5, 2) * 0.5, "bid")
+        else:
+            book.new_limit_order(1, 100 + rng.randint(-2, 5) * 0.5, "ask")
+        next_order += interval
+        pause = next_order - time.perf_counter()
+        if pause > 0:
+            time.sleep(pause)
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run_policy(policy, args):
+    books = book_registry(["BENCH"])
+    books.start_engines()
+    server = LogWebSocketServer(books, max_queue=args.queue_size, slow_consumer=policy)
+    server.start_monitoring_logs()
+
+    slow_count = int(args.subscribers * args.slow_fraction)
+    subscribers = [simulated_subscriber(args.slow_delay if i < slow_count else 0.0) for i in range(args.subscribers)]
+    handlers = [asyncio.create_task(server.handle_client(subscriber)) for subscriber in subscribers]
+    await asyncio.sleep(0)
+    for subscriber in subscribers:
+        await server.handle_message(subscriber, {"type": "subscribe", "channel": "trades"})
+        await server.handle_message(subscriber, {"type": "subscribe", "channel": "depth", "levels": 10})
+
+    # Event loop lag (how late a 10ms timer fires while fanning out) and the longest queue
+    lags = []
+    peak_queue = 0
+    async def probe():
+        nonlocal peak_queue
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start - 0.01)
+            peak_queue = max([peak_queue] + [len(queue.entries) for queue in server.connected_clients.values()])
+    probe_task = asyncio.create_task(probe())
+
+    await asyncio.to_thread(drive_orders, books.get(None), args.rate, args.duration, args.seed)
+    await asyncio.sleep(0.5)  # Let fast subscribers drain the last poll
+
+    probe_task.cancel()
+    for subscriber in subscribers:
+        subscriber.closed.set()
+    await asyncio.gather(*handlers, return_exceptions=True)
+
+    fast, slow = subscribers[slow_count:], subscribers[:slow_count]
+    fast_latencies = [latency for subscriber in fast for latency in subscriber.trade_latencies]
+    return {
+        "policy": policy,
+        "fast p50 (ms)": percentile(fast_latencies, 50) / 1e6,
+        "fast p99 (ms)": percentile(fast_latencies, 99) / 1e6,
+        "fast msgs": sum(subscriber.received for subscriber in fast) / max(1, len(fast)),
+        "slow msgs": sum(subscriber.received for subscriber in slow) / max(1, len(slow)),
+        "resyncs": sum(subscriber.dropped_notices for subscriber in slow),
+        "closed": sum(1 for subscriber in slow if subscriber.close_code is not None and subscriber.close_code != 1000),
+        "loop lag p99 (ms)": percentile(lags, 99) * 1000,
+        "peak queue": peak_queue,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket fan-out to many subscribers, some of them slow.")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds a slow subscriber takes per message")
+    parser.add_argument("--queue-size", type=int, default=256)
+    parser.add_argument("--rate", type=int, default=100, help="orders per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--policies", nargs="+", choices=SLOW_CONSUMER_POLICIES, default=list(SLOW_CONSUMER_POLICIES))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.subscribers} subscribers, {int(args.subscribers * args.slow_fraction)} slow "
+          f"({args.slow_delay * 1000:.0f}ms per message), {args.rate} orders/s for {args.duration}s")
+    columns = ["policy", "fast p50 (ms)", "fast p99 (ms)", "fast msgs", "slow msgs", "resyncs", "closed",
+               "loop lag p99 (ms)", "peak queue"]
+    print("".join(f"{column:>18}" for column in columns))
+    for policy in args.policies:
+        result = asyncio.run(run_policy(policy, args))
+        print("".join(f"{result[column]:>18}" if isinstance(result[column], (str, int))
+                      else f"{result[column]:>18.1f}" for column in columns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import subprocess
+import time
+from orderbook.cli import PROFILES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What every process pays before MicroBook code runs, and what loading every layer up
+# front (as server.py used to) costs
+BASELINES = [
+    ("python -c pass", ["-c", "pass"]),
+    ("core import", ["-c", "import orderbook.book_registry"]),
+    ("every layer", ["-c", "import orderbook.book_registry, orderbook.sharded_engine, orderbook.flask_server, "
+                           "orderbook.websocket_server, orderbook.async_front_end, orderbook.binary_gateway, "
+                           "orderbook.analytics, orderbook.tape"]),
+]
+
+def measure(arguments: list, repeat: int):
+    # (median wall seconds, largest max RSS in MB) over repeat fresh interpreters
+    times = []
+    rss = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, *arguments], cwd=ROOT,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        _, status, usage = os.wait4(process.pid, 0)
+        times.append(time.perf_counter() - start)
+        if status != 0:
+            raise RuntimeError(f"{' '.join(arguments)} exited with status {status}")
+        # ru_maxrss is in kilobytes on Linux
+        rss = max(rss, usage.ru_maxrss / 1024)
+    times.sort()
+    return times[len(times) // 2], rss
+
+def main():
+    parser = argparse.ArgumentParser(description="Process start time and memory for each CLI profile.")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = BASELINES + [(f"--profile {profile}", ["-m", "orderbook", "--profile", profile, "--startup-only"])
+                        for profile in args.profiles]
+    print(f"{'process':<22}{'start (ms)':>12}{'max RSS (MB)':>14}")
+    for name, arguments in runs:
+        wall, rss = measure(arguments, args.repeat)
+        print(f"{name:<22}{wall * 1000:>12.0f}{rss:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+from orderbook.book_registry import book_registry
+
+def submit_orders(book, count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        if rng.random() < 0.5:
+            book.new_limit_order(rng.randint(1, 10), rng.randint(80, 101), "bid")
+        else:
+            book.new_limit_order(rng.randint(1, 10), rng.randint(99, 120), "ask")
+
+def measure(threads, sharded, orders_per_thread, durability):
+    # One submitting thread per symbol when sharded, otherwise every thread shares one book
+    symbols = [f"SYM{i}" for i in range(threads)] if sharded else ["SYM0"]
+    books = book_registry(symbols)
+
+    directory = None
+    if durability != "none":
+        directory = tempfile.mkdtemp(prefix="microbook-scaling-")
+        books.open_journals(directory, durability)
+
+    workers = [threading.Thread(target=submit_orders,
+                                args=(books.get(symbols[i % len(symbols)]), orders_per_thread, i))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    if directory is not None:
+        for symbol, book in books.items():
+            book.journal.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    return threads * orders_per_thread / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate throughput with one shared book vs one book per symbol.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--orders", type=int, default=20_000, help="orders per thread")
+    parser.add_argument("--durability", choices=["none", "async", "group"], default="none")
+    args = parser.parse_args()
+
+    print(f"{'threads':>8}{'one book orders/s':>20}{'book per symbol orders/s':>26}")
+    for threads in args.threads:
+        shared = measure(threads, False, args.orders, args.durability)
+        sharded = measure(threads, True, args.orders, args.durability)
+        print(f"{threads:>8}{shared:>20,.0f}{sharded:>26,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import sys
+import os
+# Add parent directory to path so we can import orderbook
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import websockets
+from orderbook.orderbook_client import orderbook_client
+
+def random_order_generator(microbook, stop_event):
+    """Keeps the book changing so there are deltas to apply"""
+    while not stop_event.is_set():
+        order_type = random.choice(["bid", "ask"])
+        price = random.randint(1, 12) if order_type == "bid" else random.randint(8, 20)
+        microbook.new_limit_order(random.randint(1, 10), price, order_type)
+        time.sleep(random.uniform(0.001, 0.01))
+
+def aggregate_orders_by_price(orders):
+    levels = {}
+    for amount, price, order_id in orders:
+        levels[price] = levels.get(price, 0) + amount
+    return levels
+
+def compare_books(local, remote):
+    """Returns the price levels where the rebuilt book differs from /orderbook"""
+    differences = []
+    for side in ("bid", "ask"):
+        expected = aggregate_orders_by_price(remote[side])
+        for price in set(expected) | set(local[side]):
+            if not math.isclose(expected.get(price, 0), local[side].get(price, 0)):
+                differences.append((side, price, local[side].get(price), expected.get(price)))
+    return differences
+
+class depth_book:
+    """Rebuilds aggregated depth from a depth_snapshot and the depth_updates after it"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.levels = {"bid": {}, "ask": {}}
+        self.seq = None
+        self.gaps = 0
+
+    async def apply(self, websocket, data):
+        if data["type"] == "depth_snapshot":
+            self.levels = {"bid": {}, "ask": {}}
+        elif self.seq is None or data["seq"] <= self.seq:
+            # Waiting for a snapshot, or already included in the one we have
+            return
+        elif data["seq"] != self.seq + 1:
+            self.gaps += 1
+            self.seq = None
+            await websocket.send(json.dumps({"type": "resync", "symbol": self.symbol}))
+            return
+
+        self.seq = data["seq"]
+        for side in ("bid", "ask"):
+            for price, amount in data["data"][side]:
+                if amount > 0:
+                    self.levels[side][price] = amount
+                else:
+                    self.levels[side].pop(price, None)
+
+async def drain(websocket, book, quiet_period):
+    """Applies messages until the server has been quiet for quiet_period seconds"""
+    while True:
+        try:
+            message = await asyncio.wait_for(websocket.recv(), timeout=quiet_period)
+        except asyncio.TimeoutError:
+            return
+        data = json.loads(message)
+        if data["type"] in ("depth_snapshot", "depth_update") and data["symbol"] == book.symbol:
+            await book.apply(websocket, data)
+
+async def check_depth_stream(rounds=5, burst_seconds=2.0):
+    microbook = orderbook_client("localhost", 10000)
+    book = depth_book(microbook.get_symbols()["default"])
+    failures = 0
+
+    async with websockets.connect("ws://localhost:8765") as websocket:
+        # Only follow the symbol under test; the server answers with a fresh snapshot
+        await websocket.send(json.dumps({"type": "subscribe", "channel": "book", "symbols": [book.symbol]}))
+        for round_number in range(1, rounds + 1):
+            stop_event = threading.Event()
+            generator = threading.Thread(target=random_order_generator, args=(microbook, stop_event), daemon=True)
+            generator.start()
+
+            deadline = time.monotonic() + burst_seconds
+            while time.monotonic() < deadline:
+                await drain(websocket, book, quiet_period=0.05)
+
+            # Let the last deltas arrive before comparing with the REST view
+            stop_event.set()
+            generator.join()
+            await drain(websocket, book, quiet_period=0.5)
+
+            remote = await asyncio.to_thread(microbook.get_order_book)
+            differences = compare_books(book.levels, remote)
+            if differences:
+                failures += 1
+                print(f"Round {round_number}: MISMATCH at seq {book.seq}")
+                for side, price, local_amount, remote_amount in differences[:10]:
+                    print(f"   {side} {price}: deltas={local_amount} orderbook={remote_amount}")
+            else:
+                print(f"Round {round_number}: in sync at seq {book.seq} "
+                      f"({len(book.levels['bid'])} bid / {len(book.levels['ask'])} ask levels)")
+
+    print(f"\n{rounds - failures}/{rounds} rounds matched /orderbook, {book.gaps} sequence gaps resynced")
+    return failures == 0
+
+if __name__ == "__main__":
+    try:
+        ok = asyncio.run(check_depth_stream())
+        sys.exit(0 if ok else 1)
+    except (ConnectionRefusedError, OSError):
+        print("Could not connect. Make sure to run 'python server.py' first!")
+        sys.exit(1)
@@ -12,6 +12,9 @@ import random
 from datetime import datetime
 from orderbook.orderbook_client import orderbook_client
 
+# Price levels per side to draw
+DEPTH_LEVELS = 50
+
 def random_order_generator(microbook, stop_event):
     """Thread function to continuously add random orders"""
     while not stop_event.is_set():
@@ -32,60 +35,35 @@ def random_order_generator(microbook, stop_event):
             print(f"Error adding random order: {e}")
             time.sleep(1)
 
-def aggregate_orders_by_price(orders):
-    """Aggregate orders by price level, summing amounts for same prices"""
-    if not orders:
-        return []
-    
-    price_levels = {}
-    for order in orders:
-        amount, price, order_id = order
-        if price in price_levels:
-            price_levels[price] += amount
-        else:
-            price_levels[price] = amount
-    
-    # Return as list of (amount, price) tuples, sorted by price
-    return [(amount, price) for price, amount in sorted(price_levels.items())]
-
 def update_plot(frame, ax, microbook):
     ax.clear()
     
-    current_book = microbook.get_order_book()
+    # Cumulative depth, VWAP and spread are computed by the server's /analytics endpoint
+    analytics = microbook.get_analytics(window=60, bar=1, levels=DEPTH_LEVELS)
+    curve = analytics["depth_curve"]
     
-    asks = current_book["ask"]
-    bids = current_book["bid"]
+    asks = curve["ask"]
+    bids = curve["bid"]
     
-    # Aggregate orders by price level
     if asks:
-        aggregated_asks = aggregate_orders_by_price(asks)
-        ask_prices = [a[1] for a in aggregated_asks]  # price
-        ask_amounts = [a[0] for a in aggregated_asks]  # amount
-        ax.barh(ask_prices, ask_amounts, color='red', alpha=0.7, label='Asks')
+        ax.step([a[0] for a in asks], [a[1] for a in asks], where='post', color='red', label='Asks')
     
     if bids:
-        aggregated_bids = aggregate_orders_by_price(bids)
-        bid_prices = [b[1] for b in aggregated_bids]  # price
-        bid_amounts = [-b[0] for b in aggregated_bids]  # negative amount for left side
-        ax.barh(bid_prices, bid_amounts, color='green', alpha=0.7, label='Bids')
-    
-    ax.axvline(0, color='black', linestyle='-', linewidth=1)
-    ax.set_xlabel("Amount (Bids ← | → Asks)")
-    ax.set_ylabel("Price")
+        ax.step([b[0] for b in bids], [b[1] for b in bids], where='post', color='green', label='Bids')
+    
+    ax.set_xlabel("Price")
+    ax.set_ylabel("Cumulative amount")
     ax.legend()
     ax.grid(True, alpha=0.3)
     
-    # Show order counts (individual orders, not aggregated levels)
-    num_bids = len(bids) if bids else 0
-    num_asks = len(asks) if asks else 0
-    
-    # Show aggregated levels count
-    num_bid_levels = len(aggregated_bids) if bids else 0
-    num_ask_levels = len(aggregated_asks) if asks else 0
+    # Last 1s bar of the book series: [time, bid, ask, mean spread, mean imbalance]
+    vwap = analytics["vwap"]
+    spread = analytics["book"][-1][3] if analytics["book"] else None
     
     ax.set_title(f"Live Orderbook - {datetime.now().strftime('%H:%M:%S')} | "
-                f"Bid Orders: {num_bids} ({num_bid_levels} levels) | "
-                f"Ask Orders: {num_asks} ({num_ask_levels} levels)")
+                f"1m VWAP: {'-' if vwap is None else f'{vwap:.2f}'} | "
+                f"Trades: {analytics['trades']} | "
+                f"Spread: {'-' if spread is None else f'{spread:.2f}'}")
 
 def start_live_orderbook():
     microbook = orderbook_client("localhost", 10000)
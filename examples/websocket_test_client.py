@@ -1,6 +1,7 @@
 import asyncio
 import websockets
 import json
+import requests
 
 async def test_websocket_logs():
     """Test client for WebSocket live logs"""
@@ -9,30 +10,33 @@ async def test_websocket_logs():
     try:
         async with websockets.connect(uri) as websocket:
             print("Connected to WebSocket server")
-            print("Listening for live logs and orderbook updates...")
+            print("Listening for live logs and top-of-book updates...")
             print("-" * 50)
-            
-            await websocket.send(json.dumps({"type": "subscribe", "subscribe_to": "all"}))
+
+            # Best bid, best ask and last trade whenever they change, at most every 250ms.
+            # For the full book see depth_delta_client.py.
+            symbols = (await asyncio.to_thread(requests.get, "http://localhost:10000/symbols")).json()["symbols"]
+            for symbol in symbols:
+                await websocket.send(json.dumps({"type": "subscribe", "channel": "bbo", "symbol": symbol,
+                                                 "interval": 0.25}))
             
             async for message in websocket:
                 try:
                     data = json.loads(message)
                     
                     if data["type"] == "log":
-                        print(f"LOG: {data['message']}")
-                    elif data["type"] == "orderbook":
-                        orderbook = data["data"]
-                        bid_count = len(orderbook["bid"])
-                        ask_count = len(orderbook["ask"])
-                        
-                        best_bid = orderbook["bid"][0] if orderbook["bid"] else None
-                        best_ask = orderbook["ask"][0] if orderbook["ask"] else None
-                        
-                        print(f"ORDERBOOK: {bid_count} bids, {ask_count} asks")
-                        if best_bid and best_ask:
-                            print(f"   Best Bid: {best_bid[0]} @ {best_bid[1]}")
-                            print(f"   Best Ask: {best_ask[0]} @ {best_ask[1]}")
-                            print(f"   Spread: {best_ask[1] - best_bid[1]:.2f}")
+                        print(f"LOG [{data['symbol']}]: {data['message']}")
+                    elif data["type"] == "bbo":
+                        bid, ask, last = data["bid"], data["ask"], data["last"]
+                        print(f"BBO {data['symbol']} #{data['seq']}")
+                        if bid is not None:
+                            print(f"   Best Bid: {bid[1]} @ {bid[0]}")
+                        if ask is not None:
+                            print(f"   Best Ask: {ask[1]} @ {ask[0]}")
+                        if bid is not None and ask is not None:
+                            print(f"   Spread: {ask[0] - bid[0]:.2f}")
+                        if last is not None:
+                            print(f"   Last Trade: {last[1]} @ {last[0]}")
                         
                 except json.JSONDecodeError:
                     print(f"Received non-JSON message: {message}")
@@ -0,0 +1,110 @@
+# What happens when an order would trade against a resting order of the same account:
+# cancel-newest cancels what is left of the incoming order, cancel-oldest cancels the
+# resting one and keeps matching, decrement takes the smaller amount off both without a
+# trade and cancels whichever reaches zero
+SELF_TRADE_PREVENTION = ("cancel-newest", "cancel-oldest", "decrement")
+
+def account_error(account):
+    # Error message for an account id the book can't take, or None. Orders without an
+    # account skip risk checks and self-trade prevention.
+    if account is not None and (type(account) is not int or account <= 0):
+        return "Account must be a positive integer."
+    return None
+
+class account:
+    __slots__ = ("position", "open_orders", "open_bids", "open_asks")
+
+    def __init__(self):
+        # Lots bought minus lots sold since the book started
+        self.position = 0
+        # Resting orders, and the lots they still bid for and offer
+        self.open_orders = 0
+        self.open_bids = 0
+        self.open_asks = 0
+
+    def as_dict(self):
+        return {"position": self.position, "open_orders": self.open_orders,
+                "open_bids": self.open_bids, "open_asks": self.open_asks}
+
+# Stands in for accounts that have never traded or rested anything
+NO_ACCOUNT = account()
+
+class account_book:
+    # Per-account state for one book, kept up to date as orders rest, fill and leave
+    # the book, so every pre-trade check is a few dict and attribute lookups whatever
+    # the account's history. Amounts are lots; a limit of None is not checked.
+    def __init__(self, max_order_size: int = None, max_open_orders: int = None, max_position: int = None):
+        self.max_order_size = max_order_size
+        self.max_open_orders = max_open_orders
+        self.max_position = max_position
+        self.accounts = {}
+
+    def get(self, id: int):
+        state = self.accounts.get(id)
+        if state is None:
+            state = self.accounts[id] = account()
+        return state
+
+    def check(self, id: int, buy: bool, amount: int, rests: bool):
+        # Error message if an order of amount lots would break one of the account's
+        # limits, or None. The position limit counts the worst case: the order and every
+        # resting order on the same side filling in full.
+        if self.max_order_size is not None and amount > self.max_order_size:
+            return "Order exceeds the account's maximum order size."
+
+        state = self.accounts.get(id, NO_ACCOUNT)
+        if rests and self.max_open_orders is not None and state.open_orders >= self.max_open_orders:
+            return "Account has too many open orders."
+        if self.max_position is not None:
+            return self.position_error(state, buy, amount)
+        return None
+
+    def check_increase(self, id: int, buy: bool, amount: int, new_amount: int):
+        # check() for amending a resting order of the account from amount up to new_amount
+        if self.max_order_size is not None and new_amount > self.max_order_size:
+            return "Order exceeds the account's maximum order size."
+        return self.position_error(self.accounts[id], buy, new_amount - amount)
+
+    def position_error(self, state: account, buy: bool, amount: int):
+        if self.max_position is not None:
+            if buy and state.position + state.open_bids + amount > self.max_position:
+                return "Order could take the account over its position limit."
+            if not buy and state.position - state.open_asks - amount < -self.max_position:
+                return "Order could take the account over its position limit."
+        return None
+
+    # Called by book_side as orders with an account change
+
+    def opened(self, resting, bid: bool):
+        state = self.accounts.get(resting.account)
+        if state is None:
+            state = self.accounts[resting.account] = account()
+        state.open_orders += 1
+        if bid:
+            state.open_bids += resting.amount
+        else:
+            state.open_asks += resting.amount
+
+    def reduced(self, resting, amount: int, bid: bool):
+        # amount lots of resting left the book without trading
+        state = self.accounts[resting.account]
+        if bid:
+            state.open_bids -= amount
+        else:
+            state.open_asks -= amount
+
+    def filled(self, resting, amount: int, bid: bool):
+        state = self.accounts[resting.account]
+        if bid:
+            state.open_bids -= amount
+            state.position += amount
+        else:
+            state.open_asks -= amount
+            state.position -= amount
+
+    def closed(self, resting):
+        self.accounts[resting.account].open_orders -= 1
+
+    def traded(self, id: int, buy: bool, amount: int):
+        # An incoming order of account id took amount lots from the book
+        self.get(id).position += amount if buy else -amount
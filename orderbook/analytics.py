@@ -0,0 +1,197 @@
+import bisect
+import math
+import time
+from itertools import islice
+import numpy as np
+
+# Market data statistics computed with NumPy over whole columns at once. Trades are
+# read through zero-copy views of the trade_log columns, so the tape costs nothing
+# extra to keep; the book is sampled into a ring of top-of-book columns.
+
+# Top-of-book samples kept per book: an hour at the default 100ms interval
+HISTORY_CAPACITY = 36_000
+
+def analytics_error(window: float, bar: float, levels: int):
+    # Error message for request parameters summary() can't serve, or None
+    if not (math.isfinite(window) and math.isfinite(bar) and window > 0 and bar > 0):
+        return "Window and bar must be positive and finite."
+    if levels <= 0:
+        return "Levels must be positive."
+    return None
+
+class depth_history:
+    # Fixed-capacity ring of book samples in the same layout as trade_log: sample
+    # number n lives in slot n % capacity. Prices are ticks, sizes lots, and a price
+    # of 0 means that side was empty.
+    def __init__(self, capacity: int = HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.bids = np.zeros(capacity, dtype=np.int64)
+        self.asks = np.zeros(capacity, dtype=np.int64)
+        # Lots resting in the sampled top levels of each side
+        self.bid_sizes = np.zeros(capacity, dtype=np.int64)
+        self.ask_sizes = np.zeros(capacity, dtype=np.int64)
+        self.next = 0
+
+    def append(self, time: int, bid: int, ask: int, bid_size: int, ask_size: int):
+        # Only ever called from the sampler thread
+        slot = self.next % self.capacity
+        self.times[slot] = time
+        self.bids[slot] = bid
+        self.asks[slot] = ask
+        self.bid_sizes[slot] = bid_size
+        self.ask_sizes[slot] = ask_size
+        self.next += 1
+
+    def oldest(self):
+        return max(0, self.next - self.capacity + 1)
+
+def window_slots(times: np.ndarray, capacity: int, first: int, end: int, since: int):
+    # Ring slots, oldest first, of entries first..end-1 timed at or after since.
+    # Times only go up, so the start is found by bisecting on entry numbers.
+    start = bisect.bisect_left(range(first, end), since, key=lambda n: times[n % capacity])
+    return np.arange(first + start, end) % capacity
+
+def decode(scale, units: np.ndarray):
+    # fixed_point.decode for a whole array
+    if scale.per_one is not None:
+        return units / scale.per_one
+    return np.round(units * scale.size, scale.decimals)
+
+def bar_starts(times: np.ndarray, bar: int):
+    # (bar number of every entry, index of the first entry of each bar) for entries in time order
+    numbers = times // bar
+    starts = np.flatnonzero(np.diff(numbers)) + 1
+    return numbers, np.concatenate(([0], starts))
+
+class market_analytics:
+    def __init__(self, book, levels: int = 10, capacity: int = HISTORY_CAPACITY):
+        self.book = book
+        # Levels per side summed into the sampled sizes used for imbalance
+        self.levels = levels
+        self.history = depth_history(capacity)
+
+        trades = book.trades
+        self.trade_prices = np.frombuffer(trades.prices, dtype=np.int64)
+        self.trade_amounts = np.frombuffer(trades.amounts, dtype=np.int64)
+        self.trade_times = np.frombuffer(trades.times, dtype=np.int64)
+
+    def sample(self):
+        # Records the best prices and the size near the top of each side from the
+        # published view, so sampling never takes the book's lock
+        view = self.book.published()
+        bid = ask = bid_size = ask_size = 0
+        for price, total, _, _ in islice(view.bid_levels.values(), self.levels):
+            bid = bid or price
+            bid_size += total
+        for price, total, _, _ in islice(view.ask_levels.values(), self.levels):
+            ask = ask or price
+            ask_size += total
+        self.history.append(time.monotonic_ns(), bid, ask, bid_size, ask_size)
+
+    def sample_run(self, interval: float):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling the book: {e}")
+            time.sleep(interval)
+
+    def recent_trades(self, since: int):
+        # (prices, amounts, times) arrays for trades at or after monotonic time since.
+        # Trades overwritten while they were copied are dropped, as trade_log.read does.
+        trades = self.book.trades
+        first, end = trades.oldest(), trades.next
+        slots = window_slots(self.trade_times, trades.capacity, first, end, since)
+        prices, amounts, times = self.trade_prices[slots], self.trade_amounts[slots], self.trade_times[slots]
+        overwritten = trades.oldest() - (end - len(slots))
+        if overwritten > 0:
+            prices, amounts, times = prices[overwritten:], amounts[overwritten:], times[overwritten:]
+        return prices, amounts, times + trades.clock_offset
+
+    def recent_samples(self, since: int):
+        # (times, bids, asks, bid sizes, ask sizes) for samples at or after since with
+        # both sides of the book present
+        history = self.history
+        first, end = history.oldest(), history.next
+        slots = window_slots(history.times, history.capacity, first, end, since)
+        bids, asks = history.bids[slots], history.asks[slots]
+        present = (bids > 0) & (asks > 0)
+        return (history.times[slots][present] + self.book.trades.clock_offset, bids[present], asks[present],
+                history.bid_sizes[slots][present], history.ask_sizes[slots][present])
+
+    def trade_bars(self, window: int, bar: int):
+        # VWAP and volume over the window, plus one [time, open, high, low, close,
+        # volume, vwap, trades] row per bar that had trades
+        prices, amounts, times = self.recent_trades(time.monotonic_ns() - window)
+        if len(prices) == 0:
+            return {"trades": 0, "volume": 0.0, "vwap": None, "bars": []}
+
+        prices = decode(self.book.prices, prices)
+        notional = prices * amounts
+        volume = int(amounts.sum())
+
+        numbers, starts = bar_starts(times, bar)
+        ends = np.append(starts[1:], len(prices))
+        bar_volumes = np.add.reduceat(amounts, starts)
+        columns = np.column_stack((
+            prices[starts],
+            np.maximum.reduceat(prices, starts),
+            np.minimum.reduceat(prices, starts),
+            prices[ends - 1],
+            decode(self.book.amounts, bar_volumes),
+            np.add.reduceat(notional, starts) / bar_volumes,
+        ))
+        bars = [[start, *row, count] for start, row, count
+                in zip((numbers[starts] * bar).tolist(), columns.tolist(), (ends - starts).tolist())]
+
+        return {"trades": len(prices), "volume": float(decode(self.book.amounts, volume)),
+                "vwap": float(notional.sum() / volume), "bars": bars}
+
+    def book_bars(self, window: int, bar: int):
+        # One [time, bid, ask, mean spread, mean imbalance] row per bar from the
+        # samples, with bid and ask as of the bar's last sample. Imbalance is
+        # (bid size - ask size) / (bid size + ask size) over the sampled levels.
+        times, bids, asks, bid_sizes, ask_sizes = self.recent_samples(time.monotonic_ns() - window)
+        if len(times) == 0:
+            return []
+
+        sizes = bid_sizes + ask_sizes
+        imbalance = (bid_sizes - ask_sizes) / np.maximum(sizes, 1)
+        numbers, starts = bar_starts(times, bar)
+        ends = np.append(starts[1:], len(times))
+        counts = ends - starts
+        columns = np.column_stack((
+            decode(self.book.prices, bids[ends - 1]),
+            decode(self.book.prices, asks[ends - 1]),
+            decode(self.book.prices, np.add.reduceat(asks - bids, starts)) / counts,
+            np.add.reduceat(imbalance, starts) / counts,
+        ))
+        return [[start, *row] for start, row in zip((numbers[starts] * bar).tolist(), columns.tolist())]
+
+    def depth_curve(self, levels: int = None):
+        # Cumulative [price, amount] per side, best level first: how much trades
+        # before the price gets that far. Built once per view.
+        view = self.book.published()
+        return view.cached(("curve", levels), lambda: {"bid": self.cumulative(view.bid_levels, levels),
+                                                        "ask": self.cumulative(view.ask_levels, levels)})
+
+    def cumulative(self, levels: dict, count: int = None):
+        count = len(levels) if count is None else min(count, len(levels))
+        rows = list(islice(levels.values(), count))
+        prices = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        totals = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+        return np.column_stack((decode(self.book.prices, prices),
+                                decode(self.book.amounts, np.cumsum(totals)))).tolist()
+
+    def summary(self, window: float = 60.0, bar: float = 1.0, levels: int = 20):
+        # Everything /analytics returns, for the last `window` seconds in `bar`-second
+        # bars. Times are nanoseconds since the epoch, like trade times.
+        window_ns, bar_ns = int(window * 1e9), max(1, int(bar * 1e9))
+        return {
+            "window": window,
+            "bar": bar,
+            **self.trade_bars(window_ns, bar_ns),
+            "book": self.book_bars(window_ns, bar_ns),
+            "depth_curve": self.depth_curve(levels),
+        }
@@ -0,0 +1,240 @@
+import asyncio
+from aiohttp import web, WSMsgType
+from orderbook.book_registry import split_batch
+from orderbook.matching_thread import matching_thread
+from orderbook.metrics import render, CONTENT_TYPE
+from orderbook.sharded_engine import shard_router
+from orderbook.websocket_server import LogWebSocketServer
+
+class aiohttp_socket:
+    # Gives an aiohttp WebSocketResponse the send(), close() and async iteration that
+    # LogWebSocketServer uses with the websockets library
+    def __init__(self, websocket: web.WebSocketResponse):
+        self.websocket = websocket
+
+    async def send(self, message: str):
+        if self.websocket.closed:
+            raise ConnectionResetError("WebSocket is closed")
+        await self.websocket.send_str(message)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        await self.websocket.close(code=code, message=reason.encode())
+
+    def __aiter__(self):
+        return self.messages()
+
+    async def messages(self):
+        async for message in self.websocket:
+            if message.type == WSMsgType.TEXT:
+                yield message.data
+            elif message.type == WSMsgType.ERROR:
+                break
+
+class async_front_end:
+    # Serves the REST routes and the WebSocket feed from one asyncio event loop.
+    # Handlers never touch a book lock: engine calls are queued to the matching
+    # thread (or to the shard workers) and awaited as futures.
+    def __init__(self, registry, **feed_options):
+        self.registry = registry
+        self.engine = registry if isinstance(registry, shard_router) else matching_thread(registry)
+        # The feed's book reads go through the same queue as the handlers'
+        self.feed = LogWebSocketServer(registry, engine=self.engine, **feed_options)
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.post("/limit-order", self.new_limit_order),
+            web.post("/order", self.new_order),
+            web.post("/cancel-order", self.cancel_order),
+            web.post("/amend-order", self.amend_order),
+            web.post("/orders/batch", self.submit_batch),
+            web.get("/symbols", self.get_symbols),
+            web.get("/orderbook", self.get_orderbook),
+            web.get("/bbo", self.get_bbo),
+            web.get("/depth", self.get_depth),
+            web.get("/logs", self.get_logs),
+            web.get("/trades", self.get_trades),
+            web.get("/analytics", self.get_analytics),
+            web.get("/account", self.get_account),
+            web.get("/history", self.get_history),
+            web.get("/metrics", self.get_metrics),
+            # The WebSocket feed answers on every port at the root path
+            web.get("/", self.websocket),
+        ])
+        self.app.on_startup.append(self.on_startup)
+
+    async def on_startup(self, app):
+        self.feed.start_monitoring_logs()
+
+    async def call(self, symbol: str, method: str, *args):
+        return await asyncio.wrap_future(self.engine.submit(symbol, method, args))
+
+    def lookup(self, symbol):
+        # (symbol, None) or (None, error response) for an unknown symbol
+        if self.registry.get(symbol) is None:
+            return None, web.json_response(f"Unknown symbol: {symbol}", status=404)
+        return symbol if symbol is not None else self.registry.default_symbol, None
+
+    async def new_limit_order(self, request):
+        data = await request.json()
+        symbol, error = self.lookup(data.get('symbol'))
+        if error:
+            return error
+        try:
+            result = await self.call(symbol, "new_limit_order", data.get('amount'), data.get('price'), data.get('type'),
+                                     data.get('time_in_force', 'GTC'), data.get('post_only', False),
+                                     data.get('account'))
+        except RuntimeError as e:
+            print(f"Error in new_limit_order: {e}")
+            result = f"Error processing order: {str(e)}"
+        return web.json_response(result)
+
+    async def new_order(self, request):
+        data = await request.json()
+        symbol, error = self.lookup(data.get('symbol'))
+        if error:
+            return error
+        return web.json_response(await self.call(symbol, "new_order", data.get('amount'), data.get('type'),
+                                                 data.get('price'), data.get('account')))
+
+    async def cancel_order(self, request):
+        data = await request.json()
+        symbol, error = self.lookup(data.get('symbol'))
+        if error:
+            return error
+        return web.json_response(await self.call(symbol, "cancel_order", data.get('id')))
+
+    async def amend_order(self, request):
+        data = await request.json()
+        symbol, error = self.lookup(data.get('symbol'))
+        if error:
+            return error
+        return web.json_response(await self.call(symbol, "amend_order", data.get('id'), data.get('amount')))
+
+    async def submit_batch(self, request):
+        data = await request.json()
+        orders = data.get('orders') if isinstance(data, dict) else None
+        if not isinstance(orders, list):
+            return web.json_response("Body must be an object with an 'orders' list.", status=400)
+
+        # Every symbol's part is queued before any is awaited
+        results, groups = split_batch(self.registry, orders)
+        parts = await asyncio.gather(*(self.call(symbol, "submit_batch", [instruction for _, instruction in entries])
+                                       for symbol, entries in groups.items()))
+        for entries, part in zip(groups.values(), parts):
+            for (index, _), result in zip(entries, part):
+                results[index] = result
+        return web.json_response({"results": results})
+
+    async def get_symbols(self, request):
+        return web.json_response({"symbols": self.registry.symbols(), "default": self.registry.default_symbol})
+
+    async def get_orderbook(self, request):
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        return web.json_response(await self.call(symbol, "get_order_book"))
+
+    async def get_bbo(self, request):
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        return web.json_response((await self.call(symbol, "get_bbo"))[1])
+
+    async def get_depth(self, request):
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        levels = query_number(request, 'levels', 10)
+        if levels <= 0:
+            return web.json_response("Levels must be positive.", status=400)
+        return web.json_response(await self.call(symbol, "get_depth", levels))
+
+    async def get_logs(self, request):
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        logs, cursor = await self.call(symbol, "read_logs", query_number(request, 'cursor', None))
+        return web.json_response({"logs": logs, "cursor": cursor})
+
+    async def get_trades(self, request):
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        trades, cursor = await self.call(symbol, "read_trades", query_number(request, 'cursor', None))
+        return web.json_response({"trades": trades, "cursor": cursor})
+
+    async def get_analytics(self, request):
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        window = query_number(request, 'window', 60.0, float)
+        bar = query_number(request, 'bar', 1.0, float)
+        levels = query_number(request, 'levels', 20)
+        # Analytics and the tape need NumPy, loaded on the first request that uses them
+        from orderbook.analytics import analytics_error
+        error = analytics_error(window, bar, levels)
+        if error:
+            return web.json_response(error, status=400)
+        return web.json_response(await self.call(symbol, "get_analytics", window, bar, levels))
+
+    async def get_account(self, request):
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        result = await self.call(symbol, "get_account", query_number(request, 'account', None))
+        return web.json_response(result, status=400 if isinstance(result, str) else 200)
+
+    async def get_history(self, request):
+        if self.registry.tape_dir is None:
+            return web.json_response("History is disabled.", status=404)
+        symbol, error = self.lookup(request.query.get('symbol'))
+        if error:
+            return error
+        start = query_number(request, 'from', None)
+        end = query_number(request, 'to', None)
+        by = request.query.get('by', 'time')
+        limit = query_number(request, 'limit', 10_000)
+        output = request.query.get('format', 'json')
+        from orderbook.tape import history_error, history_headers
+        error = history_error(by, limit, output)
+        if error:
+            return web.json_response(error, status=400)
+        if output == "binary":
+            # Sent straight from the mapped tape when the book is in this process
+            first, records = await self.call(symbol, "read_history", start, end, by, limit, True)
+            return web.Response(body=records.data, content_type="application/octet-stream",
+                                headers=history_headers(first, records))
+        return web.json_response(await self.call(symbol, "read_history", start, end, by, limit))
+
+    async def get_metrics(self, request):
+        if self.registry.metrics is None:
+            return web.json_response("Metrics are disabled.", status=404)
+        # Shard workers are asked over their pipes, so collect off the loop
+        families = await asyncio.to_thread(self.registry.collect_metrics)
+        return web.Response(body=render(families).encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def websocket(self, request):
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        await self.feed.handle_client(aiohttp_socket(websocket))
+        return websocket
+
+    def start_server(self, host="localhost", ports=(10000, 8765)):
+        # Listens on every port from the same loop, so REST and WebSocket clients keep
+        # their usual addresses
+        async def run_server():
+            runner = web.AppRunner(self.app, access_log=None)
+            await runner.setup()
+            for port in ports:
+                await web.TCPSite(runner, host, port).start()
+                print(f"Async front end listening on http://{host}:{port}")
+            await asyncio.Future()  # Run forever
+
+        asyncio.run(run_server())
+
+def query_number(request, name: str, default, type=int):
+    # Like Flask's request.args.get(name, default, type=type)
+    try:
+        return type(request.query[name])
+    except (KeyError, ValueError):
+        return default
@@ -0,0 +1,143 @@
+import aiohttp
+
+# asyncio version of orderbook_client with the same methods, sharing one pooled
+# session so a single process can keep many requests in flight. Use it as
+# `async with async_orderbook_client("localhost", 10000) as client:`.
+class async_orderbook_client:
+    def __init__(self, ip: str, port: int, timeout: float = 10.0, max_connections: int = 100,
+                 symbol: str = None):
+        self.ip = ip
+        self.port = port
+        # Symbol used when a call does not name one; None means the server's default
+        self.symbol = symbol
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self.session = None
+
+    async def start(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self.session = aiohttp.ClientSession(
+                base_url=f"http://{self.ip}:{self.port}",
+                connector=connector,
+                timeout=self.timeout
+            )
+        return self
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def symbol_fields(self, symbol: str = None):
+        symbol = symbol if symbol is not None else self.symbol
+        return {"symbol": symbol} if symbol is not None else {}
+
+    async def post(self, path: str, body: dict):
+        await self.start()
+        async with self.session.post(path, json=body) as response:
+            return await response.json()
+
+    async def get(self, path: str, params: dict = None):
+        await self.start()
+        async with self.session.get(path, params=params) as response:
+            return await response.json()
+
+    async def new_limit_order(self, amount: float, price: float, type: str,
+                              time_in_force: str = "GTC", post_only: bool = False, symbol: str = None,
+                              account: int = None):
+        return await self.post("/limit-order", {
+            "amount": amount,
+            "price": price,
+            "type": type,
+            "time_in_force": time_in_force,
+            "post_only": post_only,
+            "account": account,
+            **self.symbol_fields(symbol)
+        })
+
+    async def new_order(self, amount: float, type: str, price: float = None, symbol: str = None,
+                        account: int = None):
+        # With a price the order only trades at that price or better; the rest is cancelled
+        return await self.post("/order", {
+            "amount": amount,
+            "type": type,
+            "price": price,
+            "account": account,
+            **self.symbol_fields(symbol)
+        })
+
+    async def cancel_order(self, id: int, symbol: str = None):
+        return await self.post("/cancel-order", {
+            "id": id,
+            **self.symbol_fields(symbol)
+        })
+
+    async def amend_order(self, id: int, amount: float, symbol: str = None):
+        return await self.post("/amend-order", {
+            "id": id,
+            "amount": amount,
+            **self.symbol_fields(symbol)
+        })
+
+    async def submit_batch(self, orders: list):
+        orders = [{**self.symbol_fields(), **order} if isinstance(order, dict) else order for order in orders]
+        response = await self.post("/orders/batch", {
+            "orders": orders
+        })
+        return response["results"]
+
+    async def get_symbols(self):
+        return await self.get("/symbols")
+
+    async def get_order_book(self, symbol: str = None):
+        try:
+            return await self.get("/orderbook", self.symbol_fields(symbol))
+        except Exception as e:
+            print(f"Error connecting to server: {e}")
+            return {"ask": [], "bid": []}
+
+    async def get_bbo(self, symbol: str = None):
+        # {"bid": [price, amount], "ask": [price, amount], "last": [price, amount, time]}
+        return await self.get("/bbo", self.symbol_fields(symbol))
+
+    async def get_depth(self, levels: int = 10, symbol: str = None):
+        try:
+            return await self.get("/depth", {"levels": levels, **self.symbol_fields(symbol)})
+        except Exception as e:
+            print(f"Error connecting to server: {e}")
+            return {"ask": [], "bid": []}
+
+    async def get_logs(self, cursor: int = None, symbol: str = None):
+        params = self.symbol_fields(symbol)
+        if cursor is not None:
+            params["cursor"] = cursor
+        return await self.get("/logs", params)
+
+    async def get_trades(self, cursor: int = None, symbol: str = None):
+        params = self.symbol_fields(symbol)
+        if cursor is not None:
+            params["cursor"] = cursor
+        return await self.get("/trades", params)
+
+    async def get_analytics(self, window: float = 60.0, bar: float = 1.0, levels: int = 20, symbol: str = None):
+        return await self.get("/analytics", {"window": window, "bar": bar, "levels": levels,
+                                             **self.symbol_fields(symbol)})
+
+    async def get_history(self, start: int = None, end: int = None, by: str = "time", limit: int = 10_000,
+                          symbol: str = None):
+        params = {"by": by, "limit": limit, **self.symbol_fields(symbol)}
+        if start is not None:
+            params["from"] = start
+        if end is not None:
+            params["to"] = end
+        return await self.get("/history", params)
+
+    async def get_account(self, account: int, symbol: str = None):
+        return await self.get("/account", {"account": account, **self.symbol_fields(symbol)})
@@ -0,0 +1,96 @@
+import itertools
+import socket
+from orderbook.binary_gateway import (REQUEST, ACK, LIMIT, MARKET, CANCEL, AMEND, POST_ONLY, HAS_PRICE,
+                                      TIME_IN_FORCE_CODES, STATUS_NAMES, REASON_NAMES)
+from orderbook.fixed_point import fixed_point
+
+class binary_orderbook_client:
+    # Order entry client for binary_gateway. Every call writes its requests in one
+    # send and reads back one ack per request, so submit() pipelines a whole batch.
+    # Prices and amounts go over the wire as ticks and lots, so tick_size and
+    # lot_size must match the server's.
+    def __init__(self, ip: str, port: int = 10002, symbol_index: int = 0, timeout: float = 10.0,
+                 tick_size: float = 0.01, lot_size: float = 0.001):
+        self.symbol_index = symbol_index
+        self.prices = fixed_point(tick_size)
+        self.amounts = fixed_point(lot_size)
+        self.references = itertools.count(1)
+        self.socket = socket.create_connection((ip, port), timeout=timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def ticks(self, price: float):
+        ticks = self.prices.encode(price)
+        if ticks is None:
+            raise ValueError(f"Price must be a multiple of the tick size {self.prices.size}")
+        return ticks
+
+    def lots(self, amount: float):
+        lots = self.amounts.encode(amount)
+        if lots is None:
+            raise ValueError(f"Amount must be a multiple of the lot size {self.amounts.size}")
+        return lots
+
+    def limit(self, amount: float, price: float, type: str, time_in_force: str = "GTC",
+              post_only: bool = False, symbol_index: int = None, account: int = None):
+        # Packs a limit order request; pass a list of these to submit()
+        return self.pack(LIMIT, 0 if type == "bid" else 1, TIME_IN_FORCE_CODES.index(time_in_force),
+                         POST_ONLY if post_only else 0, symbol_index, account or 0, self.ticks(price),
+                         self.lots(amount))
+
+    def market(self, amount: float, type: str, price: float = None, symbol_index: int = None,
+               account: int = None):
+        return self.pack(MARKET, 0 if type == "buy" else 1, 0, HAS_PRICE if price is not None else 0,
+                         symbol_index, account or 0, 0 if price is None else self.ticks(price), self.lots(amount))
+
+    def cancel(self, id: int, symbol_index: int = None):
+        return self.pack(CANCEL, 0, 0, 0, symbol_index, id, 0, 0)
+
+    def amend(self, id: int, amount: float, symbol_index: int = None):
+        return self.pack(AMEND, 0, 0, 0, symbol_index, id, 0, self.lots(amount))
+
+    def pack(self, type, side, time_in_force, flags, symbol_index, id, price, amount):
+        if symbol_index is None:
+            symbol_index = self.symbol_index
+        return REQUEST.pack(type, side, time_in_force, flags, next(self.references) & 0xFFFFFFFF,
+                            symbol_index, id, price, amount)
+
+    def submit(self, requests: list):
+        # Sends packed requests together and returns their acks in the same order,
+        # with a reason for each rejected one
+        self.socket.sendall(b"".join(requests))
+        data = self.receive(len(requests) * ACK.size)
+        decode = self.amounts.decode
+        return [{"status": STATUS_NAMES[status], "reason": REASON_NAMES[reason], "reference": reference, "id": id,
+                 "filled": decode(filled), "leaves": decode(leaves)}
+                for status, reason, reference, id, filled, leaves in ACK.iter_unpack(data)]
+
+    def receive(self, size: int):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Gateway closed the connection")
+            data += chunk
+        return data
+
+    def new_limit_order(self, amount: float, price: float, type: str,
+                        time_in_force: str = "GTC", post_only: bool = False, account: int = None):
+        return self.submit([self.limit(amount, price, type, time_in_force, post_only, account=account)])[0]
+
+    def new_order(self, amount: float, type: str, price: float = None, account: int = None):
+        return self.submit([self.market(amount, type, price, account=account)])[0]
+
+    def cancel_order(self, id: int):
+        return self.submit([self.cancel(id)])[0]
+
+    def amend_order(self, id: int, amount: float):
+        return self.submit([self.amend(id, amount)])[0]
@@ -0,0 +1,169 @@
+import asyncio
+import struct
+from orderbook.orderbook_server import ORDER_RESTING, ORDER_FILLED, ORDER_DONE
+
+# Order entry over a plain TCP connection with fixed-size little-endian records and
+# no framing: a client may write any number of requests back to back (pipelining),
+# and every request gets exactly one ack, in order. Requests that arrive in the same
+# read are applied as one batch and their acks go out in a single write.
+
+# Request types
+LIMIT = 1
+MARKET = 2
+CANCEL = 3
+AMEND = 4
+
+# Request flags
+POST_ONLY = 1
+HAS_PRICE = 2  # market order with a price limit
+
+TIME_IN_FORCE_CODES = ("GTC", "IOC", "FOK")
+
+# type, side (0 bid/buy, 1 ask/sell), time in force, flags, client reference,
+# symbol index (position in GET /symbols), order id (cancel/amend) or account
+# (limit/market, 0 for none), price in ticks, amount in lots. Ticks and lots go
+# straight to the engine, so binary orders never pass through a float.
+REQUEST = struct.Struct("<BBBBIH2xqqq")
+
+# Ack statuses; orders are acked with the engine's own status
+ACCEPTED = ORDER_RESTING  # resting on the book, possibly after some fills
+FILLED = ORDER_FILLED     # fully filled on entry
+DONE = ORDER_DONE         # traded what it could, the rest was cancelled (IOC, market)
+CANCELLED = 3
+AMENDED = 4
+REJECTED = 5
+
+STATUS_NAMES = ("accepted", "filled", "done", "cancelled", "amended", "rejected")
+
+# Reasons sent with REJECTED acks, 0 otherwise
+INVALID_REQUEST = 1   # unknown symbol, type, side or time in force, or a missing field
+INVALID_PRICE = 2
+INVALID_AMOUNT = 3
+INVALID_ACCOUNT = 4
+ORDER_NOT_FOUND = 5
+WOULD_CROSS = 6       # post-only order would have traded
+CANNOT_FILL = 7       # fill-or-kill order could not fill in full
+RISK_LIMIT = 8        # account order size, open order or position limit
+OTHER = 9
+
+REASON_NAMES = (None, "invalid request", "invalid price", "invalid amount", "invalid account",
+                "order not found", "would cross", "cannot fill", "risk limit", "other")
+
+# The engine's error messages by how they start, and the reason each is sent as
+ERROR_REASONS = (
+    ("Price", INVALID_PRICE), ("Amount", INVALID_AMOUNT), ("Account must", INVALID_ACCOUNT),
+    ("Order not found", ORDER_NOT_FOUND), ("Post-only order would", WOULD_CROSS), ("Fill-or-kill", CANNOT_FILL),
+    ("Order exceeds", RISK_LIMIT), ("Account has too many", RISK_LIMIT), ("Order could take", RISK_LIMIT),
+    ("Missing", INVALID_REQUEST), ("Type must", INVALID_REQUEST), ("Time in force", INVALID_REQUEST),
+    ("Post-only orders must", INVALID_REQUEST), ("Unknown symbol", INVALID_REQUEST),
+)
+
+# status, reject reason, client reference, order id, lots filled, lots left open
+ACK = struct.Struct("<BB2xIqqq")
+
+SIDE_NAMES = {LIMIT: ("bid", "ask"), MARKET: ("buy", "sell")}
+OPS = {LIMIT: "limit", MARKET: "market", CANCEL: "cancel", AMEND: "amend"}
+
+# Upper bound on bytes taken from the socket per batch
+READ_SIZE = 64 * 1024
+
+def reject_reason(error: str):
+    for start, reason in ERROR_REASONS:
+        if error.startswith(start):
+            return reason
+    return OTHER
+
+class binary_gateway:
+    def __init__(self, registry, offload: bool = False):
+        self.registry = registry
+        self.symbols = registry.symbols()
+        # Matching takes microseconds, so batches run on the event loop by default.
+        # Offload them to a thread when calls can block for longer (group commit
+        # durability waits, or shard workers), so other connections keep flowing.
+        self.offload = offload
+
+    def symbol_at(self, index: int):
+        if index >= len(self.symbols):
+            # Symbols created since the last lookup are appended at the end
+            self.symbols = self.registry.symbols()
+        return self.symbols[index] if index < len(self.symbols) else None
+
+    def instruction(self, request: tuple):
+        # Turns a decoded request into a submit_batch instruction, or None if invalid
+        type, side, time_in_force, flags, reference, symbol_index, id, price, amount = request
+        symbol = self.symbol_at(symbol_index)
+        if symbol is None or type not in OPS or side > 1 or time_in_force >= len(TIME_IN_FORCE_CODES):
+            return None
+
+        if type == LIMIT:
+            return {"op": "limit", "symbol": symbol, "amount": amount, "price": price,
+                    "type": SIDE_NAMES[LIMIT][side], "time_in_force": TIME_IN_FORCE_CODES[time_in_force],
+                    "post_only": bool(flags & POST_ONLY), "account": id or None, "units": True}
+        elif type == MARKET:
+            return {"op": "market", "symbol": symbol, "amount": amount, "type": SIDE_NAMES[MARKET][side],
+                    "price": price if flags & HAS_PRICE else None, "account": id or None, "units": True}
+        elif type == CANCEL:
+            return {"op": "cancel", "symbol": symbol, "id": id}
+        return {"op": "amend", "symbol": symbol, "id": id, "amount": amount, "units": True}
+
+    def ack(self, request: tuple, instruction: dict, result):
+        # Limit and market orders come back as the engine's (status, id, type, price,
+        # amount, filled, leaves, ...) tuples, in lots
+        reference = request[4]
+        if instruction is None:
+            return ACK.pack(REJECTED, INVALID_REQUEST, reference, 0, 0, 0)
+        if isinstance(result, str):
+            return ACK.pack(REJECTED, reject_reason(result), reference, 0, 0, 0)
+
+        op = instruction["op"]
+        if op == "limit" or op == "market":
+            status, id, filled, leaves = result[0], result[1], result[5], result[6]
+            return ACK.pack(status, 0, reference, id, filled, leaves if status == ACCEPTED else 0)
+        elif op == "cancel":
+            return ACK.pack(CANCELLED, 0, reference, result["id"], 0, 0)
+        return ACK.pack(AMENDED, 0, reference, result["id"], 0, result["amount"])
+
+    def process(self, requests: list):
+        # Applies a batch of decoded requests, one lock acquisition per book, and
+        # returns the packed acks in request order
+        instructions = [self.instruction(request) for request in requests]
+        valid = [instruction for instruction in instructions if instruction is not None]
+        results = iter(self.registry.submit_batch(valid))
+        return b"".join(self.ack(request, instruction, next(results) if instruction is not None else None)
+                        for request, instruction in zip(requests, instructions))
+
+    async def handle_connection(self, reader, writer):
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                buffer += data
+
+                usable = len(buffer) - len(buffer) % REQUEST.size
+                if usable == 0:
+                    continue
+                with memoryview(buffer) as view:
+                    requests = list(REQUEST.iter_unpack(view[:usable]))
+                del buffer[:usable]
+
+                if self.offload:
+                    acks = await asyncio.to_thread(self.process, requests)
+                else:
+                    acks = self.process(requests)
+                writer.write(acks)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def start_server(self, host="localhost", port=10002):
+        async def run_server():
+            print(f"Binary order entry gateway starting on tcp://{host}:{port}")
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(run_server())
@@ -0,0 +1,167 @@
+import os
+import re
+import threading
+from orderbook.orderbook_server import orderbook_server
+from orderbook.metrics import metrics
+
+# Symbols double as journal directory names, so keep them to a safe character set
+SYMBOL_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,31}")
+
+def journal_symbols(directory: str):
+    # Symbols that have a journal subdirectory under directory
+    if not os.path.isdir(directory):
+        return []
+    return [symbol for symbol in sorted(os.listdir(directory))
+            if os.path.isdir(os.path.join(directory, symbol))]
+
+def split_batch(registry, instructions: list):
+    # Groups batch instructions by symbol. Returns a result list with an error already
+    # in place for every unknown symbol, and {symbol: [(index, instruction)]} for the rest.
+    results = [None] * len(instructions)
+    groups = {}
+    for index, instruction in enumerate(instructions):
+        symbol = instruction.get("symbol") if isinstance(instruction, dict) else None
+        if registry.get(symbol) is None:
+            results[index] = f"Unknown symbol: {symbol}"
+        else:
+            groups.setdefault(symbol if symbol is not None else registry.default_symbol, []).append((index, instruction))
+    return results, groups
+
+class book_registry:
+    # One independent orderbook_server per symbol. Every book has its own lock, engine
+    # thread, event log and journal, so activity on one symbol never waits on another.
+    def __init__(self, symbols: list, allow_new_symbols: bool = False, metrics: metrics = None, **book_options):
+        if not symbols:
+            raise ValueError("At least one symbol is required")
+
+        self.books = {}
+        self.default_symbol = symbols[0]
+        self.allow_new_symbols = allow_new_symbols
+        self.book_options = book_options
+        # Only guards adding books; lookups are plain dict reads
+        self.lock = threading.Lock()
+        self.journal_dir = None
+        self.journal_mode = None
+        self.snapshot_interval = None
+        self.analytics_interval = None
+        self.tape_dir = None
+        self.tape_interval = None
+        self.engine_threads = {}
+        self.engines_started = False
+        # Shared by every book and the servers in front of them; None turns metrics off
+        self.metrics = metrics
+
+        for symbol in symbols:
+            self.books[symbol] = self.new_book(symbol)
+
+    def new_book(self, symbol: str):
+        book = orderbook_server(**self.book_options)
+        if self.metrics is not None:
+            book.instrument(self.metrics, symbol)
+        return book
+
+    def get(self, symbol: str = None):
+        # Returns the book for symbol (the default symbol when None), or None if unknown
+        if symbol is None:
+            symbol = self.default_symbol
+
+        book = self.books.get(symbol)
+        if book is None and self.allow_new_symbols and isinstance(symbol, str) and SYMBOL_PATTERN.fullmatch(symbol):
+            book = self.add(symbol)
+        return book
+
+    def add(self, symbol: str):
+        # Creates the book for symbol, with the journal, snapshots and engine the
+        # existing books have, or returns it if it already exists
+        with self.lock:
+            book = self.books.get(symbol)
+            if book is None:
+                book = self.new_book(symbol)
+                if self.journal_dir is not None:
+                    book.open_journal(os.path.join(self.journal_dir, symbol), self.journal_mode)
+                    if self.snapshot_interval is not None:
+                        self.start_snapshots_for(book)
+                if self.tape_dir is not None:
+                    self.open_tape_for(symbol, book)
+                if self.analytics_interval is not None:
+                    self.start_analytics_for(book)
+                self.books[symbol] = book
+                if self.engines_started:
+                    self.start_engine(symbol)
+        return book
+
+    def symbols(self):
+        return list(self.books)
+
+    def items(self):
+        return list(self.books.items())
+
+    def start_engines(self):
+        self.engines_started = True
+        for symbol in list(self.books):
+            self.start_engine(symbol)
+
+    def start_engine(self, symbol: str):
+        engine_thread = threading.Thread(target=self.books[symbol].orderbook_engine_run, daemon=True)
+        engine_thread.start()
+        self.engine_threads[symbol] = engine_thread
+        return engine_thread
+
+    def open_journals(self, directory: str, mode: str = "group"):
+        # Each symbol journals into its own subdirectory
+        self.journal_dir = directory
+        self.journal_mode = mode
+        for symbol, book in self.books.items():
+            book.open_journal(os.path.join(directory, symbol), mode)
+
+        # Bring back symbols that were created on demand before the restart
+        if self.allow_new_symbols:
+            for symbol in journal_symbols(directory):
+                self.get(symbol)
+
+    def start_snapshots(self, interval: float):
+        self.snapshot_interval = interval
+        for book in self.books.values():
+            self.start_snapshots_for(book)
+
+    def start_snapshots_for(self, book: orderbook_server):
+        snapshot_thread = threading.Thread(target=book.snapshot_run, args=(self.snapshot_interval,), daemon=True)
+        snapshot_thread.start()
+        return snapshot_thread
+
+    def open_tapes(self, directory: str, interval: float = 0.01):
+        # Each symbol tapes into directory/<symbol>.tape, copied from its logs every interval seconds
+        os.makedirs(directory, exist_ok=True)
+        self.tape_dir = directory
+        self.tape_interval = interval
+        for symbol, book in self.books.items():
+            self.open_tape_for(symbol, book)
+
+    def open_tape_for(self, symbol: str, book: orderbook_server):
+        book.open_tape(os.path.join(self.tape_dir, f"{symbol}.tape"))
+        tape_thread = threading.Thread(target=book.tape_run, args=(self.tape_interval,), daemon=True)
+        tape_thread.start()
+        return tape_thread
+
+    def start_analytics(self, interval: float):
+        # Samples every book's top levels each interval seconds for the analytics book series
+        self.analytics_interval = interval
+        for book in self.books.values():
+            self.start_analytics_for(book)
+
+    def start_analytics_for(self, book: orderbook_server):
+        sampler_thread = threading.Thread(target=book.open_analytics().sample_run, args=(self.analytics_interval,), daemon=True)
+        sampler_thread.start()
+        return sampler_thread
+
+    def collect_metrics(self):
+        return self.metrics.collect() if self.metrics is not None else {}
+
+    def submit_batch(self, instructions: list):
+        # Splits the batch by symbol and applies each part under that book's lock alone.
+        # Results come back in the original order.
+        results, groups = split_batch(self, instructions)
+        for symbol, entries in groups.items():
+            for (index, _), result in zip(entries, self.books[symbol].submit_batch([instruction for _, instruction in entries])):
+                results[index] = result
+        return results
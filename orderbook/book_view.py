@@ -0,0 +1,39 @@
+from itertools import islice
+
+class book_view:
+    # Immutable picture of a book at one moment, published for readers so they never
+    # take the book's lock. Each side is a dict of price -> (price, total, count, orders)
+    # in priority order, orders being (amount, price, id) tuples. Level tuples are
+    # shared between views until the level changes. Values are ticks and lots.
+    __slots__ = ("version", "depth_seq", "side_versions", "bid_levels", "ask_levels", "results")
+
+    def __init__(self, version: int, depth_seq: int, side_versions: tuple, bid_levels: dict, ask_levels: dict):
+        self.version = version
+        self.depth_seq = depth_seq
+        # (bid, ask) book_side.version the view was built at
+        self.side_versions = side_versions
+        self.bid_levels = bid_levels
+        self.ask_levels = ask_levels
+        # Responses built from this view, shared by every reader that asks for the same one
+        self.results = {}
+
+    def cached(self, key, build):
+        # Returns build() the first time key is asked for and the same object after
+        # that, so callers must treat it as read-only. Two readers racing on a new key
+        # may both build it; either result is correct.
+        result = self.results.get(key)
+        if result is None:
+            result = self.results[key] = build()
+        return result
+
+    def depth(self, levels: dict):
+        # [price, amount] per level, like book_side.depth()
+        return [[price, total] for price, total, count, orders in levels.values()]
+
+    def top(self, levels: dict, count: int):
+        # [price, amount, order count] for the best `count` levels, like book_side.top()
+        return [[price, total, live] for price, total, live, _ in islice(levels.values(), count)]
+
+    def orders(self, levels: dict):
+        # Every order in priority order, like list(book_side)
+        return [resting for level in levels.values() for resting in level[3]]
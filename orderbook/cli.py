@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from orderbook.accounts import SELF_TRADE_PREVENTION
+from orderbook.metrics import metrics
+
+# Everything below the engine is optional. A profile names the layers it serves and
+# only those are imported, so an engine-only process never loads Flask, websockets,
+# aiohttp or NumPy.
+LAYERS = ("rest", "websocket", "binary")
+
+CHOICES = {
+    "durability": ("async", "group"),
+    "front_end": ("threads", "async"),
+    "self_trade_prevention": SELF_TRADE_PREVENTION,
+}
+
+DEFAULTS = {
+    "symbols": ["DEFAULT"],
+    "allow_new_symbols": False,
+    "workers": 0,
+    "tick_size": 0.01,
+    "lot_size": 0.001,
+    "journal_dir": None,
+    "durability": "group",
+    "snapshot_interval": 60.0,
+    "front_end": "threads",
+    "ws_queue_size": 1000,
+    "slow_consumer": "snapshot",
+    "metrics": False,
+    "tape_dir": None,
+    "analytics_interval": 0.1,
+    "self_trade_prevention": "cancel-newest",
+    "max_order_size": None,
+    "max_open_orders": None,
+    "max_position": None,
+    "serve": ["rest", "websocket"],
+    "host": "localhost",
+    "port": 10000,
+    "ws_port": 8765,
+    "binary_port": None,
+}
+
+# Built-in profiles, each a set of overrides on DEFAULTS. A config file can change
+# these or add its own. Profiles that serve nothing reading /analytics don't sample,
+# which would load NumPy.
+PROFILES = {
+    "engine": {"serve": [], "analytics_interval": 0},
+    "rest": {"serve": ["rest"]},
+    "websocket": {"serve": ["websocket"]},
+    "binary": {"serve": ["binary"], "analytics_interval": 0},
+    "server": {},
+    "all": {"serve": list(LAYERS)},
+}
+
+def build_parser():
+    # Every option defaults to absent, so only flags given on the command line
+    # override the profile and config file
+    parser = argparse.ArgumentParser(prog="python -m orderbook", description="Run the MicroBook server.",
+                                     argument_default=argparse.SUPPRESS)
+    parser.add_argument("--config", help="JSON or TOML file of options, with named profiles under \"profiles\"")
+    parser.add_argument("--profile", default="server",
+                        help=f"layers and options to start with: {', '.join(PROFILES)} or one from --config "
+                             "(default: server, REST and WebSocket)")
+    parser.add_argument("--serve", nargs="*", choices=LAYERS, help="layers to serve, overriding the profile's")
+    parser.add_argument("--run", nargs=argparse.REMAINDER, metavar="SCRIPT",
+                        help="run a Python script with the registry as `books`, then exit; "
+                             "anything after the script is its argv")
+    parser.add_argument("--startup-only", action="store_true", help="start the profile and exit, to time startup")
+
+    parser.add_argument("--symbols", nargs="+", help="symbols to trade, each with its own book; the first is the default")
+    parser.add_argument("--allow-new-symbols", action="store_true", help="create a book the first time a symbol is used")
+    parser.add_argument("--workers", type=int,
+                        help="match in this many worker processes, symbols split between them (default: in-process)")
+    parser.add_argument("--tick-size", type=float, help="smallest price increment")
+    parser.add_argument("--lot-size", type=float, help="smallest amount increment")
+    parser.add_argument("--journal-dir", help="directory for the write-ahead journal and snapshots (default: in-memory only)")
+    parser.add_argument("--durability", choices=CHOICES["durability"],
+                        help="async: write without fsync; group: fsync in batches before acknowledging")
+    parser.add_argument("--snapshot-interval", type=float, help="seconds between snapshots")
+    parser.add_argument("--front-end", choices=CHOICES["front_end"],
+                        help="threads: Flask and the WebSocket server on their own threads; "
+                             "async: both on one asyncio loop, with engine calls queued to a matching thread")
+    parser.add_argument("--ws-queue-size", type=int,
+                        help="messages queued per WebSocket client before the slow-consumer policy applies")
+    parser.add_argument("--slow-consumer",
+                        help="snapshot: drop the backlog and resend depth snapshots; "
+                             "conflate: fold queued depth updates first; disconnect: close the connection")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record counters and latency histograms and serve them at /metrics")
+    parser.add_argument("--tape-dir", help="directory for a memory-mapped tape of every event and fill, served by /history")
+    parser.add_argument("--analytics-interval", type=float,
+                        help="seconds between book samples for /analytics spread and imbalance; 0 turns sampling off")
+    parser.add_argument("--self-trade-prevention", choices=CHOICES["self_trade_prevention"],
+                        help="what happens when an order would trade with its own account's resting order")
+    parser.add_argument("--max-order-size", type=float, help="largest order amount an account may send")
+    parser.add_argument("--max-open-orders", type=int, help="most resting orders an account may have per book")
+    parser.add_argument("--max-position", type=float,
+                        help="largest net position an account may reach per book, counting its resting orders")
+    parser.add_argument("--host", help="address the servers listen on")
+    parser.add_argument("--port", type=int, help="REST port")
+    parser.add_argument("--ws-port", type=int, help="WebSocket port")
+    parser.add_argument("--binary-port", type=int, help="also accept binary order entry on this TCP port")
+    return parser
+
+def read_config(path: str):
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as file:
+            return tomllib.load(file)
+    with open(path) as file:
+        return json.load(file)
+
+def resolve_options(flags: dict, parser: argparse.ArgumentParser):
+    # Options for one run: DEFAULTS, then the config file's top-level options, then
+    # the profile, then command-line flags. Errors exit through the parser.
+    config = read_config(flags.pop("config")) if "config" in flags else {}
+    profiles = dict(PROFILES)
+    for name, overrides in config.pop("profiles", {}).items():
+        profiles[name] = {**profiles.get(name, {}), **overrides}
+
+    profile = flags.pop("profile")
+    if profile not in profiles:
+        parser.error(f"unknown profile {profile!r}; choose from {', '.join(profiles)}")
+    options = {**DEFAULTS, **config, **profiles[profile], **flags}
+
+    for key in options:
+        if key not in DEFAULTS and key not in ("run", "startup_only"):
+            parser.error(f"unknown option {key!r} in the config file")
+    for key, choices in CHOICES.items():
+        if options[key] not in choices:
+            parser.error(f"{key} must be one of {', '.join(choices)}")
+    if any(layer not in LAYERS for layer in options["serve"]):
+        parser.error(f"serve must name layers from {', '.join(LAYERS)}")
+    # A binary port asks for the gateway, as it always has, unless --serve says otherwise
+    if options["binary_port"] and "serve" not in flags and "binary" not in options["serve"]:
+        options["serve"] = [*options["serve"], "binary"]
+    return options
+
+def start_books(options: dict):
+    book_options = {key: options[key] for key in ("tick_size", "lot_size", "self_trade_prevention",
+                                                   "max_order_size", "max_open_orders", "max_position")}
+    book_metrics = metrics() if options["metrics"] else None
+    if options["workers"] > 0:
+        from orderbook.sharded_engine import shard_router
+        books = shard_router(options["symbols"], workers=options["workers"],
+                             allow_new_symbols=options["allow_new_symbols"], metrics=book_metrics, **book_options)
+    else:
+        from orderbook.book_registry import book_registry
+        books = book_registry(options["symbols"], allow_new_symbols=options["allow_new_symbols"],
+                              metrics=book_metrics, **book_options)
+
+    if options["journal_dir"]:
+        books.open_journals(options["journal_dir"], options["durability"])
+        for symbol, book in books.items():
+            print(f"Recovered {book.order_count()} resting {symbol} orders from {options['journal_dir']}")
+        books.start_snapshots(options["snapshot_interval"])
+
+    if options["tape_dir"]:
+        books.open_tapes(options["tape_dir"])
+
+    if options["analytics_interval"] > 0:
+        books.start_analytics(options["analytics_interval"])
+
+    books.start_engines()
+    return books
+
+def feed_options(options: dict, parser: argparse.ArgumentParser):
+    from orderbook.websocket_server import SLOW_CONSUMER_POLICIES
+    if options["slow_consumer"] not in SLOW_CONSUMER_POLICIES:
+        parser.error(f"slow_consumer must be one of {', '.join(SLOW_CONSUMER_POLICIES)}")
+    return {"max_queue": options["ws_queue_size"], "slow_consumer": options["slow_consumer"]}
+
+def server_threads(books, options: dict, parser: argparse.ArgumentParser):
+    # Name -> thread for each served layer, not yet started
+    serve, host = options["serve"], options["host"]
+    threads = {}
+    if options["front_end"] == "async" and ("rest" in serve or "websocket" in serve):
+        # One loop answers REST and WebSocket on every port it listens on
+        from orderbook.async_front_end import async_front_end
+        front_end = async_front_end(books, **feed_options(options, parser))
+        ports = [options[key] for layer, key in (("rest", "port"), ("websocket", "ws_port")) if layer in serve]
+        threads["Async front end"] = threading.Thread(target=lambda: front_end.start_server(host, ports), daemon=True)
+    else:
+        if "rest" in serve:
+            from orderbook.flask_server import flask_server, keep_alive_request_handler
+            flask_app = flask_server(books)
+            threads["Flask server"] = threading.Thread(
+                target=lambda: flask_app.run(host, options["port"], debug=False, use_reloader=False,
+                                             threaded=True, request_handler=keep_alive_request_handler),
+                daemon=True
+            )
+        if "websocket" in serve:
+            from orderbook.websocket_server import LogWebSocketServer
+            websocket_server = LogWebSocketServer(books, **feed_options(options, parser))
+            threads["WebSocket server"] = threading.Thread(
+                target=lambda: websocket_server.start_server(host, options["ws_port"]),
+                daemon=True
+            )
+
+    if "binary" in serve:
+        from orderbook.binary_gateway import binary_gateway
+        offload = options["workers"] > 0 or bool(options["journal_dir"] and options["durability"] == "group")
+        gateway = binary_gateway(books, offload=offload)
+        threads["Binary gateway"] = threading.Thread(
+            target=lambda: gateway.start_server(host, options["binary_port"] or 10002),
+            daemon=True
+        )
+    return threads
+
+def run_script(books, argv: list):
+    # The script sees the started registry as `books` and its own argv
+    sys.argv = argv
+    sys.path.insert(0, os.path.dirname(os.path.abspath(argv[0])))
+    try:
+        runpy.run_path(argv[0], init_globals={"books": books}, run_name="__main__")
+    finally:
+        if hasattr(books, "close"):
+            books.close()
+
+def main(argv: list = None):
+    parser = build_parser()
+    options = resolve_options(vars(parser.parse_args(argv)), parser)
+    books = start_books(options)
+    threads = server_threads(books, options, parser)
+    for server_thread in threads.values():
+        server_thread.start()
+
+    if options.get("run"):
+        run_script(books, options["run"])
+        return
+    if options.get("startup_only"):
+        return
+
+    serve, host = options["serve"], options["host"]
+    print(f"MicroBook started for {', '.join(books.symbols())} serving {', '.join(serve) or 'nothing (engine only)'}")
+    if "rest" in serve:
+        print(f"REST API on http://{host}:{options['port']}")
+    if "websocket" in serve:
+        print(f"WebSocket live logs available on ws://{host}:{options['ws_port']}")
+    print("Press Ctrl+C to stop the server")
+
+    try:
+        while True:
+            for symbol, engine in list(books.engine_threads.items()):
+                if not engine.is_alive():
+                    print(f"WARNING: Order engine for {symbol} has stopped!")
+            for name, server_thread in threads.items():
+                if not server_thread.is_alive():
+                    print(f"WARNING: {name} thread has stopped!")
+
+            time.sleep(1)
+
+    except KeyboardInterrupt:
+        print("\nShutting down server...")
@@ -0,0 +1,102 @@
+from array import array
+from datetime import datetime
+import time
+from orderbook.fixed_point import fixed_point
+
+# Event types
+BID_ADDED = 0
+ASK_ADDED = 1
+FILLED = 2
+MARKET_BUY = 3
+MARKET_SELL = 4
+CANCELLED = 5
+AMENDED = 6
+
+class event_log:
+    def __init__(self, capacity: int = 100_000, price_scale: fixed_point = None, amount_scale: fixed_point = None):
+        # Fixed-size columns; event number n lives in slot n % capacity. Prices and
+        # amounts are stored as the engine's integer ticks and lots.
+        self.capacity = capacity
+        self.types = array("b", bytes(capacity))
+        self.ids = array("q", [0]) * capacity
+        self.prices = array("q", [0]) * capacity
+        self.amounts = array("q", [0]) * capacity
+        self.times = array("q", [0]) * capacity
+
+        # Number of events ever appended, which is also the cursor of the next one
+        self.next = 0
+        # Converts monotonic timestamps to wall-clock time when formatting
+        self.clock_offset = time.time_ns() - time.monotonic_ns()
+        # Turn ticks and lots back into prices and amounts when formatting
+        self.price_scale = price_scale or fixed_point(1)
+        self.amount_scale = amount_scale or fixed_point(1)
+
+    def append(self, type: int, id: int, price: int, amount: int):
+        # Called with the engine lock held; only stores numbers, nothing is formatted
+        slot = self.next % self.capacity
+        self.types[slot] = type
+        self.ids[slot] = id
+        self.prices[slot] = price
+        self.amounts[slot] = amount
+        self.times[slot] = time.monotonic_ns()
+        self.next += 1
+
+    def oldest(self):
+        # The slot after the newest one may be mid-overwrite, so it is never read
+        return max(0, self.next - self.capacity + 1)
+
+    def read(self, cursor: int, limit: int = None):
+        # Returns (events, next_cursor) for events from cursor onwards. Events that
+        # were overwritten before the reader caught up are skipped.
+        start = max(cursor, self.oldest())
+        end = self.next
+        if limit is not None:
+            end = min(end, start + limit)
+
+        events = []
+        for n in range(start, end):
+            slot = n % self.capacity
+            events.append((n, self.types[slot], self.ids[slot], self.prices[slot],
+                           self.amounts[slot], self.times[slot]))
+
+        # Drop anything a concurrent writer overwrote while we were copying
+        overwritten = self.oldest() - start
+        if overwritten > 0:
+            events = events[overwritten:]
+
+        return events, max(end, start)
+
+    def tail(self, count: int):
+        return self.read(self.next - count)[0]
+
+    def format(self, event):
+        n, type, id, price, amount, timestamp = event
+        when = datetime.fromtimestamp((timestamp + self.clock_offset) / 1e9)
+        price = format_number(self.price_scale.decode(price))
+        amount = format_number(self.amount_scale.decode(amount))
+
+        if type == BID_ADDED:
+            return f"{when} bid added for {amount} token at {price} price "
+        elif type == ASK_ADDED:
+            return f"{when} ask added for {amount} token at {price} price "
+        elif type == FILLED:
+            return f"{when} order ({amount}, {price}, {id}) got filled."
+        elif type == MARKET_BUY:
+            return f"{when} Market buy executed: {amount} @ {price}"
+        elif type == MARKET_SELL:
+            return f"{when} Market sell executed: {amount} @ {price}"
+        elif type == CANCELLED:
+            return f"{when} order {id} cancelled"
+        elif type == AMENDED:
+            return f"{when} order {id} amended to {amount}"
+        return f"{when} event {type} for order {id}"
+
+    def formatted(self, events):
+        return [self.format(event) for event in events]
+
+    def __len__(self):
+        return self.next
+
+def format_number(value: float):
+    # Whole numbers print without a trailing .0, matching the JSON that came in
+    return int(value) if value.is_integer() else value
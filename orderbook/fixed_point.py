@@ -0,0 +1,36 @@
+import math
+from decimal import Decimal
+
+# Largest number of units the engine's array('q') columns can hold
+MAX_UNITS = 2**63 - 1
+
+class fixed_point:
+    # Converts between API values and whole numbers of a unit (a price tick or a
+    # quantity lot). The engine only ever sees the integers, so sums and comparisons
+    # are exact and nothing is left over after a fill.
+    def __init__(self, size: float):
+        if size <= 0:
+            raise ValueError("Tick and lot sizes must be positive")
+        self.size = float(size)
+        # Decimal places of the unit, used to print 3 * 0.1 as 0.3
+        self.decimals = max(0, -Decimal(str(self.size)).as_tuple().exponent)
+        # Units per whole number (100 for 0.01). Dividing by it gives the closest float
+        # to the exact value directly, which is much cheaper than round()
+        per_one = 1 / self.size
+        self.per_one = round(per_one) if abs(per_one - round(per_one)) < 1e-9 else None
+
+    def encode(self, value: float):
+        # Number of units in value, or None if value is not a whole number of units or
+        # is too large to store. Anything nonzero that rounds to no units at all is too
+        # small to be one; NaN and infinities are never any number of units.
+        if not math.isfinite(value):
+            return None
+        units = round(value / self.size)
+        if abs(units * self.size - value) > self.size * 1e-6 or (units == 0 and value != 0) or abs(units) > MAX_UNITS:
+            return None
+        return units
+
+    def decode(self, units: int):
+        if self.per_one is not None:
+            return units / self.per_one
+        return round(units * self.size, self.decimals)
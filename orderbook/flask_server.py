@@ -1,34 +1,184 @@
-from flask import request, jsonify, Flask
+from flask import request, jsonify, Flask, Response
+from werkzeug.serving import WSGIRequestHandler
+from orderbook.metrics import render, CONTENT_TYPE
 
-def flask_server(orderbook_instance):
+class keep_alive_request_handler(WSGIRequestHandler):
+    # HTTP/1.1 lets pooled clients reuse one connection instead of reconnecting per request
+    protocol_version = "HTTP/1.1"
+
+def flask_server(registry):
     app = Flask(__name__)
 
+    def lookup(symbol):
+        # (book, None) or (None, error response) for an unknown symbol
+        book = registry.get(symbol)
+        if book is None:
+            return None, (jsonify(f"Unknown symbol: {symbol}"), 404)
+        return book, None
+
     @app.route("/limit-order", methods=["POST"])
     def new_limit_order():
         data = request.get_json()
+        orderbook_instance, error = lookup(data.get('symbol'))
+        if error:
+            return error
         return jsonify(orderbook_instance.new_limit_order(
             data.get('amount'),
             data.get('price'),
-            data.get('type')
+            data.get('type'),
+            data.get('time_in_force', 'GTC'),
+            data.get('post_only', False),
+            data.get('account')
         ))
 
     @app.route("/order", methods=["POST"])
     def new_order():
         data = request.get_json()
+        orderbook_instance, error = lookup(data.get('symbol'))
+        if error:
+            return error
         return jsonify(orderbook_instance.new_order(
             data.get('amount'),
-            data.get('type')
+            data.get('type'),
+            data.get('price'),
+            data.get('account')
+        ))
+
+    @app.route("/cancel-order", methods=["POST"])
+    def cancel_order():
+        data = request.get_json()
+        orderbook_instance, error = lookup(data.get('symbol'))
+        if error:
+            return error
+        return jsonify(orderbook_instance.cancel_order(
+            data.get('id')
         ))
 
+    @app.route("/amend-order", methods=["POST"])
+    def amend_order():
+        data = request.get_json()
+        orderbook_instance, error = lookup(data.get('symbol'))
+        if error:
+            return error
+        return jsonify(orderbook_instance.amend_order(
+            data.get('id'),
+            data.get('amount')
+        ))
+
+    @app.route("/orders/batch", methods=["POST"])
+    def submit_batch():
+        # Each instruction may carry its own "symbol"; the default symbol is used otherwise
+        data = request.get_json()
+        orders = data.get('orders') if isinstance(data, dict) else None
+        if not isinstance(orders, list):
+            return jsonify("Body must be an object with an 'orders' list."), 400
+        return jsonify({"results": registry.submit_batch(orders)})
+
+    @app.route("/symbols")
+    def get_symbols():
+        return jsonify({"symbols": registry.symbols(), "default": registry.default_symbol})
+
     @app.route("/orderbook")
     def get_orderbook():
-        with orderbook_instance.lock:
-            bids = list(orderbook_instance.bids)
-            asks = list(orderbook_instance.asks)
-        return jsonify({"bid": bids, "ask": asks})
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        return jsonify(orderbook_instance.get_order_book())
+
+    @app.route("/bbo")
+    def get_bbo():
+        # Best bid and ask as [price, amount] and the last trade as [price, amount, time]
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        return jsonify(orderbook_instance.get_bbo()[1])
+
+    @app.route("/depth")
+    def get_depth():
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        levels = request.args.get('levels', 10, type=int)
+        if levels <= 0:
+            return jsonify("Levels must be positive."), 400
+        return jsonify(orderbook_instance.get_depth(levels))
 
     @app.route("/logs")
     def get_logs():
-        return jsonify({"logs": orderbook_instance.logs[-100:]})
+        # Without a cursor returns the latest 100 entries; pass the returned
+        # cursor back to read only what was logged since
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        logs, cursor = orderbook_instance.read_logs(request.args.get('cursor', type=int))
+        return jsonify({"logs": logs, "cursor": cursor})
+
+    @app.route("/trades")
+    def get_trades():
+        # Execution reports; works like /logs, with seq numbers instead of log lines
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        trades, cursor = orderbook_instance.read_trades(request.args.get('cursor', type=int))
+        return jsonify({"trades": trades, "cursor": cursor})
+
+    @app.route("/analytics")
+    def get_analytics():
+        # VWAP, OHLCV bars, spread and imbalance bars and cumulative depth for the
+        # last `window` seconds, computed in one request
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        window = request.args.get('window', 60.0, type=float)
+        bar = request.args.get('bar', 1.0, type=float)
+        levels = request.args.get('levels', 20, type=int)
+        # Analytics and the tape need NumPy, loaded on the first request that uses them
+        from orderbook.analytics import analytics_error
+        error = analytics_error(window, bar, levels)
+        if error:
+            return jsonify(error), 400
+        return jsonify(orderbook_instance.get_analytics(window, bar, levels))
+
+    @app.route("/account")
+    def get_account():
+        # Position and open orders of one account in one book
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        result = orderbook_instance.get_account(request.args.get('account', type=int))
+        if isinstance(result, str):
+            return jsonify(result), 400
+        return jsonify(result)
+
+    @app.route("/history")
+    def get_history():
+        # Taped events and fills from `from` up to `to`, in nanoseconds since the epoch
+        # or, with by=seq, record numbers; format=binary returns the raw records
+        if registry.tape_dir is None:
+            return jsonify("History is disabled."), 404
+        orderbook_instance, error = lookup(request.args.get('symbol'))
+        if error:
+            return error
+        start = request.args.get('from', type=int)
+        end = request.args.get('to', type=int)
+        by = request.args.get('by', 'time')
+        limit = request.args.get('limit', 10_000, type=int)
+        output = request.args.get('format', 'json')
+        from orderbook.tape import history_error, history_headers
+        error = history_error(by, limit, output)
+        if error:
+            return jsonify(error), 400
+        if output == "binary":
+            first, records = orderbook_instance.read_history(start, end, by, limit, True)
+            return Response(records.tobytes(), content_type="application/octet-stream",
+                            headers=history_headers(first, records))
+        return jsonify(orderbook_instance.read_history(start, end, by, limit))
+
+    @app.route("/metrics")
+    def get_metrics():
+        # Prometheus text format; only served when the server runs with --metrics
+        if registry.metrics is None:
+            return jsonify("Metrics are disabled."), 404
+        return Response(render(registry.collect_metrics()), content_type=CONTENT_TYPE)
 
-    return app
\ No newline at end of file
+    return app
@@ -0,0 +1,221 @@
+import os
+import struct
+import threading
+
+# Record types
+LIMIT = 1
+CANCEL = 2
+AMEND = 3
+FILL = 4
+# Account of the order named in the LIMIT record that follows; the account id is in amount
+ACCOUNT = 5
+# An order that crossed on entry or could not rest: its full amount and limit price
+# (0 for none). Its fills follow as FILL records, then a LIMIT record for what rested
+# or a CANCEL record for what didn't trade, unless it filled in full.
+TAKER = 6
+
+SIDES = ("bid", "ask")
+SIDE_CODES = {"bid": 0, "ask": 1}
+
+# type, side, order id, price, amount
+RECORD = struct.Struct("<BBqdd")
+
+# magic, format version, journal position, id counter, number of orders
+SNAPSHOT_HEADER = struct.Struct("<4sIqqq")
+SNAPSHOT_MAGIC = b"MBSS"
+SNAPSHOT_VERSION = 3
+# side, order id, price, amount, account (0 for none)
+SNAPSHOT_ORDER = struct.Struct("<Bqddq")
+# Version 1 snapshots, written before orders had accounts
+SNAPSHOT_ORDER_V1 = struct.Struct("<Bqdd")
+# From version 3, the orders are followed by a count and every account's net position
+SNAPSHOT_COUNT = struct.Struct("<q")
+SNAPSHOT_POSITION = struct.Struct("<qd")
+
+SNAPSHOT_FILE = "snapshot.bin"
+
+class journal:
+    # Append-only binary journal of accepted orders, cancels, amends and fills.
+    #
+    # Records are packed into a buffer while the engine lock is held and written
+    # by a background thread, so disk I/O never runs on the matching path.
+    #   mode "async": written and flushed to the OS, no fsync
+    #   mode "group": every batch the writer picks up is fsynced together, and
+    #                 wait() blocks the caller (not the engine) until its record is durable
+    #
+    # The journal is split into segment files named after the position (record number)
+    # of their first record, so snapshots can drop everything before their position.
+    def __init__(self, directory: str, mode: str = "group", position: int = 0):
+        if mode not in ("async", "group"):
+            raise ValueError("Journal mode must be either 'async' or 'group'")
+
+        self.directory = directory
+        self.mode = mode
+        os.makedirs(directory, exist_ok=True)
+
+        # Records appended so far, which is also the position of the next one
+        self.position = position
+        # Records written out by the writer thread, and those known to be on disk
+        self.written = position
+        self.durable = position
+
+        self.buffer = bytearray()
+        self.rotations = []
+        self.closed = False
+        self.lock = threading.Lock()
+        self.pending = threading.Condition(self.lock)
+        self.flushed = threading.Condition(self.lock)
+
+        # A crash can leave a torn record at the end of the last segment. Cut it off, or
+        # every record appended after it would be read back misaligned.
+        segments = [(start, path) for start, path in list_segments(directory) if start <= position]
+        if segments:
+            start, path = segments[-1]
+            if os.path.getsize(path) > (position - start) * RECORD.size:
+                os.truncate(path, (position - start) * RECORD.size)
+
+        self.file = open(segment_path(directory, position), "ab")
+        self.writer = threading.Thread(target=self.writer_run, daemon=True)
+        self.writer.start()
+
+    def append(self, type: int, side: int, id: int, price: float, amount: float):
+        with self.lock:
+            self.buffer += RECORD.pack(type, side, id, price, amount)
+            self.position += 1
+            self.pending.notify()
+
+    def wait(self, position: int):
+        # Blocks until every record before position is on disk (group mode only)
+        if self.mode != "group":
+            return
+        with self.lock:
+            while self.durable < position:
+                self.flushed.wait()
+
+    def rotate(self, position: int):
+        # Starts a new segment at position; call with the engine lock held so that
+        # position matches the state being snapshotted
+        with self.lock:
+            self.rotations.append(position)
+            self.pending.notify()
+
+    def prune(self, position: int):
+        # Deletes segments that only hold records before position, once the writer
+        # has rotated past it. Only call this after a snapshot at position is on disk.
+        with self.lock:
+            while self.written < position or position in self.rotations:
+                self.flushed.wait()
+
+        for start, path in list_segments(self.directory):
+            if start < position:
+                os.remove(path)
+
+    def close(self):
+        # Writes out everything appended so far and stops the writer thread
+        with self.lock:
+            self.closed = True
+            self.pending.notify()
+        self.writer.join()
+        self.file.close()
+
+    def writer_run(self):
+        while True:
+            with self.lock:
+                while not self.buffer and not self.rotations:
+                    if self.closed:
+                        return
+                    self.pending.wait()
+                data = self.buffer
+                self.buffer = bytearray()
+                rotations = sorted(self.rotations)
+                first = self.written
+                last = self.position
+
+            view = memoryview(data)
+            offset = 0
+            for rotation in rotations:
+                cut = (rotation - first) * RECORD.size
+                self.file.write(view[offset:cut])
+                offset = cut
+                self.sync()
+                self.file.close()
+                self.file = open(segment_path(self.directory, rotation), "ab")
+            self.file.write(view[offset:])
+            self.sync()
+
+            with self.lock:
+                for rotation in rotations:
+                    self.rotations.remove(rotation)
+                self.written = last
+                self.durable = last
+                self.flushed.notify_all()
+
+    def sync(self):
+        self.file.flush()
+        if self.mode == "group":
+            os.fsync(self.file.fileno())
+
+def segment_path(directory: str, start: int):
+    return os.path.join(directory, f"journal-{start:016d}.bin")
+
+def list_segments(directory: str):
+    # (start position, path) for every journal segment, oldest first
+    segments = []
+    for name in os.listdir(directory):
+        if name.startswith("journal-") and name.endswith(".bin"):
+            segments.append((int(name[len("journal-"):-len(".bin")]), os.path.join(directory, name)))
+    return sorted(segments)
+
+def read_records(directory: str, position: int = 0):
+    # Yields (position, type, side, id, price, amount) for every complete record at or
+    # after position. A torn record at the end of the last segment is ignored.
+    for start, path in list_segments(directory):
+        with open(path, "rb") as file:
+            data = file.read()
+        count = len(data) // RECORD.size
+        if start + count <= position:
+            continue
+        for index, record in enumerate(RECORD.iter_unpack(data[:count * RECORD.size])):
+            if start + index >= position:
+                yield (start + index,) + record
+
+def write_snapshot(directory: str, position: int, last_id: int, orders: list, positions: list = ()):
+    # orders: (side code, id, price, amount, account) in priority order; positions:
+    # (account, net position). Written to a temporary file and renamed into place, so
+    # a crash never leaves a half-written snapshot.
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, position, last_id, len(orders)))
+        file.write(b"".join(SNAPSHOT_ORDER.pack(*resting) for resting in orders))
+        file.write(SNAPSHOT_COUNT.pack(len(positions)))
+        file.write(b"".join(SNAPSHOT_POSITION.pack(*position) for position in positions))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def read_snapshot(directory: str):
+    # Returns (position, last_id, orders, positions) or None when there is no snapshot
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, position, last_id, count = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version not in (1, 2, SNAPSHOT_VERSION):
+        raise ValueError(f"{path} is not a MicroBook snapshot")
+
+    layout = SNAPSHOT_ORDER_V1 if version == 1 else SNAPSHOT_ORDER
+    end = SNAPSHOT_HEADER.size + count * layout.size
+    orders = list(layout.iter_unpack(data[SNAPSHOT_HEADER.size:end]))
+    if version == 1:
+        orders = [resting + (0,) for resting in orders]
+
+    # Positions were not kept before version 3
+    positions = []
+    if version >= 3:
+        count, = SNAPSHOT_COUNT.unpack_from(data, end)
+        start = end + SNAPSHOT_COUNT.size
+        positions = list(SNAPSHOT_POSITION.iter_unpack(data[start:start + count * SNAPSHOT_POSITION.size]))
+    return position, last_id, orders, positions
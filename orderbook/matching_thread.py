@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+
+# Order entry calls are applied under the book's lock without waiting for the journal;
+# apply_calls waits once per batch for every book it touched
+LOCKED_METHODS = {
+    "new_limit_order": "limit_order_locked",
+    "new_order": "market_order_locked",
+    "cancel_order": "cancel_order_locked",
+    "amend_order": "amend_order_locked",
+}
+BOOK_METHODS = {"submit_batch", "get_order_book", "get_bbo", "get_depth", "depth_snapshot",
+                "collect_depth_changes", "read_logs", "read_trades", "get_analytics", "read_history", "get_account",
+                "order_count"}
+REGISTRY_METHODS = {"add", "open_journals", "start_snapshots", "start_analytics", "open_tapes", "start_engines"}
+# Registry methods whose result is sent back
+REGISTRY_QUERIES = {"collect_metrics"}
+
+# Upper bound on calls applied between two durability waits
+MAX_CALLS_PER_BATCH = 256
+
+def apply_calls(registry, calls: list):
+    # Applies (call id, symbol, method, args) calls in order and returns one
+    # (call id, result, error) per call. A symbol of None calls the registry itself.
+    replies = []
+    positions = {}
+    for call_id, symbol, method, args in calls:
+        try:
+            if symbol is None:
+                if method in REGISTRY_QUERIES:
+                    result = getattr(registry, method)(*args)
+                elif method in REGISTRY_METHODS:
+                    getattr(registry, method)(*args)
+                    result = None
+                else:
+                    raise ValueError(f"Unknown registry method: {method}")
+            else:
+                book = registry.books.get(symbol)
+                if book is None:
+                    raise ValueError(f"Unknown symbol: {symbol}")
+                if method in LOCKED_METHODS:
+                    with book.lock:
+                        result = getattr(book, LOCKED_METHODS[method])(*args)
+                        positions[book] = book.journal_position()
+                    result = book.order_result(result)
+                elif method in BOOK_METHODS:
+                    result = getattr(book, method)(*args)
+                else:
+                    raise ValueError(f"Unknown book method: {method}")
+            replies.append((call_id, result, None))
+        except Exception as e:
+            replies.append((call_id, None, str(e)))
+
+    # One durability wait per book covers every order in the batch
+    for book, position in positions.items():
+        book.wait_durable(position)
+
+    return replies
+
+class matching_thread:
+    # Runs every engine call for a book_registry on one thread. Callers on any thread
+    # (or event loop) queue a call and get a Future, so they never wait on a book lock;
+    # calls that queue up while a batch runs are applied together as the next batch.
+    def __init__(self, registry):
+        self.registry = registry
+        self.calls = queue.SimpleQueue()
+        if registry.metrics is not None:
+            registry.metrics.gauge("matching_queue_depth", "Engine calls waiting for the matching thread",
+                                   self.calls.qsize)
+            self.batch_time = registry.metrics.histogram("matching_batch_seconds",
+                                                         "Time to apply one batch of queued engine calls")
+        else:
+            self.batch_time = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, symbol: str, method: str, args: tuple = ()):
+        future = Future()
+        self.calls.put((future, symbol, method, args))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.calls.get()]
+            while len(batch) < MAX_CALLS_PER_BATCH:
+                try:
+                    batch.append(self.calls.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self.batch_time is not None:
+                start = time.perf_counter_ns()
+            try:
+                replies = apply_calls(self.registry, [(index, symbol, method, args)
+                                                      for index, (future, symbol, method, args) in enumerate(batch)])
+            except Exception as e:
+                print(f"Error in matching thread: {e}")
+                traceback.print_exc()
+                replies = [(index, None, str(e)) for index in range(len(batch))]
+            if self.batch_time is not None:
+                self.batch_time.observe(time.perf_counter_ns() - start)
+
+            for index, result, error in replies:
+                future = batch[index][0]
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(error))
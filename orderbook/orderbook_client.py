@@ -1,30 +1,103 @@
 import requests
+from requests.adapters import HTTPAdapter
 
 class orderbook_client:
-    def __init__(self, ip:str, port:int):
+    def __init__(self, ip:str, port:int, pooled: bool = True, timeout: float = 10.0, pool_size: int = 10,
+                 symbol: str = None):
         self.ip = ip
         self.port = port
+        # Symbol used when a call does not name one; None means the server's default
+        self.symbol = symbol
+        # Seconds to wait for connect and for each read; None waits forever
+        self.timeout = timeout
 
-    def new_limit_order(self, amount: float, price: float, type: str):
-        response = requests.post(f"http://{self.ip}:{self.port}/limit-order", json={
+        if pooled:
+            # One keep-alive connection pool reused by every call
+            self.http = requests.Session()
+            self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        else:
+            # A fresh connection per call
+            self.http = requests
+
+    def close(self):
+        if self.http is not requests:
+            self.http.close()
+
+    def symbol_fields(self, symbol: str = None):
+        symbol = symbol if symbol is not None else self.symbol
+        return {"symbol": symbol} if symbol is not None else {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def new_limit_order(self, amount: float, price: float, type: str,
+                        time_in_force: str = "GTC", post_only: bool = False, symbol: str = None,
+                        account: int = None):
+        response = self.http.post(f"http://{self.ip}:{self.port}/limit-order", json={
             "amount": amount,
             "price": price,
-            "type": type
-        })
+            "type": type,
+            "time_in_force": time_in_force,
+            "post_only": post_only,
+            "account": account,
+            **self.symbol_fields(symbol)
+        }, timeout=self.timeout)
+
+        return response.json()
+
+    def new_order(self, amount: float, type: str, price: float = None, symbol: str = None,
+                  account: int = None):
+        # With a price the order only trades at that price or better; the rest is cancelled
+        response = self.http.post(f"http://{self.ip}:{self.port}/order", json={
+            "amount": amount,
+            "type": type,
+            "price": price,
+            "account": account,
+            **self.symbol_fields(symbol)
+        }, timeout=self.timeout)
+
+        return response.json()
+
+    def cancel_order(self, id: int, symbol: str = None):
+        response = self.http.post(f"http://{self.ip}:{self.port}/cancel-order", json={
+            "id": id,
+            **self.symbol_fields(symbol)
+        }, timeout=self.timeout)
 
         return response.json()
 
-    def new_order(self, amount: float, type: str):
-        response = requests.post(f"http://{self.ip}:{self.port}/order", json={
+    def amend_order(self, id: int, amount: float, symbol: str = None):
+        response = self.http.post(f"http://{self.ip}:{self.port}/amend-order", json={
+            "id": id,
             "amount": amount,
-            "type": type
-        })
+            **self.symbol_fields(symbol)
+        }, timeout=self.timeout)
 
         return response.json()
 
-    def get_order_book(self):
+    def submit_batch(self, orders: list):
+        # orders: dicts with "op" set to "limit", "market", "cancel" or "amend" plus
+        # that operation's fields, e.g. {"op": "limit", "amount": 5, "price": 10.0, "type": "bid"}.
+        # Instructions without a "symbol" go to the client's symbol.
+        orders = [{**self.symbol_fields(), **order} if isinstance(order, dict) else order for order in orders]
+        response = self.http.post(f"http://{self.ip}:{self.port}/orders/batch", json={
+            "orders": orders
+        }, timeout=self.timeout)
+
+        return response.json()["results"]
+
+    def get_symbols(self):
+        response = self.http.get(f"http://{self.ip}:{self.port}/symbols", timeout=self.timeout)
+
+        return response.json()
+
+    def get_order_book(self, symbol: str = None):
         try:
-            response = requests.get(f"http://{self.ip}:{self.port}/orderbook")
+            response = self.http.get(f"http://{self.ip}:{self.port}/orderbook",
+                                     params=self.symbol_fields(symbol), timeout=self.timeout)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -34,7 +107,67 @@ class orderbook_client:
             print(f"Error connecting to server: {e}")
             return {"ask": [], "bid": []}
 
-    def get_logs(self):
-        response = requests.get(f"http://{self.ip}:{self.port}/logs")
+    def get_bbo(self, symbol: str = None):
+        # {"bid": [price, amount], "ask": [price, amount], "last": [price, amount, time]}
+        response = self.http.get(f"http://{self.ip}:{self.port}/bbo", params=self.symbol_fields(symbol),
+                                 timeout=self.timeout)
+
+        return response.json()
 
-        return response.json()
\ No newline at end of file
+    def get_depth(self, levels: int = 10, symbol: str = None):
+        try:
+            response = self.http.get(f"http://{self.ip}:{self.port}/depth",
+                                     params={"levels": levels, **self.symbol_fields(symbol)}, timeout=self.timeout)
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"Error getting depth: {response.status_code}")
+                return {"ask": [], "bid": []}
+        except Exception as e:
+            print(f"Error connecting to server: {e}")
+            return {"ask": [], "bid": []}
+
+    def get_logs(self, cursor: int = None, symbol: str = None):
+        params = self.symbol_fields(symbol)
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = self.http.get(f"http://{self.ip}:{self.port}/logs", params=params, timeout=self.timeout)
+
+        return response.json()
+
+    def get_trades(self, cursor: int = None, symbol: str = None):
+        # Execution reports since cursor (the latest 100 without one) and the next cursor
+        params = self.symbol_fields(symbol)
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = self.http.get(f"http://{self.ip}:{self.port}/trades", params=params, timeout=self.timeout)
+
+        return response.json()
+
+    def get_analytics(self, window: float = 60.0, bar: float = 1.0, levels: int = 20, symbol: str = None):
+        # VWAP, OHLCV bars, spread/imbalance bars and cumulative depth for the last `window` seconds
+        response = self.http.get(f"http://{self.ip}:{self.port}/analytics",
+                                 params={"window": window, "bar": bar, "levels": levels, **self.symbol_fields(symbol)},
+                                 timeout=self.timeout)
+
+        return response.json()
+
+    def get_history(self, start: int = None, end: int = None, by: str = "time", limit: int = 10_000,
+                    symbol: str = None):
+        # Taped events and fills in [start, end): times in ns since the epoch, or record
+        # numbers with by="seq". Pass the returned "next" as start (with by="seq") for more.
+        params = {"by": by, "limit": limit, **self.symbol_fields(symbol)}
+        if start is not None:
+            params["from"] = start
+        if end is not None:
+            params["to"] = end
+        response = self.http.get(f"http://{self.ip}:{self.port}/history", params=params, timeout=self.timeout)
+
+        return response.json()
+
+    def get_account(self, account: int, symbol: str = None):
+        # Position and open orders of an account
+        response = self.http.get(f"http://{self.ip}:{self.port}/account",
+                                 params={"account": account, **self.symbol_fields(symbol)}, timeout=self.timeout)
+
+        return response.json()
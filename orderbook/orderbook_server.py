@@ -1,154 +1,925 @@
-from datetime import datetime
-from sortedcontainers import SortedList
+import os
 import threading
 import time
 import traceback
+from orderbook.price_levels import order, book_side
+from orderbook.fixed_point import fixed_point, MAX_UNITS
+from orderbook.event_log import (event_log, BID_ADDED, ASK_ADDED, FILLED, MARKET_BUY,
+                                 MARKET_SELL, CANCELLED, AMENDED)
+from orderbook.trade_log import trade_log
+from orderbook.book_view import book_view
+from orderbook.accounts import account_book, account_error, NO_ACCOUNT, SELF_TRADE_PREVENTION
+from orderbook.metrics import metrics, timed_lock, counted_entry
+from orderbook.journal import (journal, read_records, read_snapshot, write_snapshot,
+                               LIMIT, CANCEL, AMEND, FILL, ACCOUNT, TAKER, SIDES, SIDE_CODES)
+
+# Good-till-cancelled rests whatever does not trade on entry, immediate-or-cancel
+# drops it, fill-or-kill only trades if the whole amount can trade at once
+TIME_IN_FORCE = ("GTC", "IOC", "FOK")
+
+# What became of an order on entry. limit_order_locked and market_order_locked return
+# (status, id, type, price, amount, filled, leaves, prevented, first trade, trade count)
+# in ticks and lots, so nothing is decoded or formatted while the book is locked;
+# order_result() builds the API result from it once the lock is released.
+ORDER_RESTING = 0  # on the book, possibly after some fills
+ORDER_FILLED = 1   # filled in full on entry
+ORDER_DONE = 2     # traded what it could, the rest was cancelled
 
 class orderbook_server:
-    def __init__(self):
+    def __init__(self, inline_matching: bool = True, log_capacity: int = 100_000,
+                 tick_size: float = 0.01, lot_size: float = 0.001, self_trade_prevention: str = "cancel-newest",
+                 max_order_size: float = None, max_open_orders: int = None, max_position: float = None):
+        # Prices are held as whole ticks and amounts as whole lots; values are
+        # converted only where they enter and leave the engine
+        self.prices = fixed_point(tick_size)
+        self.amounts = fixed_point(lot_size)
+
+        if self_trade_prevention not in SELF_TRADE_PREVENTION:
+            raise ValueError(f"Self-trade prevention must be one of {', '.join(SELF_TRADE_PREVENTION)}")
+        # Applied when an order with an account would trade with one of the same account's
+        self.self_trade_prevention = self_trade_prevention
+        self.self_trades_prevented = 0
+        # Position, open orders and risk limits per account; orders without one skip both
+        self.accounts = account_book(self.limit_units(max_order_size), max_open_orders,
+                                     self.limit_units(max_position))
+
+        # Every resting order by id, so cancels and amends never scan the book
+        self.orders = {}
         # Bids sorted by price descending (highest price first)
-        self.bids = SortedList(key=lambda x: -x[1])
-        # Asks sorted by price ascending (lowest price first)  
-        self.asks = SortedList(key=lambda x: x[1])
+        self.bids = book_side(descending=True, index=self.orders, accounts=self.accounts)
+        # Asks sorted by price ascending (lowest price first)
+        self.asks = book_side(descending=False, index=self.orders, accounts=self.accounts)
         
-        self.logs = []
+        # Fixed-capacity structured event log, formatted only when read
+        self.logs = event_log(log_capacity, self.prices, self.amounts)
+        # Every fill as a structured execution report, read by /trades and the trades channel
+        self.trades = trade_log(log_capacity, self.prices, self.amounts)
         self.id = 0
         self.lock = threading.Lock()
 
+        # Inline mode matches crossing limit orders inside new_limit_order,
+        # otherwise the engine thread is woken through order_added
+        self.inline_matching = inline_matching
+        self.order_added = threading.Condition(self.lock)
+        self.pending_match = False
+
+        # Sequence number of the last batch of depth changes handed out
+        self.depth_seq = 0
+
+        # Write-ahead journal, attached by open_journal(); None keeps everything in memory
+        self.journal = None
+        # Memory-mapped history of every event and fill, attached by open_tape()
+        self.tape = None
+
+        # Latest immutable view of the book for readers. When a reader finds it out of
+        # date, the publisher thread rebuilds it once for every reader waiting, so the
+        # lock is taken once per change however many readers there are.
+        self.view = book_view(0, 0, (0, 0), {}, {})
+        self.publishing = threading.Condition()
+        # Number of views asked for, and how many of those requests the current view serves
+        self.publish_requests = 0
+        self.published_requests = 0
+        self.publisher = None
+
+        # VWAP, bars and depth curves over the trade log and sampled book history,
+        # created by open_analytics() on first use so the engine never loads NumPy
+        # unless asked to. The book is only sampled once start_analytics() is called.
+        self.analytics = None
+
+    def limit_units(self, limit: float):
+        # An account limit in lots, or None for no limit
+        if limit is None:
+            return None
+        units = self.amounts.encode(limit)
+        if units is None:
+            raise ValueError(f"Account limits must be multiples of the lot size {self.amounts.size}")
+        return units
+
     def connection_handler(self, websocket):
         for messages in websocket:
             print(messages)
 
-    def orderbook_engine_run(self):
+    def match_best(self):
+        # Matches the best bid against the best ask once; caller must hold self.lock
+        bid_level = self.bids.best  # Highest price bid level
+        ask_level = self.asks.best  # Lowest price ask level
+
+        if bid_level is None or ask_level is None or bid_level.price < ask_level.price:
+            return False
+
+        best_bid = bid_level.orders[0]
+        best_ask = ask_level.orders[0]
+        if best_bid.account is not None and best_bid.account == best_ask.account:
+            self.prevent_resting_self_trade_locked(best_bid, best_ask)
+            return True
+
+        filled = min(best_bid.amount, best_ask.amount)
+
+        # The order that arrived later is the one that took liquidity, at the price of
+        # the one that was resting
+        if best_bid.id > best_ask.id:
+            trade_price = best_ask.price
+            self.trades.append(0, trade_price, filled, best_bid.id, best_bid.amount - filled,
+                               best_ask.id, best_ask.amount - filled)
+        else:
+            trade_price = best_bid.price
+            self.trades.append(1, trade_price, filled, best_ask.id, best_ask.amount - filled,
+                               best_bid.id, best_bid.amount - filled)
+
+        if best_bid.amount <= best_ask.amount:
+            self.logs.append(FILLED, best_bid.id, trade_price, filled)
+        if best_ask.amount <= best_bid.amount:
+            self.logs.append(FILLED, best_ask.id, trade_price, filled)
+
+        if self.journal is not None:
+            self.journal_append(FILL, 0, best_bid.id, best_bid.price, filled)
+            self.journal_append(FILL, 1, best_ask.id, best_ask.price, filled)
+
+        # Partial fills update the resting order in place, so it keeps its queue position
+        self.bids.fill(bid_level, filled)
+        self.asks.fill(ask_level, filled)
+
+        return True
+
+    def prevent_resting_self_trade_locked(self, best_bid: order, best_ask: order):
+        # Deferred mode rests orders before matching them, so both sides of a self-trade
+        # are on the book; the one that arrived later counts as the incoming order
+        newest, oldest = (best_bid, best_ask) if best_bid.id > best_ask.id else (best_ask, best_bid)
+        self.self_trades_prevented += 1
+        if self.self_trade_prevention == "cancel-newest":
+            self.cancel_resting_locked(newest)
+        elif self.self_trade_prevention == "cancel-oldest":
+            self.cancel_resting_locked(oldest)
+        else:
+            taken = min(newest.amount, oldest.amount)
+            for resting in (newest, oldest):
+                if resting.amount <= taken:
+                    self.cancel_resting_locked(resting)
+                else:
+                    self.reduce_resting_locked(resting, resting.amount - taken)
+
+    def match_crosses(self):
+        # Drains every crossing bid/ask pair in one pass; caller must hold self.lock
+        while self.match_best():
+            pass
+
+    def depth_snapshot(self):
+        # Aggregated levels as of depth_seq. Changes not yet collected may already be
+        # included; deltas carry absolute level amounts so reapplying them is harmless.
+        # Results are decoded once per view and shared, so callers must not modify them
+        view = self.published()
+        return view.cached("depth", lambda: (view.depth_seq, self.decode_levels(view.depth(view.bid_levels)),
+                                             self.decode_levels(view.depth(view.ask_levels))))
+
+    def get_depth(self, levels: int = 10):
+        view = self.published()
+        return view.cached(("top", levels), lambda: {"bid": self.decode_levels(view.top(view.bid_levels, levels)),
+                                                     "ask": self.decode_levels(view.top(view.ask_levels, levels))})
+
+    def get_bbo(self, since: tuple = None):
+        # (version, {"bid": [price, amount], "ask": [price, amount], "last": [price,
+        # amount, time]}) for the top of the book and the last trade, with None for an
+        # empty side or no trades yet. Returns None without taking the lock when
+        # nothing changed since version `since`.
+        bids, asks, trades = self.bids, self.asks, self.trades
+        if since == (bids.top_version, asks.top_version, trades.next):
+            return None
+        with self.lock:
+            version = (bids.top_version, asks.top_version, trades.next)
+            bid, ask, last = bids.best, asks.best, trades.last()
+            bid = None if bid is None else (bid.price, bid.total)
+            ask = None if ask is None else (ask.price, ask.total)
+        price, amount = self.prices.decode, self.amounts.decode
+        return version, {
+            "bid": None if bid is None else [price(bid[0]), amount(bid[1])],
+            "ask": None if ask is None else [price(ask[0]), amount(ask[1])],
+            "last": None if last is None else [price(last[0]), amount(last[1]), last[2]],
+        }
+
+    def get_order_book(self):
+        # Every resting order per side, in priority order
+        view = self.published()
+        return view.cached("orders", lambda: {"bid": self.decode_orders(view.orders(view.bid_levels)),
+                                              "ask": self.decode_orders(view.orders(view.ask_levels))})
+
+    def published(self):
+        # The current book_view, without taking self.lock. A view records the side
+        # versions it was built at; if the book changed since, waits for the publisher
+        # to build a new one, so a reader always sees every change made before it asked.
+        view = self.view
+        if view.depth_seq == self.depth_seq and view.side_versions == (self.bids.version, self.asks.version):
+            return view
+
+        with self.publishing:
+            if self.publisher is None:
+                self.publisher = threading.Thread(target=self.publisher_run, daemon=True)
+                self.publisher.start()
+            self.publish_requests += 1
+            request = self.publish_requests
+            self.publishing.notify_all()
+            while self.published_requests < request:
+                self.publishing.wait()
+            return self.view
+
+    def publisher_run(self):
+        # Builds a new view whenever readers ask for one. A build serves every request
+        # made before it started; readers that ask during a build wait for the next.
         while True:
+            with self.publishing:
+                while self.published_requests == self.publish_requests:
+                    self.publishing.wait()
+                serving = self.publish_requests
+
             try:
                 with self.lock:
-                    if not self.bids or not self.asks:
-                        pass 
-                    else:
-                        best_bid = self.bids[0]  # Highest price bid
-                        best_ask = self.asks[0]  # Lowest price ask
-                        
-                        if best_bid[1] >= best_ask[1]:
-                            bid_amount, bid_price, bid_id = best_bid
-                            ask_amount, ask_price, ask_id = best_ask
-                            
-                            if bid_amount > ask_amount:
-                                remaining_bid = (bid_amount - ask_amount, bid_price, bid_id)
-                                
-                                self.asks.pop(0)
-                                self.bids.pop(0)
-                                self.bids.add(remaining_bid)
-                                
-                                self.logs.append(f"{datetime.now()} order {best_ask} got filled.")
-                                
-                            elif ask_amount > bid_amount:
-                                remaining_ask = (ask_amount - bid_amount, ask_price, ask_id)
-                                self.bids.pop(0)
-                                self.asks.pop(0)
-                                self.asks.add(remaining_ask)
-                                
-                                self.logs.append(f"{datetime.now()} order {best_bid} got filled.")
-                                
-                            else:
-                                self.bids.pop(0)
-                                self.asks.pop(0)
-                                
-                                self.logs.append(f"{datetime.now()} order {best_bid} got filled.")
-                                self.logs.append(f"{datetime.now()} order {best_ask} got filled.")
-                        
-                # Small delay to prevent excessive CPU usage
-                time.sleep(0.001)  # 1ms delay
-                
+                    previous = self.view
+                    view = book_view(previous.version + 1, self.depth_seq, (self.bids.version, self.asks.version),
+                                     self.bids.publish(previous.bid_levels), self.asks.publish(previous.ask_levels))
+                    self.view = view
+            except Exception as e:
+                print(f"Error in book publisher: {e}")
+                traceback.print_exc()
+                view = book_view(previous.version + 1, previous.depth_seq, previous.side_versions,
+                                 previous.bid_levels, previous.ask_levels)
+
+            with self.publishing:
+                self.view = view
+                self.published_requests = serving
+                self.publishing.notify_all()
+
+    def decode_levels(self, levels: list):
+        # [price, amount, ...] rows from ticks and lots back to API values
+        price, amount = self.prices.decode, self.amounts.decode
+        return [[price(row[0]), amount(row[1]), *row[2:]] for row in levels]
+
+    def decode_orders(self, orders: list):
+        price, amount = self.prices.decode, self.amounts.decode
+        return [(amount(units), price(ticks), id) for units, ticks, id in orders]
+
+    def read_logs(self, cursor: int = None, limit: int = 1000, recent: int = 100):
+        # Formatted log entries from cursor on, or the latest `recent` entries when
+        # cursor is None, and the cursor to pass back for the next read
+        if cursor is None:
+            events, cursor = self.logs.read(self.logs.next - recent)
+        else:
+            events, cursor = self.logs.read(cursor, limit=limit)
+        return self.logs.formatted(events), cursor
+
+    def read_trades(self, cursor: int = None, limit: int = 1000, recent: int = 100):
+        # Execution reports from cursor on, or the latest `recent` ones when cursor is
+        # None, and the cursor to pass back for the next read
+        if cursor is None:
+            return self.trades.read(self.trades.next - recent)
+        return self.trades.read(cursor, limit=limit)
+
+    def get_analytics(self, window: float = 60.0, bar: float = 1.0, levels: int = 20):
+        return self.open_analytics().summary(window, bar, levels)
+
+    def read_history(self, start: int = None, end: int = None, by: str = "time", limit: int = 10_000,
+                     raw: bool = False):
+        # Taped events and fills in [start, end), as columns for /history or, when raw,
+        # as the records themselves (a slice of the mapped tape)
+        first, records = self.tape.read(start, end, by, limit)
+        if raw:
+            return first, records
+        return self.tape.formatted(first, records)
+
+    def get_account(self, account: int):
+        # Position and open orders of an account, in API units
+        error = account_error(account)
+        if account is None or error is not None:
+            return error or "Missing required parameter: account"
+        with self.lock:
+            state = self.accounts.accounts.get(account, NO_ACCOUNT).as_dict()
+        amount = self.amounts.decode
+        return {"account": account, "position": amount(state["position"]), "open_orders": state["open_orders"],
+                "open_bids": amount(state["open_bids"]), "open_asks": amount(state["open_asks"])}
+
+    def order_count(self):
+        return len(self.orders)
+
+    def collect_depth_changes(self):
+        # Returns (seq, bid_changes, ask_changes) for levels changed since the last
+        # call, or None when nothing changed
+        with self.lock:
+            if not self.bids.changed and not self.asks.changed:
+                return None
+            self.depth_seq += 1
+            seq, bids, asks = self.depth_seq, self.bids.take_changes(), self.asks.take_changes()
+        return seq, self.decode_levels(bids), self.decode_levels(asks)
+
+    def orderbook_engine_run(self):
+        # Sleeps on the condition until a limit order is queued for matching,
+        # so an idle book costs no CPU. With inline matching nothing is ever queued.
+        while True:
+            try:
+                with self.order_added:
+                    while not self.pending_match:
+                        self.order_added.wait()
+                    self.pending_match = False
+                    self.match_crosses()
+
             except Exception as e:
                 print(f"Error in orderbook engine: {e}")
                 traceback.print_exc()
                 time.sleep(0.1)
 
-    def new_limit_order(self, amount: float, price: float, type: str):
+    def new_limit_order(self, amount: float, price: float, type: str,
+                        time_in_force: str = "GTC", post_only: bool = False, account: int = None):
         try:
-            if amount is None or price is None or type is None:
-                return "Missing required parameters: amount, price, type"
-                
-            if amount <= 0:
-                return "Amount must be positive."
-            
-            if price <= 0:
-                return "Price must be positive."
-            
             with self.lock:
-                self.id += 1
-                order = (amount, price, self.id)
-                
-                if type == "bid":
-                    self.bids.add(order)
-                    self.logs.append(f"{datetime.now()} bid added for {amount} token at {price} price ")
-                    return "Order added."
-                elif type == "ask":
-                    self.asks.add(order)
-                    self.logs.append(f"{datetime.now()} ask added for {amount} token at {price} price ")
-                    return "Order added."
-                else:
-                    return "Type must be either 'bid' or 'ask'"
+                result = self.limit_order_locked(amount, price, type, time_in_force, post_only, account)
+                position = self.journal_position()
+            self.wait_durable(position)
+            return self.order_result(result)
         except Exception as e:
             print(f"Error in new_limit_order: {e}")
             return f"Error processing order: {str(e)}"
 
-    def new_order(self, amount: float, type: str):
-        if amount < 0:
+    def new_order(self, amount: float, type: str, price: float = None, account: int = None):
+        with self.lock:
+            result = self.market_order_locked(amount, type, price, account)
+            position = self.journal_position()
+        self.wait_durable(position)
+        return self.order_result(result)
+
+    def cancel_order(self, id: int):
+        with self.lock:
+            result = self.cancel_order_locked(id)
+            position = self.journal_position()
+        self.wait_durable(position)
+        return result
+
+    def amend_order(self, id: int, new_amount: float):
+        with self.lock:
+            result = self.amend_order_locked(id, new_amount)
+            position = self.journal_position()
+        self.wait_durable(position)
+        return result
+
+    def submit_batch(self, instructions: list):
+        # Applies every instruction under a single lock acquisition and returns one
+        # result per instruction, in order. A failed instruction does not stop the rest.
+        results = []
+        with self.lock:
+            for instruction in instructions:
+                try:
+                    results.append(self.apply_instruction_locked(instruction))
+                except Exception as e:
+                    print(f"Error in submit_batch: {e}")
+                    results.append(f"Error processing order: {str(e)}")
+            position = self.journal_position()
+        self.wait_durable(position)
+        return [result if isinstance(instruction, dict) and instruction.get("units") else self.order_result(result)
+                for instruction, result in zip(instructions, results)]
+
+    def order_result(self, result):
+        # The API result for what an order entry method returned. Errors and cancel and
+        # amend results pass through; order entries become a result dict with an
+        # execution report per fill. Called once self.lock is released.
+        if not isinstance(result, tuple):
+            return result
+
+        status, order_id, type, price, amount, filled, leaves, prevented, first_trade, trade_count = result
+        reports = self.trades.read(first_trade, limit=trade_count)[0] if trade_count else []
+        if reports and reports[0]["seq"] != first_trade:
+            # Some were overwritten before this read, which then ran on into later trades
+            reports = [report for report in reports if report["seq"] < first_trade + trade_count]
+
+        decode = self.amounts.decode
+        if type == "bid" or type == "ask":
+            if status == ORDER_RESTING:
+                message = "Order added."
+            elif status == ORDER_FILLED:
+                message = "Order filled."
+            elif prevented:
+                message = ("Order partially filled, self-trade prevented." if filled > 0
+                           else "Order cancelled to prevent a self-trade.")
+            else:
+                message = ("Order partially filled, remainder cancelled." if filled > 0
+                           else "Order cancelled, nothing to match.")
+            result = {"message": message, "id": order_id, "filled": decode(filled),
+                      "resting": decode(leaves) if status == ORDER_RESTING else 0, "fills": reports}
+        else:
+            executed, remaining = decode(filled), decode(leaves)
+            if prevented:
+                message = f"Self-trade prevented. {executed} executed, {decode(prevented)} cancelled."
+            elif leaves > 0:
+                name, bound = ("asks", "at or below") if type == "buy" else ("bids", "at or above")
+                limit = "" if price is None else f" {bound} {self.prices.decode(price)}"
+                message = f"Partially filled. {executed} executed, {remaining} remaining (no more {name} available{limit})"
+            else:
+                message = f"Market {type} order fully executed."
+            result = {"message": message, "id": order_id, "filled": executed, "remaining": remaining,
+                      "fills": reports}
+
+        if prevented:
+            result["prevented"] = decode(prevented)
+        return result
+
+    def apply_instruction_locked(self, instruction: dict):
+        if not isinstance(instruction, dict):
+            return "Each instruction must be an object."
+
+        # "units" instructions carry prices in ticks and amounts in lots, as the binary
+        # gateway sends them, and get their results back the same way
+        op = instruction.get("op")
+        units = instruction.get("units", False)
+        if op == "limit":
+            return self.limit_order_locked(instruction.get("amount"), instruction.get("price"), instruction.get("type"),
+                                           instruction.get("time_in_force", "GTC"), instruction.get("post_only", False),
+                                           instruction.get("account"), units)
+        elif op == "market":
+            return self.market_order_locked(instruction.get("amount"), instruction.get("type"), instruction.get("price"),
+                                            instruction.get("account"), units)
+        elif op == "cancel":
+            return self.cancel_order_locked(instruction.get("id"))
+        elif op == "amend":
+            return self.amend_order_locked(instruction.get("id"), instruction.get("amount"), units)
+        else:
+            return "Op must be one of 'limit', 'market', 'cancel' or 'amend'"
+
+    def ticks(self, price: float, units: bool = False):
+        # price as whole ticks, or None if it isn't any. With units it already is ticks
+        # and only has to fit the engine's columns.
+        if units:
+            return price if type(price) is int and price <= MAX_UNITS else None
+        return self.prices.encode(price)
+
+    def lots(self, amount: float, units: bool = False):
+        if units:
+            return amount if type(amount) is int and amount <= MAX_UNITS else None
+        return self.amounts.encode(amount)
+
+    # The *_locked methods below do the work of the public methods above and
+    # expect the caller to hold self.lock
+
+    def limit_order_locked(self, amount: float, price: float, type: str,
+                           time_in_force: str = "GTC", post_only: bool = False, account: int = None,
+                           units: bool = False):
+        if amount is None or price is None or type is None:
+            return "Missing required parameters: amount, price, type"
+
+        if account is not None and account_error(account) is not None:
+            return account_error(account)
+            
+        if amount <= 0:
+            return "Amount must be positive."
+        
+        if price <= 0:
+            return "Price must be positive."
+
+        if type != "bid" and type != "ask":
+            return "Type must be either 'bid' or 'ask'"
+
+        price = self.ticks(price, units)
+        if price is None:
+            return f"Price must be a multiple of the tick size {self.prices.size}."
+
+        amount = self.lots(amount, units)
+        if amount is None:
+            return f"Amount must be a multiple of the lot size {self.amounts.size}."
+
+        if time_in_force not in TIME_IN_FORCE:
+            return "Time in force must be one of 'GTC', 'IOC' or 'FOK'"
+
+        if post_only and time_in_force != "GTC":
+            return "Post-only orders must be GTC."
+
+        # Rejections are decided against the book before the order gets an id
+        opposite = self.asks if type == "bid" else self.bids
+        if post_only and opposite.crosses(price):
+            return "Post-only order would cross the book."
+
+        if time_in_force == "FOK":
+            # Self-trade prevention never fills an order from its own account's resting
+            # orders: cancel-oldest skips past them, the other modes stop at the first
+            own = None
+            if account is not None:
+                state = self.accounts.accounts.get(account, NO_ACCOUNT)
+                if (state.open_asks if type == "bid" else state.open_bids) > 0:
+                    own = account
+            if not opposite.available(price, amount, own, self.self_trade_prevention == "cancel-oldest"):
+                return "Fill-or-kill order cannot be fully filled."
+
+        if account is not None:
+            error = self.accounts.check(account, type == "bid", amount, time_in_force == "GTC")
+            if error is not None:
+                return error
+        
+        self.id += 1
+        order_id = self.id
+
+        if time_in_force == "GTC":
+            self.logs.append(BID_ADDED if type == "bid" else ASK_ADDED, order_id, price, amount)
+
+        if time_in_force == "GTC" and not self.inline_matching:
+            # Deferred mode: rest the order as is and let the engine thread match it
+            self.rest_locked(order_id, amount, price, type, account)
+            self.pending_match = True
+            self.order_added.notify()
+            return (ORDER_RESTING, order_id, type, price, amount, 0, amount, 0, self.trades.next, 0)
+
+        if self.journal is not None and (time_in_force != "GTC" or opposite.crosses(price)):
+            self.journal_taker_locked(SIDE_CODES[type], order_id, price, amount, account)
+
+        # Trade against the other side first, so only the remainder (if any) rests
+        fills = []
+        first_trade = self.trades.next
+        remaining, prevented = self.sweep_locked(opposite, amount, price, order_id, fills, account)
+        trade_count = self.trades.next - first_trade
+        for filled, fill_price, id, complete in fills:
+            if complete:
+                self.logs.append(FILLED, id, fill_price, filled)
+        filled_total = amount - remaining - prevented
+
+        if remaining <= 0 and not prevented:
+            # Logged at the price of its last fill, which is where it completed
+            self.logs.append(FILLED, order_id, fills[-1][1], amount)
+            return (ORDER_FILLED, order_id, type, price, amount, amount, 0, 0, first_trade, trade_count)
+
+        if remaining > 0 and time_in_force == "GTC":
+            self.rest_locked(order_id, remaining, price, type, account)
+            status = ORDER_RESTING
+        else:
+            # IOC, or self-trade prevention took the rest: whatever did not trade is cancelled
+            self.logs.append(CANCELLED, order_id, price, remaining + prevented)
+            if self.journal is not None:
+                self.journal_append(CANCEL, SIDE_CODES[type], order_id, price, remaining + prevented)
+            status = ORDER_DONE
+        return (status, order_id, type, price, amount, filled_total, remaining, prevented, first_trade, trade_count)
+
+    def market_order_locked(self, amount: float, type: str, price: float = None, account: int = None,
+                            units: bool = False):
+        # A price turns the order into a market order with protection: it only
+        # trades at that price or better and the rest is cancelled
+        if amount is None or type is None:
+            return "Missing required parameters: amount, type"
+
+        if account is not None and account_error(account) is not None:
+            return account_error(account)
+
+        if amount <= 0:
             return "Amount must be positive."
+
+        if price is not None and price <= 0:
+            return "Price must be positive."
+
+        if price is not None:
+            price = self.ticks(price, units)
+            if price is None:
+                return f"Price must be a multiple of the tick size {self.prices.size}."
+
+        amount = self.lots(amount, units)
+        if amount is None:
+            return f"Amount must be a multiple of the lot size {self.amounts.size}."
         
+        if type == "buy":
+            side, event = self.asks, MARKET_BUY
+        elif type == "sell":
+            side, event = self.bids, MARKET_SELL
+        else:
+            return "Type must be either 'buy' or 'sell'"
+
+        if account is not None:
+            error = self.accounts.check(account, type == "buy", amount, False)
+            if error is not None:
+                return error
+
+        # Market orders get an id too, so their fills can be attributed
+        self.id += 1
+        order_id = self.id
+        if self.journal is not None:
+            self.journal_taker_locked(0 if type == "buy" else 1, order_id, price or 0, amount, account)
+
+        fills = []
+        first_trade = self.trades.next
+        remaining_amount, prevented = self.sweep_locked(side, amount, price, order_id, fills, account)
+        for filled, fill_price, id, complete in fills:
+            self.logs.append(event, id, fill_price, filled)
+
+        status = ORDER_DONE if remaining_amount > 0 or prevented else ORDER_FILLED
+        if status == ORDER_DONE and self.journal is not None:
+            # Closes the order's TAKER record, so recovery knows where its fills end
+            self.journal_append(CANCEL, 0 if type == "buy" else 1, order_id, price or 0, remaining_amount + prevented)
+        return (status, order_id, type, price, amount, amount - remaining_amount - prevented, remaining_amount,
+                prevented, first_trade, self.trades.next - first_trade)
+
+    def sweep_locked(self, side: book_side, amount: int, price: int, taker_id: int, fills: list,
+                     account: int = None):
+        # Trades amount for order taker_id against side, best level first, while it
+        # crosses price (None for no limit). Records a trade and appends (amount, price,
+        # id, fully filled) for every resting order it hits. Returns the amount left
+        # over and the amount self-trade prevention took off the order.
+        code = 0 if side is self.bids else 1
+        aggressor = 1 - code
+        start = amount
+        prevented = 0
+        while amount > 0 and side.crosses(price):
+            level = side.best
+            resting = level.orders[0]
+            if account is not None and resting.account == account:
+                taken = self.prevent_self_trade_locked(resting, amount)
+                amount -= taken
+                prevented += taken
+                continue
+            filled = min(amount, resting.amount)
+            fills.append((filled, resting.price, resting.id, filled >= resting.amount))
+            self.trades.append(aggressor, resting.price, filled, taker_id, amount - filled,
+                               resting.id, resting.amount - filled)
+            if self.journal is not None:
+                self.journal_append(FILL, code, resting.id, resting.price, filled)
+            side.fill(level, filled)
+            amount -= filled
+
+        if account is not None and start > amount + prevented:
+            self.accounts.traded(account, aggressor == 0, start - amount - prevented)
+        return amount, prevented
+
+    def prevent_self_trade_locked(self, resting: order, amount: int):
+        # An incoming order of amount would trade with resting, an order of the same
+        # account. Returns how much to take off the incoming order.
+        self.self_trades_prevented += 1
+        if self.self_trade_prevention == "cancel-newest":
+            return amount
+        if self.self_trade_prevention == "cancel-oldest":
+            self.cancel_resting_locked(resting)
+            return 0
+        taken = min(amount, resting.amount)
+        if resting.amount <= taken:
+            self.cancel_resting_locked(resting)
+        else:
+            self.reduce_resting_locked(resting, resting.amount - taken)
+        return taken
+
+    def rest_locked(self, order_id: int, amount: int, price: int, type: str, account: int = None):
+        side = self.bids if type == "bid" else self.asks
+        side.add(order(order_id, amount, price, type, account))
+        if self.journal is not None:
+            if account is not None:
+                # Names the owner of the LIMIT record that follows
+                self.journal.append(ACCOUNT, SIDE_CODES[type], order_id, 0.0, account)
+            self.journal_append(LIMIT, SIDE_CODES[type], order_id, price, amount)
+
+    def journal_taker_locked(self, side: int, order_id: int, price: int, amount: int, account: int = None):
+        # Orders that only rest are journaled by their LIMIT record; the rest get a TAKER
+        # record, so every id handed out is in the journal
+        if account is not None:
+            self.journal.append(ACCOUNT, side, order_id, 0.0, account)
+        self.journal_append(TAKER, side, order_id, price, amount)
+
+    def cancel_resting_locked(self, resting: order):
+        side = self.bids if resting.side == "bid" else self.asks
+        side.cancel(resting)
+        self.logs.append(CANCELLED, resting.id, resting.price, 0)
+        if self.journal is not None:
+            self.journal_append(CANCEL, SIDE_CODES[resting.side], resting.id, resting.price, 0)
+
+    def reduce_resting_locked(self, resting: order, amount: int):
+        side = self.bids if resting.side == "bid" else self.asks
+        side.reduce(resting, amount)
+        self.logs.append(AMENDED, resting.id, resting.price, amount)
+        if self.journal is not None:
+            self.journal_append(AMEND, SIDE_CODES[resting.side], resting.id, resting.price, amount)
+
+    def cancel_order_locked(self, id: int):
+        if id is None:
+            return "Missing required parameter: id"
+
+        resting = self.orders.get(id)
+        if resting is None:
+            return "Order not found."
+
+        self.cancel_resting_locked(resting)
+        return {"message": "Order cancelled.", "id": id}
+
+    def amend_order_locked(self, id: int, new_amount: float, units: bool = False):
+        if id is None or new_amount is None:
+            return "Missing required parameters: id, amount"
+
+        if new_amount <= 0:
+            return "Amount must be positive."
+
+        resting = self.orders.get(id)
+        if resting is None:
+            return "Order not found."
+
+        amount = self.lots(new_amount, units)
+        if amount is None:
+            return f"Amount must be a multiple of the lot size {self.amounts.size}."
+
+        if resting.account is not None and amount > resting.amount:
+            error = self.accounts.check_increase(resting.account, resting.side == "bid", resting.amount, amount)
+            if error is not None:
+                return error
+
+        self.change_amount(resting, amount)
+        self.logs.append(AMENDED, id, resting.price, amount)
+        if self.journal is not None:
+            self.journal_append(AMEND, SIDE_CODES[resting.side], id, resting.price, amount)
+        return {"message": "Order amended.", "id": id, "amount": amount if units else self.amounts.decode(amount)}
+
+    def change_amount(self, resting: order, new_amount: int):
+        side = self.bids if resting.side == "bid" else self.asks
+        if new_amount <= resting.amount:
+            # Reducing keeps the order's place in the queue
+            side.reduce(resting, new_amount)
+        else:
+            # Increasing loses time priority: the order moves to the back of its level
+            side.cancel(resting)
+            side.add(order(resting.id, new_amount, resting.price, resting.side, resting.account))
+
+    def journal_append(self, type: int, side: int, id: int, price: int, amount: int):
+        # The journal holds real prices and amounts, so it stays readable whatever
+        # tick and lot size the book is later opened with
+        self.journal.append(type, side, id, self.prices.decode(price), self.amounts.decode(amount))
+
+    def journal_position(self):
+        return self.journal.position if self.journal is not None else 0
+
+    def wait_durable(self, position: int):
+        # Called after releasing self.lock, so group commit never stalls matching
+        if self.journal is not None:
+            self.journal.wait(position)
+
+    def instrument(self, metrics: metrics, symbol: str):
+        # Swaps timed wrappers in for the lock and the methods on the order path.
+        # Books that are never instrumented keep the plain ones and pay nothing.
+        self.lock = timed_lock(
+            self.lock,
+            metrics.histogram("lock_wait_seconds", "Time spent waiting to acquire a book's lock", symbol=symbol),
+            metrics.counter("lock_contended_total", "Book lock acquisitions that had to wait", symbol=symbol)
+        )
+
+        for method, op in (("limit_order_locked", "limit"), ("market_order_locked", "market"),
+                           ("cancel_order_locked", "cancel"), ("amend_order_locked", "amend")):
+            latency = metrics.histogram("order_seconds", "Time to apply an order instruction, matching included, "
+                                        "with the book's lock held", symbol=symbol, op=op)
+            accepted = metrics.counter("orders_total", "Order instructions applied", symbol=symbol, op=op, result="accepted")
+            rejected = metrics.counter("orders_total", "Order instructions applied", symbol=symbol, op=op, result="rejected")
+            setattr(self, method, counted_entry(getattr(self, method), latency, accepted, rejected))
+
+        matching = metrics.histogram("match_seconds", "Time spent matching an incoming or crossing order",
+                                     symbol=symbol)
+        self.sweep_locked = matching.time(self.sweep_locked)
+        self.match_crosses = matching.time(self.match_crosses)
+        durable_wait = metrics.histogram("durable_wait_seconds", "Time a request waited for its journal records "
+                                         "to reach disk", symbol=symbol)
+        def wait_durable(position: int):
+            # Only timed once a journal is attached
+            if self.journal is not None:
+                start = time.perf_counter_ns()
+                self.journal.wait(position)
+                durable_wait.observe(time.perf_counter_ns() - start)
+        self.wait_durable = wait_durable
+
+        # Read from state the book keeps anyway
+        metrics.gauge("trades_total", "Fills recorded", lambda: self.trades.next, kind="counter", symbol=symbol)
+        metrics.gauge("events_total", "Events appended to the event log", lambda: self.logs.next, kind="counter",
+                      symbol=symbol)
+        metrics.gauge("resting_orders", "Orders resting on the book", lambda: len(self.orders), symbol=symbol)
+        metrics.gauge("self_trades_prevented_total", "Trades self-trade prevention stopped",
+                      lambda: self.self_trades_prevented, kind="counter", symbol=symbol)
+        metrics.gauge("journal_backlog_records", "Journal records appended but not yet durable",
+                      lambda: self.journal.position - self.journal.durable if self.journal is not None else 0,
+                      symbol=symbol)
+        metrics.gauge("tape_records_total", "Events and fills written to the tape",
+                      lambda: len(self.tape) if self.tape is not None else 0, kind="counter", symbol=symbol)
+        metrics.gauge("tape_missed_total", "Events and fills overwritten in the logs before the tape copied them",
+                      lambda: self.tape.missed if self.tape is not None else 0, kind="counter", symbol=symbol)
+
+    def open_journal(self, directory: str, mode: str = "group"):
+        # Restores the book from directory, then journals every change made from here on
+        position = self.recover(directory)
+        self.journal = journal(directory, mode, position)
+
+    def recover(self, directory: str):
+        # Loads the latest snapshot and replays only the journal records written after
+        # it. Returns the journal position to continue from.
+        position = 0
+        if not os.path.isdir(directory):
+            return position
+
         with self.lock:
-            if type == "buy":
-                remaining_amount = amount
-                executed_trades = []
-                
-                while remaining_amount > 0 and self.asks:
-                    best_ask = self.asks[0]
-                    ask_amount, ask_price, ask_id = best_ask
-                    
-                    if remaining_amount >= ask_amount:
-                        executed_trades.append((ask_amount, ask_price))
-                        remaining_amount -= ask_amount
-                        self.asks.pop(0)
-                        self.logs.append(f"{datetime.now()} Market buy executed: {ask_amount} @ {ask_price}")
-                    else:
-                        executed_trades.append((remaining_amount, ask_price))
-                        updated_ask = (ask_amount - remaining_amount, ask_price, ask_id)
-                        self.asks.pop(0)
-                        self.asks.add(updated_ask)
-                        self.logs.append(f"{datetime.now()} Market buy executed: {remaining_amount} @ {ask_price}")
-                        remaining_amount = 0
-                
-                if remaining_amount > 0:
-                    return f"Partially filled. {amount - remaining_amount} executed, {remaining_amount} remaining (no more asks available)"
-                else:
-                    return f"Market buy order fully executed. Trades: {executed_trades}"
-                    
-            elif type == "sell":
-                remaining_amount = amount
-                executed_trades = []
-                
-                while remaining_amount > 0 and self.bids:
-                    best_bid = self.bids[0]
-                    bid_amount, bid_price, bid_id = best_bid
-                    
-                    if remaining_amount >= bid_amount:
-                        executed_trades.append((bid_amount, bid_price))
-                        remaining_amount -= bid_amount
-                        self.bids.pop(0)
-                        self.logs.append(f"{datetime.now()} Market sell executed: {bid_amount} @ {bid_price}")
-                    else:
-                        executed_trades.append((remaining_amount, bid_price))
-                        updated_bid = (bid_amount - remaining_amount, bid_price, bid_id)
-                        self.bids.pop(0)
-                        self.bids.add(updated_bid)
-                        self.logs.append(f"{datetime.now()} Market sell executed: {remaining_amount} @ {bid_price}")
-                        remaining_amount = 0
-                
-                if remaining_amount > 0:
-                    return f"Partially filled. {amount - remaining_amount} executed, {remaining_amount} remaining (no more bids available)"
+            snapshot = read_snapshot(directory)
+            if snapshot is not None:
+                position, self.id, orders, positions = snapshot
+                for side, id, price, amount, account in orders:
+                    self.replay_locked(LIMIT, side, id, price, amount, account or None)
+                for account, net in positions:
+                    self.accounts.get(account).position = round(net / self.amounts.size)
+
+            # (order id, account) from an ACCOUNT record, for the LIMIT or TAKER record after it
+            owner = (None, None)
+            # [order id, account, buys, lots not yet accounted for] of the last TAKER
+            # record. Its fills are the FILL records up to its own LIMIT or CANCEL record.
+            taker = None
+            for record_position, type, side, id, price, amount in read_records(directory, position):
+                if type == ACCOUNT:
+                    owner = (id, int(amount))
                 else:
-                    return f"Market sell order fully executed. Trades: {executed_trades}"
+                    account = owner[1] if owner[0] == id else None
+                    if type == TAKER:
+                        taker = [id, account, side == 0, round(amount / self.amounts.size)]
+                    elif taker is not None and type == FILL:
+                        lots = round(amount / self.amounts.size)
+                        if taker[1] is not None:
+                            self.accounts.traded(taker[1], taker[2], lots)
+                        taker[3] -= lots
+                        if taker[3] <= 0:
+                            taker = None
+                    elif taker is not None and id == taker[0]:
+                        taker = None
+                    self.replay_locked(type, side, id, price, amount, account)
+                position = record_position + 1
+
+        return position
+
+    def replay_locked(self, type: int, side: int, id: int, price: float, amount: float, account: int = None):
+        # Applies a journal record directly to the book. Fills are replayed as recorded
+        # rather than re-matched, so the result does not depend on matching timing.
+        # Records hold real values; round onto this book's ticks and lots
+        price = round(price / self.prices.size)
+        amount = round(amount / self.amounts.size)
+        if type == TAKER:
+            # Its fills and remainder have their own records; only the id matters here
+            self.id = max(self.id, id)
+            return
+        if type == LIMIT:
+            book_side = self.bids if side == 0 else self.asks
+            book_side.add(order(id, amount, price, SIDES[side], account))
+            self.id = max(self.id, id)
+            return
+
+        resting = self.orders.get(id)
+        if resting is None:
+            return
+
+        book_side = self.bids if resting.side == "bid" else self.asks
+        if type == FILL:
+            if resting.account is not None:
+                self.accounts.traded(resting.account, resting.side == "bid", min(amount, resting.amount))
+            if amount >= resting.amount:
+                book_side.cancel(resting)
             else:
-                return "Type must be either 'buy' or 'sell'"
\ No newline at end of file
+                book_side.reduce(resting, resting.amount - amount)
+        elif type == CANCEL:
+            book_side.cancel(resting)
+        elif type == AMEND:
+            self.change_amount(resting, amount)
+
+    def write_snapshot(self):
+        # Saves every resting order in priority order and starts a new journal segment,
+        # then deletes the segments the snapshot replaces. Only the copy holds the lock.
+        with self.lock:
+            position = self.journal.position
+            last_id = self.id
+            orders = [(SIDE_CODES[resting.side], resting.id, resting.price, resting.amount, resting.account or 0)
+                      for side in (self.bids, self.asks)
+                      for level in side.levels.values()
+                      for resting in level.orders
+                      if resting.amount > 0]
+            positions = [(account, state.position) for account, state in self.accounts.accounts.items()
+                         if state.position != 0]
+            self.journal.rotate(position)
+
+        price, amount = self.prices.decode, self.amounts.decode
+        orders = [(side, id, price(ticks), amount(units), account) for side, id, ticks, units, account in orders]
+        positions = [(account, amount(units)) for account, units in positions]
+
+        write_snapshot(self.journal.directory, position, last_id, orders, positions)
+        self.journal.prune(position)
+
+    def open_analytics(self):
+        if self.analytics is None:
+            from orderbook.analytics import market_analytics
+            # The sampler thread and a reader may get here together; only one builds it
+            with self.lock:
+                if self.analytics is None:
+                    self.analytics = market_analytics(self)
+        return self.analytics
+
+    def open_tape(self, path: str):
+        from orderbook.tape import tape
+        self.tape = tape(path, self.logs, self.trades, self.lock)
+
+    def tape_run(self, interval: float):
+        # Copies new events and fills to the tape every interval seconds. The logs hold
+        # the last log_capacity of each, so this only has to keep up on average.
+        while True:
+            time.sleep(interval)
+            try:
+                self.tape.drain()
+            except Exception as e:
+                print(f"Error writing the tape: {e}")
+                traceback.print_exc()
+
+    def snapshot_run(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                if self.journal is not None:
+                    self.write_snapshot()
+            except Exception as e:
+                print(f"Error writing snapshot: {e}")
+                traceback.print_exc()
@@ -0,0 +1,223 @@
+from collections import deque
+from itertools import islice
+from sortedcontainers import SortedDict
+
+class order:
+    __slots__ = ("id", "amount", "price", "side", "account")
+
+    def __init__(self, id: int, amount: float, price: float, side: str, account: int = None):
+        self.id = id
+        self.amount = amount
+        self.price = price
+        self.side = side
+        # Owning account id, or None for orders that skip risk checks and self-trade prevention
+        self.account = account
+
+    def as_tuple(self):
+        return (self.amount, self.price, self.id)
+
+    def __repr__(self):
+        return repr(self.as_tuple())
+
+class price_level:
+    __slots__ = ("price", "orders", "total", "count")
+
+    def __init__(self, price: float):
+        self.price = price
+        # Resting orders in time priority, oldest first. Cancelled orders stay
+        # behind as zero-amount entries until they reach the head of the queue.
+        self.orders = deque()
+        # Cached sum of the amounts and number of live orders at this price
+        self.total = 0
+        self.count = 0
+
+    def drop_cancelled(self):
+        orders = self.orders
+        while orders and orders[0].amount <= 0:
+            orders.popleft()
+
+        # Rebuild the queue once cancelled entries outnumber live ones, keeping it O(1) amortized
+        if len(orders) > 2 * self.count + 8:
+            self.orders = deque(resting for resting in orders if resting.amount > 0)
+
+class book_side:
+    def __init__(self, descending: bool, index: dict, accounts=None):
+        # Bids are keyed on the negated price so the best level always sorts first
+        self.sign = -1 if descending else 1
+        self.bid = descending
+        self.levels = SortedDict()
+        self.best = None
+        self.count = 0
+        # id -> order for every live order, shared by both sides of the book
+        self.index = index
+        # account_book told about every change to an order with an account
+        self.accounts = accounts
+        # Bumped whenever the best level's price or total changes, so top-of-book
+        # readers can tell nothing moved without looking at the book
+        self.top_version = 0
+        # Prices whose level changed since the last take_changes()
+        self.changed = set()
+        # Prices whose level changed since the last publish(), and a count of changes
+        # that a published view records so readers can tell whether it's current
+        self.touched = set()
+        self.version = 0
+
+    def add(self, new_order: order):
+        key = self.sign * new_order.price
+        level = self.levels.get(key)
+        if level is None:
+            level = price_level(new_order.price)
+            self.levels[key] = level
+            if self.best is None or key < self.sign * self.best.price:
+                self.best = level
+
+        level.orders.append(new_order)
+        level.total += new_order.amount
+        level.count += 1
+        if level is self.best:
+            self.top_version += 1
+        self.count += 1
+        self.index[new_order.id] = new_order
+        self.changed.add(level.price)
+        self.touched.add(level.price)
+        self.version += 1
+        if new_order.account is not None:
+            self.accounts.opened(new_order, self.bid)
+
+    def fill(self, level: price_level, amount: float):
+        # Fills the oldest order at level in place, keeping its queue position
+        head = level.orders[0]
+        head.amount -= amount
+        level.total -= amount
+        if level is self.best:
+            self.top_version += 1
+        self.changed.add(level.price)
+        self.touched.add(level.price)
+        self.version += 1
+        if head.account is not None:
+            self.accounts.filled(head, amount, self.bid)
+
+        if head.amount <= 0:
+            level.orders.popleft()
+            self.unlink(level, head)
+
+    def cancel(self, resting: order):
+        level = self.levels[self.sign * resting.price]
+        level.total -= resting.amount
+        if level is self.best:
+            self.top_version += 1
+        self.changed.add(level.price)
+        self.touched.add(level.price)
+        self.version += 1
+        if resting.account is not None:
+            self.accounts.reduced(resting, resting.amount, self.bid)
+        # Leave a zero-amount entry in the queue rather than searching the deque
+        resting.amount = 0
+        self.unlink(level, resting)
+
+    def reduce(self, resting: order, amount: float):
+        # Shrinking an order in place keeps its time priority
+        level = self.levels[self.sign * resting.price]
+        level.total -= resting.amount - amount
+        if level is self.best:
+            self.top_version += 1
+        if resting.account is not None:
+            self.accounts.reduced(resting, resting.amount - amount, self.bid)
+        resting.amount = amount
+        self.changed.add(level.price)
+        self.touched.add(level.price)
+        self.version += 1
+
+    def unlink(self, level: price_level, resting: order):
+        del self.index[resting.id]
+        if resting.account is not None:
+            self.accounts.closed(resting)
+        level.count -= 1
+        self.count -= 1
+        if level.count == 0:
+            self.remove_level(level)
+        else:
+            level.drop_cancelled()
+
+    def remove_level(self, level: price_level):
+        del self.levels[self.sign * level.price]
+        if level is self.best:
+            self.best = self.levels.peekitem(0)[1] if self.levels else None
+
+    def crosses(self, price: float):
+        # True if the best level would trade with an incoming order on the other side
+        # at price; None stands for a market order with no price limit
+        if self.best is None:
+            return False
+        return price is None or self.sign * self.best.price <= self.sign * price
+
+    def available(self, price: float, amount: float, account: int = None, past_own: bool = True):
+        # True if levels priced at or better than price hold at least amount in total.
+        # Sums the cached level totals, so it never looks at individual orders, unless
+        # account is given: then that account's orders don't count, and unless past_own
+        # the count stops at the first of them.
+        total = 0
+        keys = self.levels if price is None else self.levels.irange(maximum=self.sign * price)
+        for key in keys:
+            level = self.levels[key]
+            if account is None:
+                total += level.total
+            else:
+                for resting in level.orders:
+                    if resting.account == account and resting.amount > 0:
+                        if not past_own:
+                            return False
+                        continue
+                    total += resting.amount
+                    if total >= amount:
+                        return True
+            if total >= amount:
+                return True
+        return False
+
+    def depth(self):
+        # [price, amount] per level in priority order
+        return [[level.price, level.total] for level in self.levels.values()]
+
+    def top(self, levels: int):
+        # [price, amount, order count] for the best `levels` levels, from the cached aggregates
+        return [[level.price, level.total, level.count]
+                for level in islice(self.levels.values(), levels)]
+
+    def take_changes(self):
+        # [price, amount] for every level changed since the last call; 0 means the level is gone
+        changes = []
+        for price in self.changed:
+            level = self.levels.get(self.sign * price)
+            changes.append([price, level.total if level is not None else 0])
+        self.changed.clear()
+        return changes
+
+    def publish(self, previous: dict):
+        # {price: (price, total, count, orders)} in priority order for book_view, with
+        # orders as (amount, price, id) tuples. Levels not touched since the last
+        # publish are taken from previous rather than copied again.
+        touched = self.touched
+        levels = {}
+        for level in self.levels.values():
+            price = level.price
+            view = None if price in touched else previous.get(price)
+            if view is None:
+                view = (price, level.total, level.count,
+                        tuple(resting.as_tuple() for resting in level.orders if resting.amount > 0))
+            levels[price] = view
+        touched.clear()
+        return levels
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        # Yields (amount, price, id) tuples in matching priority
+        for level in self.levels.values():
+            for resting in level.orders:
+                if resting.amount > 0:
+                    yield resting.as_tuple()
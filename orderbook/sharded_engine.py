@@ -0,0 +1,291 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+from orderbook.book_registry import book_registry, journal_symbols, split_batch, SYMBOL_PATTERN
+from orderbook.matching_thread import apply_calls
+from orderbook.metrics import metrics, merge
+
+# Upper bound on calls the front end packs into one pipe message
+MAX_CALLS_PER_MESSAGE = 256
+
+def shard_worker_run(connection, symbols: list, book_options: dict, with_metrics: bool):
+    # Runs in the worker process. Owns one book_registry for its symbols and applies
+    # each message of (call id, symbol, method, args) calls in order, replying with
+    # one message of (call id, result, error) for the whole batch.
+    registry = book_registry(symbols, metrics=metrics() if with_metrics else None, **book_options)
+
+    while True:
+        try:
+            calls = connection.recv()
+        except EOFError:
+            break
+        if calls is None:
+            break
+
+        connection.send(apply_calls(registry, calls))
+
+    connection.close()
+
+class shard:
+    # Front-end handle for one worker process. Calls from any thread are queued,
+    # packed into as few pipe messages as possible and matched to their replies by id.
+    def __init__(self, index: int, symbols: list, book_options: dict, with_metrics: bool = False):
+        self.index = index
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=shard_worker_run,
+                                               args=(worker_connection, symbols, book_options, with_metrics),
+                                               name=f"microbook-shard-{index}", daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+        self.outgoing = queue.SimpleQueue()
+        self.pending = {}
+        self.call_ids = itertools.count()
+        self.closed = False
+
+        threading.Thread(target=self.sender_run, daemon=True).start()
+        threading.Thread(target=self.receiver_run, daemon=True).start()
+
+    def submit(self, symbol: str, method: str, args: tuple = ()):
+        # Returns a Future for the call's result
+        future = Future()
+        if self.closed:
+            future.set_exception(RuntimeError(f"Shard {self.index} is not running"))
+            return future
+        call_id = next(self.call_ids)
+        self.pending[call_id] = future
+        self.outgoing.put((call_id, symbol, method, args))
+        return future
+
+    def call(self, symbol: str, method: str, *args):
+        return self.submit(symbol, method, args).result()
+
+    def sender_run(self):
+        while True:
+            call = self.outgoing.get()
+            if call is None:
+                break
+            calls = [call]
+            while len(calls) < MAX_CALLS_PER_MESSAGE:
+                try:
+                    call = self.outgoing.get_nowait()
+                except queue.Empty:
+                    break
+                if call is None:
+                    self.outgoing.put(None)
+                    break
+                calls.append(call)
+            try:
+                self.connection.send(calls)
+            except (OSError, ValueError):
+                break
+
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+
+    def receiver_run(self):
+        while True:
+            try:
+                replies = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            for call_id, result, error in replies:
+                future = self.pending.pop(call_id)
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(error))
+
+        # The worker is gone; nothing still waiting will ever get a reply
+        self.closed = True
+        for call_id in list(self.pending):
+            self.pending.pop(call_id).set_exception(RuntimeError(f"Shard {self.index} stopped"))
+
+    def close(self):
+        self.outgoing.put(None)
+        self.process.join(timeout=5)
+
+class remote_book:
+    # Stands in for an orderbook_server that lives in a shard worker
+    def __init__(self, shard: shard, symbol: str):
+        self.shard = shard
+        self.symbol = symbol
+
+    def new_limit_order(self, amount: float, price: float, type: str,
+                        time_in_force: str = "GTC", post_only: bool = False, account: int = None):
+        try:
+            return self.shard.call(self.symbol, "new_limit_order", amount, price, type, time_in_force, post_only,
+                                   account)
+        except RuntimeError as e:
+            print(f"Error in new_limit_order: {e}")
+            return f"Error processing order: {str(e)}"
+
+    def new_order(self, amount: float, type: str, price: float = None, account: int = None):
+        return self.shard.call(self.symbol, "new_order", amount, type, price, account)
+
+    def cancel_order(self, id: int):
+        return self.shard.call(self.symbol, "cancel_order", id)
+
+    def amend_order(self, id: int, new_amount: float):
+        return self.shard.call(self.symbol, "amend_order", id, new_amount)
+
+    def submit_batch(self, instructions: list):
+        return self.shard.call(self.symbol, "submit_batch", instructions)
+
+    def get_order_book(self):
+        return self.shard.call(self.symbol, "get_order_book")
+
+    def get_bbo(self, since: tuple = None):
+        return self.shard.call(self.symbol, "get_bbo", since)
+
+    def get_depth(self, levels: int = 10):
+        return self.shard.call(self.symbol, "get_depth", levels)
+
+    def depth_snapshot(self):
+        return self.shard.call(self.symbol, "depth_snapshot")
+
+    def collect_depth_changes(self):
+        return self.shard.call(self.symbol, "collect_depth_changes")
+
+    def read_logs(self, cursor: int = None, limit: int = 1000, recent: int = 100):
+        return self.shard.call(self.symbol, "read_logs", cursor, limit, recent)
+
+    def read_trades(self, cursor: int = None, limit: int = 1000, recent: int = 100):
+        return self.shard.call(self.symbol, "read_trades", cursor, limit, recent)
+
+    def get_analytics(self, window: float = 60.0, bar: float = 1.0, levels: int = 20):
+        return self.shard.call(self.symbol, "get_analytics", window, bar, levels)
+
+    def read_history(self, start: int = None, end: int = None, by: str = "time", limit: int = 10_000,
+                     raw: bool = False):
+        return self.shard.call(self.symbol, "read_history", start, end, by, limit, raw)
+
+    def get_account(self, account: int):
+        return self.shard.call(self.symbol, "get_account", account)
+
+    def order_count(self):
+        return self.shard.call(self.symbol, "order_count")
+
+class shard_router:
+    # Drop-in replacement for book_registry that spreads symbols over worker processes,
+    # each running its own book_registry, so matching for different symbols runs on
+    # different cores. Configured symbols are assigned round-robin, so there are at most
+    # as many workers as symbols; symbols created later go to the shard picked by a
+    # hash of the name.
+    def __init__(self, symbols: list, workers: int = None, allow_new_symbols: bool = False,
+                 metrics: metrics = None, **book_options):
+        if not symbols:
+            raise ValueError("At least one symbol is required")
+
+        # Every shard starts with at least one configured symbol
+        workers = max(1, min(workers or multiprocessing.cpu_count(), len(symbols)))
+
+        assignments = [[] for _ in range(workers)]
+        for index, symbol in enumerate(symbols):
+            assignments[index % workers].append(symbol)
+
+        self.shards = [shard(index, shard_symbols, book_options, metrics is not None)
+                       for index, shard_symbols in enumerate(assignments)]
+
+        self.books = {symbol: remote_book(self.shards[index % workers], symbol)
+                      for index, symbol in enumerate(symbols)}
+
+        self.default_symbol = symbols[0]
+        self.allow_new_symbols = allow_new_symbols
+        self.tape_dir = None
+        self.lock = threading.Lock()
+        # Worker processes by symbol, so server.py can check them like engine threads
+        self.engine_threads = {symbol: book.shard.process for symbol, book in self.books.items()}
+
+        # Front-end metrics; each worker keeps its own for its books, merged by collect_metrics
+        self.metrics = metrics
+        if metrics is not None:
+            for worker in self.shards:
+                metrics.gauge("shard_pending_calls", "Calls sent to a shard worker and not yet answered",
+                              lambda worker=worker: len(worker.pending), shard=worker.index)
+
+    def get(self, symbol: str = None):
+        # Returns the book for symbol (the default symbol when None), or None if unknown
+        if symbol is None:
+            symbol = self.default_symbol
+
+        book = self.books.get(symbol)
+        if book is None and self.allow_new_symbols and isinstance(symbol, str) and SYMBOL_PATTERN.fullmatch(symbol):
+            book = self.add(symbol)
+        return book
+
+    def add(self, symbol: str):
+        with self.lock:
+            book = self.books.get(symbol)
+            if book is None:
+                worker = self.shards[zlib.crc32(symbol.encode()) % len(self.shards)]
+                worker.call(None, "add", symbol)
+                book = remote_book(worker, symbol)
+                self.books[symbol] = book
+                self.engine_threads[symbol] = worker.process
+        return book
+
+    def symbols(self):
+        return list(self.books)
+
+    def items(self):
+        return list(self.books.items())
+
+    def start_engines(self):
+        self.broadcast("start_engines")
+
+    def open_journals(self, directory: str, mode: str = "group"):
+        # Every worker journals its symbols into directory/<symbol>, as book_registry does
+        self.broadcast("open_journals", directory, mode)
+
+        if self.allow_new_symbols:
+            for symbol in journal_symbols(directory):
+                self.get(symbol)
+
+    def start_snapshots(self, interval: float):
+        self.broadcast("start_snapshots", interval)
+
+    def open_tapes(self, directory: str, interval: float = 0.01):
+        self.tape_dir = directory
+        self.broadcast("open_tapes", directory, interval)
+
+    def start_analytics(self, interval: float):
+        self.broadcast("start_analytics", interval)
+
+    def broadcast(self, method: str, *args):
+        futures = [worker.submit(None, method, args) for worker in self.shards]
+        for future in futures:
+            future.result()
+
+    def submit(self, symbol: str, method: str, args: tuple = ()):
+        # Queues a call to the shard that owns symbol and returns a Future
+        return self.books[symbol].shard.submit(symbol, method, args)
+
+    def submit_batch(self, instructions: list):
+        # Splits the batch by symbol and sends every part before waiting on any, so
+        # different shards work on their parts in parallel. Results come back in order.
+        results, groups = split_batch(self, instructions)
+        futures = [(entries, self.submit(symbol, "submit_batch", ([instruction for _, instruction in entries],)))
+                   for symbol, entries in groups.items()]
+        for entries, future in futures:
+            for (index, _), result in zip(entries, future.result()):
+                results[index] = result
+        return results
+
+    def collect_metrics(self):
+        if self.metrics is None:
+            return {}
+        futures = [worker.submit(None, "collect_metrics") for worker in self.shards]
+        families = self.metrics.collect()
+        for future in futures:
+            merge(families, future.result())
+        return families
+
+    def close(self):
+        for worker in self.shards:
+            worker.close()
@@ -0,0 +1,201 @@
+import bisect
+import mmap
+import os
+import numpy as np
+from orderbook.analytics import decode
+from orderbook.event_log import AMENDED
+
+# Record type of a fill on the tape; the other types are the event_log ones
+TRADE = AMENDED + 1
+
+# One fixed-size record per book event or fill, in the order they happened. Times are
+# nanoseconds since the epoch. Event records use id, price and amount like event_log
+# and have a side of -1; trade records hold the aggressor side (0 buy, 1 sell), the
+# taker's id in id and the resting order's in maker_id. Prices are ticks, amounts lots.
+RECORD = np.dtype([("time", "<i8"), ("type", "i1"), ("side", "i1"), ("unused", "V6"), ("id", "<i8"),
+                   ("price", "<i8"), ("amount", "<i8"), ("maker_id", "<i8")])
+
+# File layout: a header (magic, record size, record count) then the records, so record
+# n is at HEADER_SIZE + n * RECORD.itemsize
+MAGIC = int.from_bytes(b"MBTAPE01", "little")
+HEADER_SIZE = 64
+# Records the file grows by when full
+GROWTH = 1 << 20
+# Every INDEX_STRIDE-th record's time is kept in memory; a time lookup bisects those,
+# then searches the one block of records between two of them
+INDEX_STRIDE = 1024
+
+# Names for /history, indexed by type and side (a side of -1 picks the last entry)
+TYPE_NAMES = np.array(["bid_added", "ask_added", "filled", "market_buy", "market_sell", "cancelled", "amended",
+                       "trade"], dtype=object)
+SIDE_NAMES = np.array(["buy", "sell", None], dtype=object)
+
+# Most records one /history request returns; ask again from "next" for more
+MAX_HISTORY_LIMIT = 100_000
+HISTORY_FORMATS = ("json", "binary")
+
+def history_error(by: str, limit: int, output: str):
+    # Error message for /history parameters read() can't serve, or None
+    if by not in ("time", "seq"):
+        return "By must be time or seq."
+    if not 0 < limit <= MAX_HISTORY_LIMIT:
+        return f"Limit must be between 1 and {MAX_HISTORY_LIMIT}."
+    if output not in HISTORY_FORMATS:
+        return f"Format must be one of {', '.join(HISTORY_FORMATS)}."
+    return None
+
+def history_headers(first: int, records: np.ndarray):
+    # Record numbers of a binary /history response, which has no room for them in the body
+    return {"X-First-Seq": str(first), "X-Next-Seq": str(first + len(records))}
+
+class tape:
+    # Append-only history of one book on disk, read through a memory map so a range
+    # query is a slice of the mapped file and never loads the rest into memory.
+    # Filled from the book's event and trade logs by drain(), off the matching path.
+    def __init__(self, path: str, logs, trades, lock):
+        self.path = path
+        self.logs = logs
+        self.trades = trades
+        # The book's lock, held by whoever appends to the logs
+        self.lock = lock
+
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+            with open(path, "wb") as file:
+                file.write(np.array([MAGIC, RECORD.itemsize, 0], dtype="<i8").tobytes().ljust(HEADER_SIZE, b"\0"))
+        header = np.fromfile(path, dtype="<i8", count=3)
+        if header[0] != MAGIC or header[1] != RECORD.itemsize:
+            raise ValueError(f"{path} is not a tape with {RECORD.itemsize}-byte records")
+
+        # Number of records written; only drain() changes it, after the records are in place
+        self.count = int(header[2])
+        self.header = self.records = None
+        self.map(max(self.count, GROWTH))
+        # Read with pread rather than through the mapping, which would map a cluster
+        # of pages around every entry into this process
+        with open(path, "rb") as file:
+            self.index_times = [int.from_bytes(os.pread(file.fileno(), 8, HEADER_SIZE + n * RECORD.itemsize),
+                                               "little", signed=True)
+                                for n in range(0, self.count, INDEX_STRIDE)]
+
+        # Log positions of the next event and trade to copy. Anything already in the
+        # logs when the tape is opened (such as a replayed journal) was taped before.
+        self.log_cursor = logs.next
+        self.trade_cursor = trades.next
+        # Events and trades overwritten in the logs before they were copied
+        self.missed = 0
+
+        self.log_columns = [np.frombuffer(column, dtype=dtype) for column, dtype in
+                            ((logs.types, np.int8), (logs.ids, np.int64), (logs.prices, np.int64),
+                             (logs.amounts, np.int64), (logs.times, np.int64))]
+        self.trade_columns = [np.frombuffer(column, dtype=dtype) for column, dtype in
+                              ((trades.sides, np.int8), (trades.taker_ids, np.int64), (trades.prices, np.int64),
+                               (trades.amounts, np.int64), (trades.maker_ids, np.int64), (trades.times, np.int64))]
+
+    def map(self, capacity: int):
+        # Grows the file to hold capacity records and maps it. Slices handed out
+        # earlier keep the old mapping, which stays valid.
+        size = HEADER_SIZE + capacity * RECORD.itemsize
+        with open(self.path, "r+b") as file:
+            if os.path.getsize(self.path) < size:
+                file.truncate(size)
+            mapping = mmap.mmap(file.fileno(), size)
+        # Queries touch a few scattered pages; don't read ahead around each one
+        if hasattr(mapping, "madvise"):
+            mapping.madvise(mmap.MADV_RANDOM)
+        self.header = np.frombuffer(mapping, dtype="<i8", count=HEADER_SIZE // 8)
+        self.records = np.frombuffer(mapping, dtype=RECORD, count=capacity, offset=HEADER_SIZE)
+
+    def append(self, batch: np.ndarray):
+        count = self.count
+        if count + len(batch) > len(self.records):
+            self.map(max(len(self.records) + GROWTH, count + len(batch)))
+        self.records[count:count + len(batch)] = batch
+
+        # Index entries go in before the count moves, so a reader never finds one missing
+        times = self.records["time"]
+        for n in range(-(-count // INDEX_STRIDE) * INDEX_STRIDE, count + len(batch), INDEX_STRIDE):
+            self.index_times.append(int(times[n]))
+        self.count = count + len(batch)
+        self.header[2] = self.count
+
+    def copy_ring(self, ring, columns: list, cursor: int, end: int):
+        # (copied columns, next cursor) for entries cursor..end-1 of an event or trade
+        # log. Entries overwritten before or while they were copied are counted in
+        # missed and left out.
+        start = max(cursor, ring.oldest())
+        slots = np.arange(start, end) % ring.capacity
+        copied = [column[slots] for column in columns]
+        overwritten = max(0, ring.oldest() - start)
+        self.missed += start - cursor + overwritten
+        return [column[overwritten:] for column in copied], max(end, start)
+
+    def drain(self):
+        # Copies every event and trade logged since the last call to the end of the tape.
+        # Both logs are cut at the same moment, so nothing logged later can come out
+        # ahead of something already taped.
+        with self.lock:
+            log_end, trade_end = self.logs.next, self.trades.next
+        (types, ids, prices, amounts, times), self.log_cursor = self.copy_ring(
+            self.logs, self.log_columns, self.log_cursor, log_end)
+        (sides, takers, trade_prices, trade_amounts, makers, trade_times), self.trade_cursor = self.copy_ring(
+            self.trades, self.trade_columns, self.trade_cursor, trade_end)
+
+        events = len(types)
+        batch = np.zeros(events + len(sides), dtype=RECORD)
+        if len(batch) == 0:
+            return 0
+        # Both logs read the same monotonic clock; one offset keeps their order on the tape
+        batch["time"] = np.concatenate((times, trade_times)) + self.logs.clock_offset
+        batch["type"][:events] = types
+        batch["type"][events:] = TRADE
+        batch["side"][:events] = -1
+        batch["side"][events:] = sides
+        batch["id"] = np.concatenate((ids, takers))
+        batch["price"] = np.concatenate((prices, trade_prices))
+        batch["amount"] = np.concatenate((amounts, trade_amounts))
+        batch["maker_id"][events:] = makers
+
+        # Events and fills come from two logs; interleave them in the order they happened
+        self.append(batch[np.argsort(batch["time"], kind="stable")])
+        return len(batch)
+
+    def seq_at(self, time: int, count: int):
+        # Number of the first record at or after time among the first count
+        block = bisect.bisect_left(self.index_times, time)
+        if block == 0:
+            return 0
+        low, high = (block - 1) * INDEX_STRIDE, min(block * INDEX_STRIDE, count)
+        if low >= high:
+            return count
+        return low + int(np.searchsorted(self.records["time"][low:high], time))
+
+    def read(self, start: int = None, end: int = None, by: str = "time", limit: int = 10_000):
+        # (first record number, records) for records in [start, end): times in
+        # nanoseconds since the epoch, or record numbers when by is "seq". The records
+        # are a slice of the mapped file, not a copy.
+        count, records = self.count, self.records
+        if by == "time":
+            first = 0 if start is None else self.seq_at(start, count)
+            last = count if end is None else self.seq_at(end, count)
+        else:
+            first = 0 if start is None else min(max(start, 0), count)
+            last = count if end is None else min(max(end, 0), count)
+        last = max(first, min(last, first + limit))
+        return first, records[first:last]
+
+    def formatted(self, first: int, records: np.ndarray):
+        # Columns of API values for /history, one list per field
+        return {
+            "first": first,
+            "next": first + len(records),
+            "time": records["time"].tolist(),
+            "type": TYPE_NAMES[records["type"]].tolist(),
+            "side": SIDE_NAMES[records["side"]].tolist(),
+            "id": records["id"].tolist(),
+            "price": decode(self.logs.price_scale, records["price"]).tolist(),
+            "amount": decode(self.logs.amount_scale, records["amount"]).tolist(),
+            "maker_id": records["maker_id"].tolist(),
+        }
+
+    def __len__(self):
+        return self.count
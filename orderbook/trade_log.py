@@ -0,0 +1,85 @@
+from array import array
+import time
+from orderbook.fixed_point import fixed_point
+
+# Side of the aggressor, the order that took liquidity
+AGGRESSOR_SIDES = ("buy", "sell")
+
+class trade_log:
+    def __init__(self, capacity: int = 100_000, price_scale: fixed_point = None, amount_scale: fixed_point = None):
+        # One row per fill between an aggressor and a resting order, in the same
+        # fixed-size column layout as event_log. Trade number n lives in slot
+        # n % capacity and is the trade's sequence number.
+        self.capacity = capacity
+        self.sides = array("b", bytes(capacity))
+        self.prices = array("q", [0]) * capacity
+        self.amounts = array("q", [0]) * capacity
+        self.taker_ids = array("q", [0]) * capacity
+        self.taker_leaves = array("q", [0]) * capacity
+        self.maker_ids = array("q", [0]) * capacity
+        self.maker_leaves = array("q", [0]) * capacity
+        self.times = array("q", [0]) * capacity
+
+        self.next = 0
+        self.clock_offset = time.time_ns() - time.monotonic_ns()
+        self.price_scale = price_scale or fixed_point(1)
+        self.amount_scale = amount_scale or fixed_point(1)
+
+    def append(self, side: int, price: int, amount: int, taker_id: int, taker_leaves: int,
+               maker_id: int, maker_leaves: int):
+        # Called with the engine lock held; stores integers only
+        slot = self.next % self.capacity
+        self.sides[slot] = side
+        self.prices[slot] = price
+        self.amounts[slot] = amount
+        self.taker_ids[slot] = taker_id
+        self.taker_leaves[slot] = taker_leaves
+        self.maker_ids[slot] = maker_id
+        self.maker_leaves[slot] = maker_leaves
+        self.times[slot] = time.monotonic_ns()
+        self.next += 1
+
+    def oldest(self):
+        # The slot after the newest one may be mid-overwrite, so it is never read
+        return max(0, self.next - self.capacity + 1)
+
+    def last(self):
+        # (price, amount, time) of the newest trade in ticks, lots and ns since the
+        # epoch, or None before the first; call with the engine lock held
+        if self.next == 0:
+            return None
+        slot = (self.next - 1) % self.capacity
+        return self.prices[slot], self.amounts[slot], self.times[slot] + self.clock_offset
+
+    def read(self, cursor: int, limit: int = None):
+        # Returns (reports, next_cursor) for trades from cursor onwards as execution
+        # report dicts. Trades overwritten before the reader caught up are skipped.
+        start = max(cursor, self.oldest())
+        end = self.next
+        if limit is not None:
+            end = min(end, start + limit)
+
+        price, amount = self.price_scale.decode, self.amount_scale.decode
+        reports = []
+        for n in range(start, end):
+            slot = n % self.capacity
+            reports.append({
+                "seq": n,
+                "price": price(self.prices[slot]),
+                "amount": amount(self.amounts[slot]),
+                "aggressor": AGGRESSOR_SIDES[self.sides[slot]],
+                "taker_id": self.taker_ids[slot],
+                "taker_leaves": amount(self.taker_leaves[slot]),
+                "maker_id": self.maker_ids[slot],
+                "maker_leaves": amount(self.maker_leaves[slot]),
+                "time": self.times[slot] + self.clock_offset,
+            })
+
+        overwritten = self.oldest() - start
+        if overwritten > 0:
+            reports = reports[overwritten:]
+
+        return reports, max(end, start)
+
+    def __len__(self):
+        return self.next
@@ -1,67 +1,489 @@
 import asyncio
 import websockets
+import websockets.exceptions
 import json
 import threading
+import time
+from collections import deque
 from datetime import datetime
 
+# Raised by a send or receive on a closed connection; ConnectionResetError covers
+# sockets from other WebSocket implementations (see async_front_end)
+CONNECTION_CLOSED = (websockets.exceptions.ConnectionClosed, ConnectionResetError)
+
+# What to do with a client whose send queue is full:
+# - snapshot: drop everything queued, tell the client how many messages it missed,
+#   and send fresh depth snapshots for the symbols it follows
+# - conflate: fold queued depth updates into one snapshot per symbol and keep only the
+#   latest top-N depth, analytics and BBO messages; fall back to snapshot if logs and
+#   trades still fill it
+# - disconnect: close the connection
+SLOW_CONSUMER_POLICIES = ("snapshot", "conflate", "disconnect")
+
+# Seconds between two messages on the analytics channel
+ANALYTICS_INTERVAL = 1.0
+
+# Seconds between two looks at the top of each book while anyone follows the BBO
+# channel; a subscriber's own interval can only be longer
+BBO_POLL_INTERVAL = 0.01
+
+# Kinds of message where only the newest one per subscription matters
+LATEST_ONLY = ("depth", "analytics", "bbo")
+
+class bbo_subscription:
+    __slots__ = ("interval", "sent_at", "sent_seq")
+
+    def __init__(self, interval: float):
+        # Least number of seconds between two BBO messages to this subscriber
+        self.interval = interval
+        self.sent_at = float("-inf")
+        # seq of the last BBO message queued for this subscriber
+        self.sent_seq = 0
+
+class client_queue:
+    # Messages waiting for one client, sent by that client's own task so a slow
+    # client only ever delays itself. Entries are (key, seq, message) where key is
+    # (kind, symbol, ...); a message of None is a depth snapshot built when it's sent.
+    def __init__(self, server, websocket):
+        self.server = server
+        self.websocket = websocket
+        self.entries = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        # Per symbol, seq of the last snapshot sent; queued updates at or below it are skipped
+        self.snapshot_seqs = {}
+        self.dropped = 0
+        self.resyncs = 0
+        self.task = asyncio.create_task(self.run())
+
+    def push(self, key, message, seq=None):
+        self.extend([(key, seq, message)])
+
+    def extend(self, entries: list):
+        # One call per client per broadcast, however many messages it carries. The
+        # slow-consumer policy applies as soon as the queue reaches max_queue, so it
+        # never holds more than that plus one broadcast.
+        if self.closed:
+            return
+        self.entries.extend(entries)
+        if len(self.entries) >= self.server.max_queue:
+            self.overflow()
+            if self.closed:
+                return
+        self.ready.set()
+
+    def overflow(self):
+        policy = self.server.slow_consumer
+        if policy == "disconnect":
+            self.close()
+            return
+        if policy == "conflate":
+            self.conflate()
+            if len(self.entries) < self.server.max_queue:
+                return
+        self.resync()
+
+    def conflate(self):
+        entries = deque()
+        snapshots = set()
+        latest_depth = {}
+        for entry in self.entries:
+            key = entry[0]
+            kind = key[0]
+            if kind == "depth_update" or kind == "depth_snapshot":
+                # Whatever was queued for the symbol, one snapshot taken at send time covers it
+                if key[1] not in snapshots:
+                    snapshots.add(key[1])
+                    entries.append((("depth_snapshot", key[1]), None, None))
+                continue
+            if kind in LATEST_ONLY:
+                latest_depth[key] = len(entries)
+            entries.append(entry)
+
+        # Only the newest top-N, analytics or BBO message per subscription is kept
+        keep = set(latest_depth.values())
+        dropped = len(self.entries)
+        self.entries = deque(entry for index, entry in enumerate(entries)
+                             if entry[0][0] not in LATEST_ONLY or index in keep)
+        dropped -= len(self.entries)
+        self.dropped += dropped
+        self.server.dropped_total += dropped
+
+    def resync(self):
+        self.dropped += len(self.entries)
+        self.resyncs += 1
+        self.server.dropped_total += len(self.entries)
+        self.server.resyncs_total += 1
+        self.entries.clear()
+        self.entries.append((("notice", None), None, json.dumps({
+            "type": "dropped",
+            "count": self.dropped,
+            "timestamp": datetime.now().isoformat()
+        })))
+        for symbol in self.server.registry.symbols():
+            if self.server.follows(self.websocket, symbol):
+                self.entries.append((("depth_snapshot", symbol), None, None))
+
+    def close(self):
+        self.closed = True
+        self.server.dropped_total += len(self.entries)
+        self.server.disconnects_total += 1
+        self.entries.clear()
+        self.task.cancel()
+        asyncio.create_task(self.websocket.close(code=1008, reason="Slow consumer"))
+
+    async def run(self):
+        try:
+            while True:
+                while not self.entries:
+                    self.ready.clear()
+                    await self.ready.wait()
+
+                key, seq, message = self.entries.popleft()
+                kind = key[0]
+                if kind == "depth_update" and seq <= self.snapshot_seqs.get(key[1], 0):
+                    continue
+                if message is None:
+                    seq, message = await self.server.cached_depth_snapshot(key[1])
+                if kind == "depth_snapshot":
+                    self.snapshot_seqs[key[1]] = seq
+
+                await self.websocket.send(message)
+        except CONNECTION_CLOSED:
+            self.closed = True
+            self.entries.clear()
+
 
 class LogWebSocketServer:
-    def __init__(self, orderbook_instance):
-        self.orderbook = orderbook_instance
-        self.connected_clients = set()
-        self.last_log_index = 0
-        
+    def __init__(self, registry, max_queue: int = 1000, slow_consumer: str = "snapshot", engine=None):
+        if slow_consumer not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"slow_consumer must be one of {SLOW_CONSUMER_POLICIES}")
+        self.registry = registry
+        # Matching thread or shard router to queue book reads to when the feed shares
+        # its event loop with other work; None calls the books directly
+        self.engine = engine
+        self.max_queue = max_queue
+        self.slow_consumer = slow_consumer
+        # Client -> its client_queue
+        self.connected_clients = {}
+        # Per symbol, (seq, message) of the last snapshot built, until the depth changes
+        self.depth_snapshots = {}
+        # Slow-consumer totals across every client so far
+        self.dropped_total = 0
+        self.resyncs_total = 0
+        self.disconnects_total = 0
+        # Client -> set of symbols it follows; clients not listed follow every symbol
+        self.client_symbols = {}
+        # Per symbol, position in that book's event log of the next entry to broadcast
+        self.log_cursors = {}
+        # Clients subscribed to the aggregated depth channel -> {symbol: number of levels}
+        self.depth_subscribers = {}
+        # Clients subscribed to the trades channel -> set of symbols, and per symbol the
+        # position of the next trade to publish (only tracked while someone listens)
+        self.trade_subscribers = {}
+        self.trade_cursors = {}
+        # Clients subscribed to the analytics channel -> {symbol: (window, bar, levels)},
+        # and when analytics were last sent
+        self.analytics_subscribers = {}
+        self.analytics_sent = 0.0
+        # Per symbol, seq of the last depth_update sent; older snapshots aren't cached
+        self.depth_seqs = {}
+        # Per symbol, the BBO channel's subscribers -> bbo_subscription, and
+        # (book version, seq, top of book, message) of the latest BBO message
+        self.bbo_subscribers = {}
+        self.bbo_latest = {}
+        # Symbols with a subscriber that hasn't been sent the latest BBO yet
+        self.bbo_pending = set()
+
+        self.poll_time = None
+        if registry.metrics is not None:
+            self.add_metrics(registry.metrics)
+
+    def add_metrics(self, metrics):
+        self.poll_time = metrics.histogram("ws_poll_seconds", "Time to read new events and queue them for every client")
+        metrics.gauge("ws_clients", "Connected WebSocket clients", lambda: len(self.connected_clients))
+        metrics.gauge("ws_queued_messages", "Messages queued for all WebSocket clients",
+                      lambda: sum(len(queue.entries) for queue in list(self.connected_clients.values())))
+        metrics.gauge("ws_max_queue_depth", "Longest WebSocket client queue",
+                      lambda: max([len(queue.entries) for queue in list(self.connected_clients.values())], default=0))
+        metrics.gauge("ws_dropped_messages_total", "Queued messages dropped for slow consumers",
+                      lambda: self.dropped_total, kind="counter")
+        metrics.gauge("ws_resyncs_total", "Slow consumers sent fresh snapshots instead of their backlog",
+                      lambda: self.resyncs_total, kind="counter")
+        metrics.gauge("ws_disconnects_total", "Slow consumers disconnected",
+                      lambda: self.disconnects_total, kind="counter")
+
+    async def call(self, symbol, method, *args):
+        # Every book read the feed makes. With an engine it's queued and awaited, so
+        # the loop never waits on a book lock, the publisher or a shard's pipe.
+        if self.engine is not None:
+            return await asyncio.wrap_future(self.engine.submit(symbol, method, args))
+        return getattr(self.registry.get(symbol), method)(*args)
+
+    def follows(self, client, symbol):
+        symbols = self.client_symbols.get(client)
+        return symbols is None or symbol in symbols
+
+    def send(self, websocket, key, message, seq=None):
+        # Queues a message for one client; it's sent by that client's task
+        queue = self.connected_clients.get(websocket)
+        if queue is not None:
+            queue.push(key, message, seq)
+
     async def register_client(self, websocket):
-        self.connected_clients.add(websocket)
-        try:
-            recent_logs = self.orderbook.logs[-50:] if len(self.orderbook.logs) > 50 else self.orderbook.logs
+        # Snapshots are queued first and taken when they're sent, so depth_updates
+        # queued meanwhile at or below the snapshot's seq are skipped
+        self.connected_clients[websocket] = client_queue(self, websocket)
+        for symbol in self.registry.symbols():
+            self.send(websocket, ("depth_snapshot", symbol), None)
+
+        for symbol in self.registry.symbols():
+            recent_logs, _ = await self.call(symbol, "read_logs", None, 1000, 50)
             for log in recent_logs:
-                await websocket.send(json.dumps({
+                self.send(websocket, ("log", symbol), json.dumps({
                     "type": "log",
+                    "symbol": symbol,
                     "message": str(log),
                     "timestamp": datetime.now().isoformat()
                 }))
-        except websockets.exceptions.ConnectionClosed:
-            pass
 
     async def unregister_client(self, websocket):
-        self.connected_clients.discard(websocket)
+        queue = self.connected_clients.pop(websocket, None)
+        if queue is not None:
+            queue.closed = True
+            queue.task.cancel()
+        self.client_symbols.pop(websocket, None)
+        self.depth_subscribers.pop(websocket, None)
+        self.trade_subscribers.pop(websocket, None)
+        self.analytics_subscribers.pop(websocket, None)
+        for symbol in list(self.bbo_subscribers):
+            self.unsubscribe_bbo(websocket, symbol)
 
-    async def broadcast_log(self, log_message):
-        if self.connected_clients:
-            message = json.dumps({
-                "type": "log", 
+    def send_to_followers(self, symbol, entries: list):
+        # Entries are encoded once by the caller and the same list is queued for every follower
+        for client, queue in self.connected_clients.items():
+            if self.follows(client, symbol):
+                queue.extend(entries)
+
+    def broadcast_logs(self, symbol, log_messages):
+        if self.connected_clients and log_messages:
+            key = ("log", symbol)
+            timestamp = datetime.now().isoformat()
+            self.send_to_followers(symbol, [(key, None, json.dumps({
+                "type": "log",
+                "symbol": symbol,
                 "message": str(log_message),
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            clients_copy = self.connected_clients.copy()
-            
-            for client in clients_copy:
-                try:
-                    await client.send(message)
-                except websockets.exceptions.ConnectionClosed:
-                    self.connected_clients.discard(client)
-
-    async def broadcast_orderbook(self):
-        if self.connected_clients:
-            with self.orderbook.lock:
-                bids = list(self.orderbook.bids)
-                asks = list(self.orderbook.asks)
-            
-            message = json.dumps({
-                "type": "orderbook",
-                "data": {"bid": bids, "ask": asks},
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            clients_copy = self.connected_clients.copy()
-            
-            for client in clients_copy:
-                try:
-                    await client.send(message)
-                except websockets.exceptions.ConnectionClosed:
-                    self.connected_clients.discard(client)
+                "timestamp": timestamp
+            })) for log_message in log_messages])
+
+    async def depth_snapshot_message(self, symbol):
+        # (seq, encoded depth_snapshot message)
+        seq, bids, asks = await self.call(symbol, "depth_snapshot")
+        return seq, json.dumps({
+            "type": "depth_snapshot",
+            "symbol": symbol,
+            "seq": seq,
+            "data": {"bid": bids, "ask": asks},
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def cached_depth_snapshot(self, symbol):
+        # Clients that resync together share one snapshot until the depth changes
+        snapshot = self.depth_snapshots.get(symbol)
+        if snapshot is None:
+            snapshot = await self.depth_snapshot_message(symbol)
+            # The depth may have changed while it was taken; only keep it if it's current
+            if snapshot[0] >= self.depth_seqs.get(symbol, 0):
+                self.depth_snapshots[symbol] = snapshot
+        return snapshot
+
+    async def broadcast_depth_changes(self, symbol):
+        # Sends only the price levels that changed, as [price, amount] with amount 0
+        # for removed levels. Each symbol has its own seq; a client that sees a gap
+        # should send {"type": "resync", "symbol": ...}.
+        changes = await self.call(symbol, "collect_depth_changes")
+        if changes is None:
+            return
+        seq, bids, asks = changes
+        self.depth_seqs[symbol] = seq
+        self.depth_snapshots.pop(symbol, None)
+        if not self.connected_clients:
+            return
+
+        await self.broadcast_depth_levels(symbol)
+
+        message = json.dumps({
+            "type": "depth_update",
+            "symbol": symbol,
+            "seq": seq,
+            "data": {"bid": bids, "ask": asks},
+            "timestamp": datetime.now().isoformat()
+        })
+
+        self.send_to_followers(symbol, [(("depth_update", symbol), seq, message)])
+
+    async def depth_levels_message(self, symbol, levels):
+        return json.dumps({
+            "type": "depth",
+            "symbol": symbol,
+            "levels": levels,
+            "data": await self.call(symbol, "get_depth", levels),
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def broadcast_depth_levels(self, symbol):
+        # Top-N [price, amount, order count] per subscriber, built once per distinct N
+        messages = {}
+        for client, subscriptions in list(self.depth_subscribers.items()):
+            levels = subscriptions.get(symbol)
+            if levels is None:
+                continue
+            if levels not in messages:
+                messages[levels] = await self.depth_levels_message(symbol, levels)
+            self.send(client, ("depth", symbol, levels), messages[levels])
+
+    async def broadcast_trades(self, symbol):
+        # Every execution report since the last poll in one message per symbol,
+        # encoded once and queued for each subscriber
+        if not any(symbol in symbols for symbols in self.trade_subscribers.values()):
+            self.trade_cursors.pop(symbol, None)
+            return
+
+        trades, self.trade_cursors[symbol] = await self.call(symbol, "read_trades", self.trade_cursors[symbol], None)
+        if not trades:
+            return
+
+        # Whoever is subscribed once the trades are in, including anyone who joined meanwhile
+        subscribers = [client for client, symbols in self.trade_subscribers.items() if symbol in symbols]
+        message = json.dumps({"type": "trades", "symbol": symbol, "data": trades})
+        for client in subscribers:
+            self.send(client, ("trades", symbol), message)
+
+    async def analytics_message(self, symbol, parameters):
+        return json.dumps({
+            "type": "analytics",
+            "symbol": symbol,
+            "data": await self.call(symbol, "get_analytics", *parameters),
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def broadcast_analytics(self, symbol):
+        # Built once per distinct (window, bar, levels) and queued for each subscriber
+        messages = {}
+        for client, subscriptions in list(self.analytics_subscribers.items()):
+            parameters = subscriptions.get(symbol)
+            if parameters is None:
+                continue
+            if parameters not in messages:
+                messages[parameters] = await self.analytics_message(symbol, parameters)
+            self.send(client, ("analytics", symbol, parameters), messages[parameters])
+
+    async def broadcast_bbo(self, symbol):
+        # Builds a new BBO message only when the top of the book or the last trade
+        # changed, then queues the latest one for each subscriber whose interval is
+        # up. A subscriber that was sent nothing in between never sees the skipped
+        # states, so seq can jump.
+        latest = self.bbo_latest.get(symbol)
+        update = await self.call(symbol, "get_bbo", latest[0] if latest is not None else None)
+        if symbol not in self.bbo_subscribers:
+            # The last subscriber left while the book was read
+            return
+        if update is not None:
+            version, bbo = update
+            if latest is not None and bbo == latest[2]:
+                # Touched and put back, or changed below the top: nothing to send
+                latest = self.bbo_latest[symbol] = (version, *latest[1:])
+            else:
+                seq = latest[1] + 1 if latest is not None else 1
+                message = json.dumps({"type": "bbo", "symbol": symbol, "seq": seq, **bbo},
+                                     separators=(",", ":"))
+                latest = self.bbo_latest[symbol] = (version, seq, bbo, message)
+                self.bbo_pending.add(symbol)
+
+        if symbol not in self.bbo_pending:
+            return
+        _, seq, _, message = latest
+        now = time.monotonic()
+        behind = False
+        for client, subscription in self.bbo_subscribers[symbol].items():
+            if subscription.sent_seq == seq:
+                continue
+            if now - subscription.sent_at >= subscription.interval:
+                subscription.sent_at = now
+                subscription.sent_seq = seq
+                self.send(client, ("bbo", symbol), message)
+            else:
+                behind = True
+        if not behind:
+            self.bbo_pending.discard(symbol)
+
+    def unsubscribe_bbo(self, websocket, symbol):
+        subscribers = self.bbo_subscribers.get(symbol)
+        if subscribers is not None:
+            subscribers.pop(websocket, None)
+            if not subscribers:
+                del self.bbo_subscribers[symbol]
+                self.bbo_latest.pop(symbol, None)
+                self.bbo_pending.discard(symbol)
+
+    async def handle_message(self, websocket, data):
+        symbol = data.get("symbol", self.registry.default_symbol)
+        channel = data.get("channel")
+
+        if data.get("type") == "subscribe" and channel == "book":
+            # Follow only the listed symbols; snapshots for them are sent straight away
+            symbols = [symbol for symbol in data.get("symbols", []) if self.registry.get(symbol) is not None]
+            self.client_symbols[websocket] = set(symbols)
+            for symbol in symbols:
+                self.send(websocket, ("depth_snapshot", symbol), None)
+            return
+
+        if self.registry.get(symbol) is None:
+            self.send(websocket, ("error", symbol), json.dumps({"type": "error", "message": f"Unknown symbol: {symbol}"}))
+            return
+
+        if data.get("type") == "resync":
+            self.send(websocket, ("depth_snapshot", symbol), None)
+        elif data.get("type") == "subscribe" and channel == "depth":
+            levels = data.get("levels", 10)
+            if isinstance(levels, int) and levels > 0:
+                self.depth_subscribers.setdefault(websocket, {})[symbol] = levels
+                self.send(websocket, ("depth", symbol, levels), await self.depth_levels_message(symbol, levels))
+        elif data.get("type") == "unsubscribe" and channel == "depth":
+            self.depth_subscribers.get(websocket, {}).pop(symbol, None)
+        elif data.get("type") == "subscribe" and channel == "trades":
+            if symbol not in self.trade_cursors:
+                # Start from the subscription, so fills before the next poll are sent too
+                self.trade_cursors[symbol] = (await self.call(symbol, "read_trades", None, 1000, 0))[1]
+            self.trade_subscribers.setdefault(websocket, set()).add(symbol)
+        elif data.get("type") == "unsubscribe" and channel == "trades":
+            self.trade_subscribers.get(websocket, set()).discard(symbol)
+        elif data.get("type") == "subscribe" and channel == "analytics":
+            parameters = (data.get("window", 60.0), data.get("bar", 1.0), data.get("levels", 20))
+            if not all(isinstance(value, (int, float)) for value in parameters) or not isinstance(parameters[2], int):
+                error = "Window and bar must be numbers and levels an integer."
+            else:
+                # Loads NumPy on the first analytics subscription
+                from orderbook.analytics import analytics_error
+                error = analytics_error(*parameters)
+            if error:
+                self.send(websocket, ("error", symbol), json.dumps({"type": "error", "message": error}))
+                return
+            self.analytics_subscribers.setdefault(websocket, {})[symbol] = parameters
+            self.send(websocket, ("analytics", symbol, parameters), await self.analytics_message(symbol, parameters))
+        elif data.get("type") == "unsubscribe" and channel == "analytics":
+            self.analytics_subscribers.get(websocket, {}).pop(symbol, None)
+        elif data.get("type") == "subscribe" and channel == "bbo":
+            interval = data.get("interval", 0)
+            if not isinstance(interval, (int, float)) or not interval >= 0:
+                self.send(websocket, ("error", symbol), json.dumps({"type": "error",
+                                                                    "message": "Interval must be a number of seconds."}))
+                return
+            # The next poll sends the latest BBO straight away
+            self.bbo_subscribers.setdefault(symbol, {})[websocket] = bbo_subscription(interval)
+            self.bbo_pending.add(symbol)
+        elif data.get("type") == "unsubscribe" and channel == "bbo":
+            self.unsubscribe_bbo(websocket, symbol)
 
     async def handle_client(self, websocket):
         await self.register_client(websocket)
@@ -70,39 +492,67 @@ class LogWebSocketServer:
                 try:
                     data = json.loads(message)
                 except json.JSONDecodeError:
-                    pass
-        except websockets.exceptions.ConnectionClosed:
+                    continue
+
+                if isinstance(data, dict):
+                    await self.handle_message(websocket, data)
+        except CONNECTION_CLOSED:
             pass
         finally:
             await self.unregister_client(websocket)
 
+    async def poll_symbol(self, symbol, analytics_due: bool):
+        # Only queues messages, so a slow client can't hold up the loop
+        new_logs, self.log_cursors[symbol] = await self.call(symbol, "read_logs", self.log_cursors.get(symbol, 0), None)
+        self.broadcast_logs(symbol, new_logs)
+        await self.broadcast_depth_changes(symbol)
+        await self.broadcast_trades(symbol)
+        if analytics_due:
+            await self.broadcast_analytics(symbol)
+
     def start_monitoring_logs(self):
         async def monitor_logs():
             while True:
                 try:
-                    current_log_count = len(self.orderbook.logs)
-                    if current_log_count > self.last_log_index:
-                        new_logs = self.orderbook.logs[self.last_log_index:]
-                        for log in new_logs:
-                            await self.broadcast_log(log)
-                        self.last_log_index = current_log_count
-                    
-                    await self.broadcast_orderbook()
-                    
+                    if self.poll_time is not None:
+                        start = time.perf_counter_ns()
+
+                    analytics_due = self.analytics_subscribers and time.monotonic() - self.analytics_sent >= ANALYTICS_INTERVAL
+                    if analytics_due:
+                        self.analytics_sent = time.monotonic()
+
+                    # Books are read concurrently; each symbol's messages stay in order
+                    await asyncio.gather(*(self.poll_symbol(symbol, analytics_due)
+                                           for symbol in self.registry.symbols()))
+
+                    if self.poll_time is not None:
+                        self.poll_time.observe(time.perf_counter_ns() - start)
                     await asyncio.sleep(0.1)  # Check every 100ms
                 except Exception as e:
                     print(f"Error in log monitoring: {e}")
                     await asyncio.sleep(1)
-        
+
+        async def monitor_bbo():
+            # Separate from the 100ms poll so BBO subscribers can ask for faster updates.
+            # Each book is checked in O(1) and idles at one comparison when nothing moved.
+            while True:
+                try:
+                    await asyncio.gather(*(self.broadcast_bbo(symbol) for symbol in list(self.bbo_subscribers)))
+                    await asyncio.sleep(BBO_POLL_INTERVAL)
+                except Exception as e:
+                    print(f"Error in BBO monitoring: {e}")
+                    await asyncio.sleep(1)
+
         asyncio.create_task(monitor_logs())
+        asyncio.create_task(monitor_bbo())
 
     def start_server(self, host="localhost", port=8765):
         async def run_server():
             print(f"WebSocket server starting on ws://{host}:{port}")
-            
+
             self.start_monitoring_logs()
-            
+
             async with websockets.serve(self.handle_client, host, port):
                 await asyncio.Future()  # Run forever
-        
-        asyncio.run(run_server())
\ No newline at end of file
+
+        asyncio.run(run_server())
@@ -0,0 +1,45 @@
+import asyncio
+import threading
+import time
+import pytest
+from werkzeug.serving import make_server
+from orderbook.book_registry import book_registry
+from orderbook.flask_server import flask_server
+from orderbook.orderbook_client import orderbook_client
+from orderbook.async_orderbook_client import async_orderbook_client
+
+@pytest.fixture
+def server_port(tmp_path):
+    registry = book_registry(["A", "B"])
+    registry.open_tapes(str(tmp_path))
+    server = make_server("localhost", 0, flask_server(registry), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.socket.getsockname()[1]
+    with orderbook_client("localhost", port, symbol="A") as client:
+        client.new_limit_order(1.0, 100.0, "ask", account=1)
+        client.new_limit_order(2.0, 99.0, "bid", account=2)
+        client.new_order(0.5, "buy", account=2)
+        # The tape copies the logs in the background; the trade is taped last
+        for _ in range(100):
+            if "trade" in client.get_history(by="seq")["type"]:
+                break
+            time.sleep(0.05)
+    yield port
+    server.shutdown()
+
+def test_async_client_matches_the_sync_client(server_port):
+    async def read():
+        async with async_orderbook_client("localhost", server_port, symbol="A") as client:
+            return await asyncio.gather(client.get_bbo(), client.get_history(by="seq"), client.get_account(2),
+                                        client.get_analytics(window=10.0, levels=5), client.get_bbo(symbol="B"))
+
+    bbo, history, account, analytics, other = asyncio.run(read())
+    with orderbook_client("localhost", server_port, symbol="A") as client:
+        assert bbo == client.get_bbo()
+        assert history == client.get_history(by="seq")
+        assert account == client.get_account(2)
+        assert analytics.keys() == client.get_analytics(window=10.0, levels=5).keys()
+        assert other == client.get_bbo(symbol="B")
+    assert bbo["bid"] == [99.0, 2.0] and bbo["ask"] == [100.0, 0.5]
+    assert account["position"] == 0.5
+    assert other["bid"] is None
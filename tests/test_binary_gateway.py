@@ -0,0 +1,71 @@
+import socket
+import threading
+import time
+import pytest
+from orderbook.book_registry import book_registry
+from orderbook.binary_gateway import (binary_gateway, REQUEST, ACK, LIMIT, MARKET, AMEND, ACCEPTED, FILLED, DONE,
+                                      AMENDED, REJECTED, INVALID_REQUEST, INVALID_PRICE, INVALID_AMOUNT,
+                                      ORDER_NOT_FOUND, WOULD_CROSS, CANNOT_FILL, RISK_LIMIT, POST_ONLY)
+from orderbook.binary_client import binary_orderbook_client
+
+def acks(gateway: binary_gateway, *requests):
+    # Runs packed requests through the gateway as one batch and unpacks the acks
+    decoded = list(REQUEST.iter_unpack(b"".join(requests)))
+    return list(ACK.iter_unpack(gateway.process(decoded)))
+
+def request(type, side=0, time_in_force=0, flags=0, reference=1, symbol=0, id=0, price=0, amount=0):
+    return REQUEST.pack(type, side, time_in_force, flags, reference, symbol, id, price, amount)
+
+def test_orders_travel_as_ticks_and_lots():
+    registry = book_registry(["A"])
+    gateway = binary_gateway(registry)
+    results = acks(gateway,
+                   request(LIMIT, 1, price=10_001, amount=1_500),
+                   request(LIMIT, 0, price=10_001, amount=1_000, reference=2),
+                   request(LIMIT, 0, price=10_000, amount=2_000, reference=3),
+                   request(MARKET, 0, amount=1_000, reference=4),
+                   request(AMEND, id=3, amount=500, reference=5))
+    assert results == [(ACCEPTED, 0, 1, 1, 0, 1_500), (FILLED, 0, 2, 2, 1_000, 0), (ACCEPTED, 0, 3, 3, 0, 2_000),
+                       (DONE, 0, 4, 4, 500, 0), (AMENDED, 0, 5, 3, 0, 500)]
+    assert registry.get("A").get_order_book()["bid"] == [(0.5, 100.0, 3)]
+
+def test_rejects_carry_a_reason():
+    registry = book_registry(["A"], max_order_size=10.0)
+    gateway = binary_gateway(registry)
+    gateway.process(list(REQUEST.iter_unpack(request(LIMIT, 1, price=10_000, amount=1_000))))
+    results = acks(gateway,
+                   request(LIMIT, 0, symbol=5, price=10_000, amount=1_000),
+                   request(LIMIT, 0, price=0, amount=1_000),
+                   request(LIMIT, 0, price=10_000, amount=-1),
+                   request(AMEND, id=99, amount=1_000),
+                   request(LIMIT, 0, flags=POST_ONLY, price=10_000, amount=1_000),
+                   request(LIMIT, 0, time_in_force=2, price=10_000, amount=2_000),
+                   request(LIMIT, 0, price=9_000, amount=20_000, id=7))
+    assert [(status, reason) for status, reason, *_ in results] == [
+        (REJECTED, INVALID_REQUEST), (REJECTED, INVALID_PRICE), (REJECTED, INVALID_AMOUNT),
+        (REJECTED, ORDER_NOT_FOUND), (REJECTED, WOULD_CROSS), (REJECTED, CANNOT_FILL), (REJECTED, RISK_LIMIT)]
+
+@pytest.fixture
+def gateway_port():
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    gateway = binary_gateway(book_registry(["A"]))
+    threading.Thread(target=gateway.start_server, args=("localhost", port), daemon=True).start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("localhost", port)).close()
+            return port
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Gateway did not start")
+
+def test_client_converts_at_its_edge(gateway_port):
+    with binary_orderbook_client("localhost", gateway_port) as client:
+        assert client.new_limit_order(1.5, 100.01, "ask") == {
+            "status": "accepted", "reason": None, "reference": 1, "id": 1, "filled": 0.0, "leaves": 1.5}
+        assert client.new_order(2.0, "buy")["filled"] == 1.5
+        assert client.new_order(1.0, "buy")["reason"] is None
+        assert client.amend_order(42, 1.0)["reason"] == "order not found"
+        with pytest.raises(ValueError):
+            client.limit(1.0, 100.001, "bid")
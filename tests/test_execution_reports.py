@@ -0,0 +1,52 @@
+from orderbook.book_registry import book_registry
+from orderbook.matching_thread import matching_thread
+from orderbook.orderbook_server import orderbook_server, ORDER_RESTING, ORDER_FILLED, ORDER_DONE
+
+def test_locked_methods_return_ticks_lots_and_a_trade_range():
+    book = orderbook_server()
+    book.new_limit_order(1.0, 100.0, "ask")
+    book.new_limit_order(1.0, 101.0, "ask")
+    with book.lock:
+        entry = book.limit_order_locked(1.5, 101.0, "bid")
+        market = book.market_order_locked(1.0, "buy")
+    assert entry == (ORDER_FILLED, 3, "bid", 10100, 1500, 1500, 0, 0, 0, 2)
+    assert market == (ORDER_DONE, 4, "buy", None, 1000, 500, 500, 0, 2, 1)
+    with book.lock:
+        assert book.limit_order_locked(1.0, 99.0, "bid")[0] == ORDER_RESTING
+
+def test_limit_order_result_carries_its_own_fills():
+    book = orderbook_server()
+    book.new_limit_order(1.0, 100.0, "ask")
+    book.new_limit_order(1.0, 101.0, "ask")
+    result = book.new_limit_order(3.0, 101.0, "bid")
+    assert result["message"] == "Order added."
+    assert (result["filled"], result["resting"]) == (2.0, 1.0)
+    assert [(fill["price"], fill["amount"], fill["taker_id"]) for fill in result["fills"]] == [
+        (100.0, 1.0, 3), (101.0, 1.0, 3)]
+
+def test_market_order_messages():
+    book = orderbook_server()
+    book.new_limit_order(1.0, 100.0, "ask")
+    book.new_limit_order(1.0, 102.0, "ask")
+    result = book.new_order(3.0, "buy", 101.0)
+    assert result["message"] == "Partially filled. 1.0 executed, 2.0 remaining (no more asks available at or below 101.0)"
+    assert len(result["fills"]) == 1
+    assert book.new_order(1.0, "buy")["message"] == "Market buy order fully executed."
+    assert book.new_order(1.0, "sell")["message"].startswith("Partially filled. 0.0 executed")
+
+def test_batches_and_the_matching_thread_return_result_dicts():
+    registry = book_registry(["A"])
+    results = registry.submit_batch([
+        {"symbol": "A", "op": "limit", "amount": 1.0, "price": 100.0, "type": "ask"},
+        {"symbol": "A", "op": "limit", "amount": 1.0, "price": 100.0, "type": "bid", "time_in_force": "IOC"},
+        {"symbol": "A", "op": "market", "amount": 1.0, "type": "sell"},
+    ])
+    assert [result["message"] for result in results] == [
+        "Order added.", "Order filled.", "Partially filled. 0.0 executed, 1.0 remaining (no more bids available)"]
+    assert results[1]["fills"][0]["maker_id"] == 1
+
+    engine = matching_thread(registry)
+    engine.submit("A", "new_limit_order", (1.0, 100.0, "ask")).result()
+    result = engine.submit("A", "new_order", (1.0, "buy")).result()
+    assert result["message"] == "Market buy order fully executed."
+    assert result["fills"][0]["price"] == 100.0
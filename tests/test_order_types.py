@@ -0,0 +1,32 @@
+from orderbook.orderbook_server import orderbook_server
+from orderbook.event_log import FILLED
+
+def filled_events(book: orderbook_server):
+    # (id, price, amount) of every FILLED event, in API units
+    events = book.logs.read(0)[0]
+    return [(id, book.prices.decode(price), book.amounts.decode(amount))
+            for n, type, id, price, amount, timestamp in events if type == FILLED]
+
+def test_crossing_limit_order_is_logged_filled_at_its_last_fill_price():
+    book = orderbook_server()
+    book.new_limit_order(1.0, 100.0, "ask")
+    book.new_limit_order(2.0, 101.0, "ask")
+    result = book.new_limit_order(3.0, 105.0, "bid")
+    assert result["message"] == "Order filled."
+    assert [fill["price"] for fill in result["fills"]] == [100.0, 101.0]
+    assert filled_events(book)[-1] == (result["id"], 101.0, 3.0)
+
+def test_ioc_order_is_logged_filled_at_its_last_fill_price():
+    book = orderbook_server()
+    book.new_limit_order(1.0, 99.0, "bid")
+    result = book.new_limit_order(1.0, 90.0, "ask", "IOC")
+    assert filled_events(book) == [(1, 99.0, 1.0), (result["id"], 99.0, 1.0)]
+
+def test_deferred_match_logs_both_sides_at_the_trade_price():
+    book = orderbook_server(inline_matching=False)
+    book.new_limit_order(1.0, 100.0, "ask")
+    book.new_limit_order(1.0, 102.0, "bid")
+    with book.lock:
+        book.match_crosses()
+    assert book.read_trades(0)[0][0]["price"] == 100.0
+    assert filled_events(book) == [(2, 100.0, 1.0), (1, 100.0, 1.0)]
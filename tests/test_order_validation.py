@@ -0,0 +1,67 @@
+import math
+import pytest
+from orderbook.book_registry import book_registry
+from orderbook.flask_server import flask_server
+from orderbook.journal import read_records
+
+# Values that are not any whole number of ticks or lots the engine can store
+UNREPRESENTABLE = [math.nan, math.inf, -math.inf, 1e30]
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = book_registry(["DEFAULT"])
+    registry.open_journals(str(tmp_path))
+    return registry
+
+@pytest.fixture
+def client(registry):
+    return flask_server(registry).test_client()
+
+def journal_types(registry, tmp_path):
+    book = registry.get()
+    book.journal.wait(book.journal.position)
+    return [record[1] for record in read_records(str(tmp_path / "DEFAULT"), 0)]
+
+@pytest.mark.parametrize("value", UNREPRESENTABLE)
+def test_market_order_rejects_unrepresentable_amount(client, registry, tmp_path, value):
+    response = client.post("/order", json={"amount": value, "type": "buy"})
+    assert response.status_code == 200
+    assert response.get_json().startswith("Amount must be")
+    assert registry.get().id == 0
+    assert journal_types(registry, tmp_path) == []
+
+@pytest.mark.parametrize("value", UNREPRESENTABLE)
+def test_market_order_rejects_unrepresentable_price(client, registry, tmp_path, value):
+    response = client.post("/order", json={"amount": 1.0, "type": "buy", "price": value})
+    assert response.status_code == 200
+    assert isinstance(response.get_json(), str)
+    assert registry.get().id == 0
+    assert journal_types(registry, tmp_path) == []
+
+@pytest.mark.parametrize("value", UNREPRESENTABLE)
+def test_amend_rejects_unrepresentable_amount(client, registry, tmp_path, value):
+    id = client.post("/limit-order", json={"amount": 1.0, "price": 100.0, "type": "bid"}).get_json()["id"]
+    response = client.post("/amend-order", json={"id": id, "amount": value})
+    assert response.status_code == 200
+    assert response.get_json().startswith("Amount must be")
+    assert registry.get().get_order_book()["bid"] == [(1.0, 100.0, id)]
+    assert len(journal_types(registry, tmp_path)) == 1
+
+@pytest.mark.parametrize("value", UNREPRESENTABLE)
+def test_batch_rejects_unrepresentable_values(client, registry, tmp_path, value):
+    response = client.post("/orders/batch", json={"orders": [
+        {"op": "market", "amount": value, "type": "sell"},
+        {"op": "market", "amount": 1.0, "type": "sell", "price": value},
+        {"op": "limit", "amount": value, "price": 100.0, "type": "bid"},
+        {"op": "limit", "amount": 1.0, "price": value, "type": "ask", "time_in_force": "IOC"},
+    ]})
+    assert response.status_code == 200
+    assert all(isinstance(result, str) for result in response.get_json()["results"])
+    assert registry.get().id == 0
+    assert journal_types(registry, tmp_path) == []
+
+def test_rejected_values_do_not_use_up_ids(registry):
+    book = registry.get()
+    assert isinstance(book.new_order(1e30, "buy"), str)
+    assert isinstance(book.new_limit_order(1e30, 100.0, "bid", "IOC"), str)
+    assert book.new_limit_order(1.0, 100.0, "bid")["id"] == 1
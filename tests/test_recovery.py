@@ -0,0 +1,51 @@
+import pytest
+from orderbook.book_registry import book_registry
+from orderbook.flask_server import flask_server
+
+def start(directory, **book_options):
+    registry = book_registry(["DEFAULT"], **book_options)
+    registry.open_journals(directory, "group")
+    return registry, flask_server(registry).test_client()
+
+def stop(registry):
+    for symbol, book in registry.items():
+        book.journal.close()
+
+def accounts(client):
+    return [client.get(f"/account?account={account}").get_json() for account in (1, 2, 3)]
+
+@pytest.mark.parametrize("snapshot", [False, True])
+@pytest.mark.parametrize("self_trade_prevention", ["cancel-newest", "decrement"])
+def test_positions_survive_a_restart(tmp_path, snapshot, self_trade_prevention):
+    registry, client = start(str(tmp_path), self_trade_prevention=self_trade_prevention)
+    client.post("/limit-order", json={"amount": 5.0, "price": 100.0, "type": "ask", "account": 1})
+    client.post("/limit-order", json={"amount": 2.0, "price": 101.0, "type": "ask", "account": 2})
+    # Crosses account 1 and rests the rest
+    client.post("/limit-order", json={"amount": 3.0, "price": 100.0, "type": "bid", "account": 2})
+    if snapshot:
+        registry.get().write_snapshot()
+    # An IOC and a market order that take from more than one account
+    client.post("/limit-order", json={"amount": 4.0, "price": 101.0, "type": "bid", "account": 3,
+                                      "time_in_force": "IOC"})
+    client.post("/limit-order", json={"amount": 1.0, "price": 99.0, "type": "bid", "account": 1})
+    client.post("/order", json={"amount": 2.0, "type": "sell", "account": 2})
+    client.post("/order", json={"amount": 1.0, "type": "buy"})
+    before = accounts(client)
+    assert [account["position"] for account in before] == [-4.0, 0.0, 4.0]
+    stop(registry)
+
+    registry, client = start(str(tmp_path), self_trade_prevention=self_trade_prevention)
+    assert accounts(client) == before
+    stop(registry)
+
+def test_position_limit_holds_across_a_restart(tmp_path):
+    registry, client = start(str(tmp_path), max_position=2.0)
+    client.post("/limit-order", json={"amount": 2.0, "price": 100.0, "type": "ask"})
+    client.post("/order", json={"amount": 2.0, "type": "buy", "account": 1})
+    stop(registry)
+
+    registry, client = start(str(tmp_path), max_position=2.0)
+    client.post("/limit-order", json={"amount": 1.0, "price": 100.0, "type": "ask"})
+    assert client.post("/order", json={"amount": 1.0, "type": "buy", "account": 1}).get_json() == \
+        "Order could take the account over its position limit."
+    stop(registry)
@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+from orderbook.book_registry import book_registry
+from orderbook.websocket_server import LogWebSocketServer, client_queue, SLOW_CONSUMER_POLICIES
+
+class stalled_client:
+    # A WebSocket client that never finishes reading its first message
+    def __init__(self):
+        self.closed = False
+
+    async def send(self, message):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000, reason=""):
+        self.closed = True
+
+@pytest.mark.parametrize("policy", SLOW_CONSUMER_POLICIES)
+def test_queue_stays_bounded_between_polls(policy):
+    async def flood():
+        server = LogWebSocketServer(book_registry(["A"]), max_queue=10, slow_consumer=policy)
+        client = stalled_client()
+        queue = server.connected_clients[client] = client_queue(server, client)
+        await asyncio.sleep(0)
+        longest = 0
+        for n in range(1000):
+            queue.push(("log", "A"), f"log {n}")
+            queue.extend([(("bbo", "A"), None, "bbo"), (("trades", "A"), None, "trades")])
+            longest = max(longest, len(queue.entries))
+        await asyncio.sleep(0)
+        return server, queue, client, longest
+
+    server, queue, client, longest = asyncio.run(flood())
+    assert longest <= 10 + 2
+    if policy == "disconnect":
+        assert queue.closed and client.closed and server.disconnects_total == 1
+    else:
+        assert server.dropped_total > 0